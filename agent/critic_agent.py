@@ -1,16 +1,68 @@
 # agent/critic_agent.py
 
 from __future__ import annotations
-from typing import Dict
+from typing import Dict, Optional
 import json
-
-import google.generativeai as genai
-
-from config import GEMINI_API_KEY, GEMINI_MODEL, FAKE_MODE
-
-# Configure Gemini once
-if not FAKE_MODE and GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
+import threading
+
+from .llm_client import get_llm_client
+from .response_cache import DiskResponseCache, make_cache_key
+from config import (
+    GEMINI_API_KEY,
+    GEMINI_MODEL,
+    FAKE_MODE,
+    CRITIC_CACHE_DIR,
+    CRITIC_CACHE_TTL,
+    CRITIC_CACHE_MAX_BYTES,
+)
+
+# Bump whenever the prompt below changes, so cached critiques are not reused.
+CRITIC_PROMPT_VERSION = "1"
+
+# Prompt: no ###, more “enterprise”
+_CRITIC_PROMPT_TEMPLATE = (
+    "You are a Senior AI Risk Manager reviewing an AI agent run.\n\n"
+    "You will receive:\n"
+    "1. A JSON summary of the agent run.\n"
+    "2. A detailed incident report.\n\n"
+    "Provide feedback in **markdown** following this structure exactly, "
+    "using section titles as plain text or bold, not markdown headings:\n\n"
+    "Executive summary\n"
+    "- Overall: one-sentence evaluation of the run.\n"
+    "- Main failure: the dominant MRI tag.\n"
+    "- Key fix: one concrete improvement.\n\n"
+    "---\n\n"
+    "Diagnosis (What went wrong?)\n"
+    "- 3–5 bullet points.\n\n"
+    "Recommendations (How to improve?)\n"
+    "- 3–6 bullets or a small table.\n\n"
+    "Simple experiment/test\n"
+    "- Propose one small test that could validate whether improvements work.\n\n"
+    "Here is the JSON summary:\n\n"
+    "```json\n"
+    "{summary_json}\n"
+    "```\n\n"
+    "Here is the detailed MRI incident report:\n\n"
+    "```\n"
+    "{report_markdown}\n"
+    "```\n"
+)
+
+# built on first use (see _get_critic_cache), so importing this module
+# (e.g. in FAKE_MODE) does not touch the disk
+_critic_cache: Optional[DiskResponseCache] = None
+_critic_cache_lock = threading.Lock()
+
+
+def _get_critic_cache() -> Optional[DiskResponseCache]:
+    global _critic_cache
+    if _critic_cache is None and CRITIC_CACHE_DIR:
+        with _critic_cache_lock:  # concurrent /run_intern requests share one
+            if _critic_cache is None:
+                _critic_cache = DiskResponseCache(
+                    CRITIC_CACHE_DIR, ttl_seconds=CRITIC_CACHE_TTL, max_bytes=CRITIC_CACHE_MAX_BYTES
+                )
+    return _critic_cache
 
 
 def _gemini_critic_call(report_markdown: str, summary: Dict) -> str:
@@ -74,48 +126,48 @@ def _gemini_critic_call(report_markdown: str, summary: Dict) -> str:
     # ---------------------------
     # REAL GEMINI CRITIC
     # ---------------------------
-    model = genai.GenerativeModel(GEMINI_MODEL)
-
     # Ensure JSON is safely embedded
     summary_json = json.dumps(summary, indent=2)
 
-    # Prompt: no ###, more “enterprise”
-    prompt = (
-        "You are a Senior AI Risk Manager reviewing an AI agent run.\n\n"
-        "You will receive:\n"
-        "1. A JSON summary of the agent run.\n"
-        "2. A detailed incident report.\n\n"
-        "Provide feedback in **markdown** following this structure exactly, "
-        "using section titles as plain text or bold, not markdown headings:\n\n"
-        "Executive summary\n"
-        "- Overall: one-sentence evaluation of the run.\n"
-        "- Main failure: the dominant MRI tag.\n"
-        "- Key fix: one concrete improvement.\n\n"
-        "---\n\n"
-        "Diagnosis (What went wrong?)\n"
-        "- 3–5 bullet points.\n\n"
-        "Recommendations (How to improve?)\n"
-        "- 3–6 bullets or a small table.\n\n"
-        "Simple experiment/test\n"
-        "- Propose one small test that could validate whether improvements work.\n\n"
-        "Here is the JSON summary:\n\n"
-        "```json\n"
-        f"{summary_json}\n"
-        "```\n\n"
-        "Here is the detailed MRI incident report:\n\n"
-        "```\n"
-        f"{report_markdown}\n"
-        "```\n"
+    prompt = _CRITIC_PROMPT_TEMPLATE.format(
+        summary_json=summary_json,
+        report_markdown=report_markdown,
     )
 
-    resp = model.generate_content(
-        prompt,
-        generation_config={"temperature": 0.6},
+    resp = get_llm_client().generate(prompt, temperature=0.6, model=GEMINI_MODEL)
+
+    return resp.text
+
+
+def _critic_cache_key(summary: Dict, report_markdown: str) -> str:
+    return make_cache_key(
+        GEMINI_MODEL,
+        CRITIC_PROMPT_VERSION,
+        json.dumps(summary, sort_keys=True),
+        report_markdown,
     )
 
-    return resp.text or ""
 
+def get_critic_advice(summary: Dict, report_markdown: str, use_cache: bool = True) -> str:
+    """
+    Public entrypoint used by the backend / frontend.
 
-def get_critic_advice(summary: Dict, report_markdown: str) -> str:
-    """Public entrypoint used by the backend / frontend"""
-    return _gemini_critic_call(report_markdown, summary)
+    Real Gemini critiques are cached on disk by (model, prompt version,
+    inputs); pass use_cache=False to force a fresh critique (the new answer
+    still refreshes the cache).
+    """
+    # FAKE_MODE answers are instant and deterministic: nothing to cache
+    cache = _get_critic_cache() if (GEMINI_API_KEY and not FAKE_MODE) else None
+    if cache is None:
+        return _gemini_critic_call(report_markdown, summary)
+
+    key = _critic_cache_key(summary, report_markdown)
+    if use_cache:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    text = _gemini_critic_call(report_markdown, summary)
+    if text:
+        cache.put(key, text)
+    return text
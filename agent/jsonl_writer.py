@@ -0,0 +1,133 @@
+# agent/jsonl_writer.py
+
+"""
+Buffered, append-only JSONL writer used by MRILogger's streaming mode.
+
+Records are encoded on the caller's thread and appended to an in-memory
+buffer; the buffer is written out when it reaches `flush_bytes`, and a
+background thread also flushes it every `flush_interval` seconds, so a
+crashed run loses at most that much data. With `rotate_bytes` set, the file
+is split into segments:
+
+    run.jsonl, run.jsonl.1, run.jsonl.2, ...
+
+which backend.parser.read_jsonl_log reads back in that order.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+
+def segment_path(path: str, index: int) -> str:
+    return path if index == 0 else f"{path}.{index}"
+
+
+class JSONLWriter:
+    """
+    path:           first segment; later segments get a .N suffix
+    flush_bytes:    write the buffer out once it holds this many bytes
+    flush_interval: seconds between background flushes (0 = no thread)
+    rotate_bytes:   start a new segment once the current one reaches this
+                    size (None = single file)
+    fsync:          fsync after each flush (durable, but slower)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_bytes: int = 64 * 1024,
+        flush_interval: float = 1.0,
+        rotate_bytes: Optional[int] = None,
+        fsync: bool = False,
+    ):
+        self.path = path
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.rotate_bytes = rotate_bytes
+        self.fsync = fsync
+
+        self._lock = threading.Lock()
+        self._buffer: List[bytes] = []
+        self._buffered = 0
+        self._segment = 0
+        self._file = open(path, "ab")
+        self._written = self._file.tell()
+        self._closed = False
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if flush_interval > 0:
+            self._thread = threading.Thread(
+                target=self._flush_periodically, name="mri-jsonl-flush", daemon=True
+            )
+            self._thread.start()
+
+    @property
+    def segments(self) -> List[str]:
+        return [segment_path(self.path, i) for i in range(self._segment + 1)]
+
+    def write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(
+            record, ensure_ascii=False, separators=(",", ":"), default=str
+        ).encode("utf-8") + b"\n"
+        with self._lock:
+            if self._closed:
+                raise ValueError("write to closed JSONLWriter")
+            self._buffer.append(line)
+            self._buffered += len(line)
+            if self._buffered >= self.flush_bytes:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._closed:
+                self._flush_locked()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            if self._closed:
+                return
+            self._flush_locked()
+            self._file.close()
+            self._closed = True
+
+    def __enter__(self) -> "JSONLWriter":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # ---- internals ----
+
+    def _flush_periodically(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def _flush_locked(self) -> None:
+        # rotate between records only, so every segment holds whole lines
+        for line in self._buffer:
+            if self.rotate_bytes and self._written and self._written + len(line) > self.rotate_bytes:
+                self._rotate_locked()
+            self._file.write(line)
+            self._written += len(line)
+        self._buffer = []
+        self._buffered = 0
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def _rotate_locked(self) -> None:
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._file.close()
+        self._segment += 1
+        self._file = open(segment_path(self.path, self._segment), "ab")
+        self._written = self._file.tell()
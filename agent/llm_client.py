@@ -0,0 +1,263 @@
+# agent/llm_client.py
+
+"""
+Shared LLM client used by the Chaos Intern and the Critic.
+
+- model instances are created once per (model, generation config) and reused
+- calls go through a requests-per-minute and a tokens-per-minute token
+  bucket; callers that would exceed the budget wait in FIFO order instead
+  of hitting quota errors (and retry storms)
+- backends are pluggable: GeminiBackend for real calls, FakeBackend for
+  offline runs and tests
+
+    client = get_llm_client()
+    result = client.generate(prompt, temperature=0.9)
+    result.text, result.prompt_tokens, result.output_tokens, result.latency_s
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import (
+    FAKE_MODE,
+    GEMINI_API_KEY,
+    GEMINI_MODEL,
+    LLM_EXPECTED_OUTPUT_TOKENS,
+    LLM_RPM,
+    LLM_TPM,
+)
+
+
+@dataclass
+class LLMResult:
+    text: str
+    model: str
+    prompt_tokens: int
+    output_tokens: int
+    latency_s: float = 0.0
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) used for budgeting."""
+    return max(1, len(text) // 4)
+
+
+# ---------- rate limiting ----------
+
+
+class TokenBucket:
+    """
+    Classic token bucket refilled continuously at `per_minute` / 60 per second.
+    Not thread-safe on its own; LLMClient guards it with its lock.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.level = self.capacity
+        self._last = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._last) * self.rate)
+        self._last = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be taken (0 if available now)."""
+        self._refill()
+        amount = min(amount, self.capacity)  # oversized requests must still pass
+        missing = amount - self.level
+        return 0.0 if missing <= 0 else missing / self.rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def adjust(self, delta: float) -> None:
+        """Refund (delta > 0) or charge (delta < 0) after the fact."""
+        self._refill()
+        self.level = min(self.capacity, self.level + delta)
+
+
+# ---------- backends ----------
+
+
+class GeminiBackend:
+    """google-generativeai backend with one GenerativeModel per (model, config)."""
+
+    def __init__(self, api_key: Optional[str] = GEMINI_API_KEY):
+        import google.generativeai as genai
+
+        if api_key:
+            genai.configure(api_key=api_key)
+        self._genai = genai
+        self._models: Dict[Tuple[str, Tuple[Tuple[str, Any], ...]], Any] = {}
+        self._lock = threading.Lock()
+
+    def _model(self, model: str, config: Dict[str, Any]):
+        key = (model, tuple(sorted(config.items())))
+        with self._lock:
+            instance = self._models.get(key)
+            if instance is None:
+                instance = self._genai.GenerativeModel(model, generation_config=config)
+                self._models[key] = instance
+            return instance
+
+    def generate(self, prompt: str, model: str, config: Dict[str, Any]) -> LLMResult:
+        resp = self._model(model, config).generate_content(prompt)
+        usage = getattr(resp, "usage_metadata", None)
+        return LLMResult(
+            text=resp.text or "",
+            model=model,
+            prompt_tokens=getattr(usage, "prompt_token_count", None) or estimate_tokens(prompt),
+            output_tokens=getattr(usage, "candidates_token_count", None) or 0,
+        )
+
+
+@dataclass
+class FakeBackend:
+    """
+    Offline backend: no network, deterministic output.
+
+    responder(prompt, config) -> text overrides the default echo response;
+    latency_s simulates model latency; with record=True every call is kept
+    in `calls` (off by default, so a long-running FAKE_MODE server does not
+    hold on to every prompt).
+    """
+
+    responder: Optional[Callable[[str, Dict[str, Any]], str]] = None
+    latency_s: float = 0.0
+    record: bool = False
+    calls: List[Tuple[str, str, Dict[str, Any]]] = field(default_factory=list)
+
+    def generate(self, prompt: str, model: str, config: Dict[str, Any]) -> LLMResult:
+        if self.record:
+            self.calls.append((model, prompt, dict(config)))
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        if self.responder is not None:
+            text = self.responder(prompt, config)
+        else:
+            # Simple fake LLM for offline / zero-cost runs
+            text = f"[FAKE GEMINI RESPONSE]\n\n{prompt[:300]}..."
+        return LLMResult(
+            text=text,
+            model=model,
+            prompt_tokens=estimate_tokens(prompt),
+            output_tokens=estimate_tokens(text),
+        )
+
+
+# ---------- client ----------
+
+
+class LLMClient:
+    """
+    Rate-limited front door for every LLM call.
+
+    rpm / tpm: requests and tokens per minute (0 or None = unlimited).
+    expected_output_tokens: reserved per call before the real usage is known;
+    the difference is settled when the response arrives.
+    """
+
+    def __init__(
+        self,
+        backend,
+        model: str = GEMINI_MODEL,
+        rpm: Optional[float] = LLM_RPM,
+        tpm: Optional[float] = LLM_TPM,
+        expected_output_tokens: int = LLM_EXPECTED_OUTPUT_TOKENS,
+    ):
+        self.backend = backend
+        self.model = model
+        self.expected_output_tokens = expected_output_tokens
+        self._requests = TokenBucket(rpm) if rpm else None
+        self._tokens = TokenBucket(tpm) if tpm else None
+
+        self._cond = threading.Condition()
+        self._next_ticket = 0
+        self._serving = 0
+
+    def _acquire(self, tokens: int) -> None:
+        """Block until this caller's turn and budget come up (FIFO)."""
+        if self._requests is None and self._tokens is None:
+            return
+        with self._cond:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            while True:
+                if ticket == self._serving:
+                    wait = max(
+                        self._requests.wait_time(1) if self._requests else 0.0,
+                        self._tokens.wait_time(tokens) if self._tokens else 0.0,
+                    )
+                    if wait <= 0:
+                        if self._requests:
+                            self._requests.take(1)
+                        if self._tokens:
+                            self._tokens.take(tokens)
+                        self._serving += 1
+                        self._cond.notify_all()
+                        return
+                    self._cond.wait(timeout=wait)
+                else:
+                    self._cond.wait()
+
+    def _settle(self, reserved: int, used: int) -> None:
+        if self._tokens is None:
+            return
+        with self._cond:
+            self._tokens.adjust(reserved - used)
+            self._cond.notify_all()
+
+    def generate(
+        self,
+        prompt: str,
+        temperature: Optional[float] = None,
+        model: Optional[str] = None,
+        **config: Any,
+    ) -> LLMResult:
+        if temperature is not None:
+            config["temperature"] = temperature
+        model = model or self.model
+
+        prompt_tokens = estimate_tokens(prompt)
+        reserved = prompt_tokens + self.expected_output_tokens
+        self._acquire(reserved)
+
+        used = prompt_tokens  # charged if the call fails (429, 5xx, timeout)
+        try:
+            start = time.perf_counter()
+            result = self.backend.generate(prompt, model, config)
+            result.latency_s = time.perf_counter() - start
+            used = result.prompt_tokens + result.output_tokens
+        finally:
+            self._settle(reserved, used)
+        return result
+
+
+_client: Optional[LLMClient] = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client() -> LLMClient:
+    """Process-wide client (FakeBackend in FAKE_MODE or without an API key)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            if FAKE_MODE or not GEMINI_API_KEY:
+                _client = LLMClient(FakeBackend(), rpm=None, tpm=None)
+            else:
+                _client = LLMClient(GeminiBackend())
+        return _client
+
+
+def set_llm_client(client: Optional[LLMClient]) -> None:
+    """Swap the process-wide client (e.g. an LLMClient(FakeBackend()) in tests)."""
+    global _client
+    with _client_lock:
+        _client = client
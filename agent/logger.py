@@ -1,22 +1,90 @@
 # agent/logger.py
 
 import json
+import time
 import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from config import MRI_LOG_FLUSH_BYTES, MRI_LOG_FLUSH_INTERVAL, MRI_LOG_ROTATE_BYTES
+from .jsonl_writer import JSONLWriter
+
+# on_step(step, log): called right after a step is recorded
+StepListener = Callable[[Dict[str, Any], Dict[str, Any]], None]
+
+
+@dataclass
+class Span:
+    """
+    Interval of work behind a step, in monotonic ns since run start,
+    plus metadata to attach to the step (e.g. LLM latency / token usage).
+    """
+
+    start_ns: int
+    end_ns: Optional[int] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_ns(self) -> Optional[int]:
+        return None if self.end_ns is None else self.end_ns - self.start_ns
 
 
 class MRILogger:
     """
     Minimal logger that builds an MRI log in the agreed JSON format.
+
+    Only the run start gets an ISO wall-clock time. Each step records
+    start_ns / end_ns, monotonic nanoseconds since the run started (the
+    parser derives per-step timestamps from them). By default a step is an
+    instant at the time it is logged; pass a Span (see `span()`) to record
+    the work that produced it. Tool results are paired with their tool call
+    by call_id, so their span covers call -> result.
+
+    on_step, if given, is called with (step, log) every time a step is
+    recorded, e.g. to stream steps to a client while the run is going.
+
+    Streaming mode (jsonl_path set): every step is also appended to a JSONL
+    file as it is logged, one record per line:
+
+        {"record": "run", ...run fields except steps...}   before the 1st step
+        {"record": "step", "step_id": 1, ...}
+        ...
+        {"record": "finish", "timestamp_finished": ..., "metadata": {...}}
+
+    so a crash mid-run keeps everything up to the last flush. Steps are then
+    not kept in memory unless keep_steps=True. writer_options are passed to
+    JSONLWriter (flush_bytes, flush_interval, rotate_bytes, fsync).
+    Read the file back with backend.parser.parse_jsonl_file.
     """
 
-    def __init__(self, agent_name: str, user_query: str):
+    def __init__(
+        self,
+        agent_name: str,
+        user_query: str,
+        on_step: Optional[StepListener] = None,
+        jsonl_path: Optional[str] = None,
+        keep_steps: Optional[bool] = None,
+        run_id: Optional[str] = None,
+        **writer_options: Any,
+    ):
         now = datetime.now(timezone.utc).isoformat()
+        self._t0_ns = time.perf_counter_ns()
+        self._open_calls: Dict[str, int] = {}  # call_id -> tool_call start_ns
         self._step_id = 0
+        self._on_step = on_step
+        self._writer: Optional[JSONLWriter] = None
+        self._header_written = False
+        if jsonl_path is not None:
+            writer_options.setdefault("flush_bytes", MRI_LOG_FLUSH_BYTES)
+            writer_options.setdefault("flush_interval", MRI_LOG_FLUSH_INTERVAL)
+            writer_options.setdefault("rotate_bytes", MRI_LOG_ROTATE_BYTES)
+            self._writer = JSONLWriter(jsonl_path, **writer_options)
+        self._keep_steps = keep_steps if keep_steps is not None else jsonl_path is None
         self.log: Dict[str, Any] = {
-            "schema_version": "1.0",
-            "run_id": str(uuid.uuid4()),
+            "schema_version": "1.1",
+            "run_id": run_id or str(uuid.uuid4()),
             "agent_name": agent_name,
             "timestamp_started": now,
             "timestamp_finished": None,
@@ -25,19 +93,63 @@ class MRILogger:
             "steps": [],
         }
 
-    def _add_step(self, **fields: Any) -> None:
+    # ---- spans ----
+
+    def now_ns(self) -> int:
+        """Monotonic ns since run start (safe to call from any thread)."""
+        return time.perf_counter_ns() - self._t0_ns
+
+    @contextmanager
+    def span(self) -> Iterator[Span]:
+        """
+        Time a block of work for a later log_* call:
+
+            with logger.span() as span:
+                text = llm(prompt)
+            logger.log_thought(text, span=span)
+        """
+        span = Span(self.now_ns())
+        try:
+            yield span
+        finally:
+            span.end_ns = self.now_ns()
+
+    def _add_step(
+        self,
+        span: Optional[Span] = None,
+        start_ns: Optional[int] = None,
+        **fields: Any,
+    ) -> None:
         self._step_id += 1
+        end_ns = span.end_ns if span is not None and span.end_ns is not None else self.now_ns()
+        if start_ns is None:
+            start_ns = span.start_ns if span is not None else end_ns
         step = {
             "step_id": self._step_id,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "start_ns": start_ns,
+            "end_ns": end_ns,
             **fields,
         }
-        self.log["steps"].append(step)
+        if span is not None and span.metadata:
+            step["metadata"] = span.metadata
+        if self._keep_steps:
+            self.log["steps"].append(step)
+        if self._writer is not None:
+            self._write_header()
+            self._writer.write({"record": "step", **step})
+        if self._on_step is not None:
+            self._on_step(step, self.log)
 
     # ---- public logging helpers ----
 
-    def log_thought(self, content: str, state: Optional[Dict[str, Any]] = None) -> None:
+    def log_thought(
+        self,
+        content: str,
+        state: Optional[Dict[str, Any]] = None,
+        span: Optional[Span] = None,
+    ) -> None:
         self._add_step(
+            span,
             type="thought",
             role="agent",
             content=content,
@@ -49,9 +161,14 @@ class MRILogger:
         tool_name: str,
         arguments: Dict[str, Any],
         call_id: Optional[str] = None,
+        span: Optional[Span] = None,
     ) -> str:
+        """A call is an instant: with a span, only its start is used."""
         call_id = call_id or f"call-{self._step_id + 1}"
+        issued = span.start_ns if span is not None else self.now_ns()
+        self._open_calls[call_id] = issued
         self._add_step(
+            Span(issued, issued, span.metadata if span is not None else {}),
             type="tool_call",
             role="agent",
             tool_name=tool_name,
@@ -66,8 +183,12 @@ class MRILogger:
         call_id: str,
         result: Any,
         error: Optional[str] = None,
+        span: Optional[Span] = None,
     ) -> None:
+        """The result's span starts at the matching tool call, if any."""
         self._add_step(
+            span,
+            start_ns=self._open_calls.pop(call_id, None),
             type="tool_result",
             role="tool",
             tool_name=tool_name,
@@ -76,8 +197,11 @@ class MRILogger:
             error=error,
         )
 
-    def log_memory_update(self, operation: str, key: str, value: Any = None) -> None:
+    def log_memory_update(
+        self, operation: str, key: str, value: Any = None, span: Optional[Span] = None
+    ) -> None:
         self._add_step(
+            span,
             type="memory_update",
             role="agent",
             operation=operation,
@@ -86,9 +210,13 @@ class MRILogger:
         )
 
     def log_final_answer(
-        self, content: str, state: Optional[Dict[str, Any]] = None
+        self,
+        content: str,
+        state: Optional[Dict[str, Any]] = None,
+        span: Optional[Span] = None,
     ) -> None:
         self._add_step(
+            span,
             type="final_answer",
             role="agent",
             content=content,
@@ -97,11 +225,34 @@ class MRILogger:
 
     # ---- finalize & export ----
 
+    def _write_header(self) -> None:
+        # deferred to the first step so metadata set right after __init__
+        # (task domain, mode) lands in the header
+        if not self._header_written:
+            header = {k: v for k, v in self.log.items() if k != "steps"}
+            self._writer.write({"record": "run", **header})
+            self._header_written = True
+
     def _finish(self) -> None:
         if self.log["timestamp_finished"] is None:
             self.log["timestamp_finished"] = datetime.now(
                 timezone.utc
             ).isoformat()
+        if self._writer is not None:
+            self._write_header()
+            self._writer.write(
+                {
+                    "record": "finish",
+                    "timestamp_finished": self.log["timestamp_finished"],
+                    "metadata": self.log["metadata"],
+                }
+            )
+            self._writer.close()
+            self._writer = None
+
+    def close(self) -> None:
+        """Mark the run finished (and flush / close the JSONL stream)."""
+        self._finish()
 
     def to_dict(self) -> Dict[str, Any]:
         self._finish()
@@ -111,7 +262,3 @@ class MRILogger:
         self._finish()
         with open(path, "w", encoding="utf-8") as f:
             json.dump(self.log, f, indent=2)
-
-
-
-
@@ -0,0 +1,149 @@
+# agent/response_cache.py
+
+"""
+Disk-backed cache for LLM responses.
+
+Used by the critic: many chaos runs produce the same summary / report, and
+asking Gemini again for an identical prompt is our biggest latency and cost
+item. Entries live as small JSON files, expire after a TTL and are evicted
+oldest-first once the directory grows past `max_bytes`.
+
+The directory is only created by the first `put`. Its size is tracked as
+entries are written; it is listed again (to evict, and to catch writes of
+other processes) only once the total passes `max_bytes` or every
+RESCAN_SECONDS.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+# re-list the cache directory at least this often (other processes write too)
+RESCAN_SECONDS = 300.0
+# evict down to this fraction of max_bytes, so a full cache is not listed
+# again on every put
+EVICT_TO = 0.9
+
+
+def make_cache_key(*parts: str) -> str:
+    """sha256 over the given parts (model name, prompt version, inputs, ...)."""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class DiskResponseCache:
+    def __init__(
+        self,
+        cache_dir: str,
+        ttl_seconds: Optional[float] = 7 * 24 * 3600,
+        max_bytes: Optional[int] = 50 * 1024 * 1024,
+    ):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._bytes: Optional[int] = None  # None -> directory not listed yet
+        self._scanned = 0.0  # time.monotonic() of the last listing
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._count(hit=False)
+            return None
+
+        created = float(entry.get("created", 0))
+        if self.ttl_seconds is not None and time.time() - created > self.ttl_seconds:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self._count(hit=False)
+            return None
+
+        try:
+            os.utime(path)  # keeps eviction least-recently-used
+        except OSError:
+            pass
+        self._count(hit=True)
+        return entry.get("response")
+
+    def put(self, key: str, response: str) -> None:
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"created": time.time(), "response": response}, f)
+            size = os.path.getsize(tmp)
+            os.replace(tmp, path)
+        except OSError:
+            return
+        with self._lock:
+            if self._bytes is not None:
+                self._bytes += size - old_size
+        self._maybe_evict()
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _maybe_evict(self) -> None:
+        if self.max_bytes is None:
+            return
+        with self._lock:
+            fresh = self._bytes is not None and time.monotonic() - self._scanned < RESCAN_SECONDS
+            if fresh and self._bytes <= self.max_bytes:
+                return
+        self._evict()
+
+    def _evict(self) -> None:
+        """List the directory; past max_bytes, drop the oldest entries."""
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        entries = []
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            target = self.max_bytes * EVICT_TO
+            for _, size, path in sorted(entries):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                if total <= target:
+                    break
+        with self._lock:
+            self._bytes = total
+            self._scanned = time.monotonic()
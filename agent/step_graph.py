@@ -0,0 +1,119 @@
+# agent/step_graph.py
+
+"""
+Tiny dependency-aware executor for agent steps.
+
+Chaos Intern steps are mostly independent LLM / tool calls: the final answer
+prompt only needs the user query, and the tool query never reads the first
+thought. StepGraph runs every node as soon as its dependencies are done, on a
+thread pool, but *emits* results strictly in declaration order from the
+calling thread. That keeps MRILogger single-threaded and the logged step
+order deterministic, whatever order the calls actually finish in.
+
+    graph = StepGraph()
+    graph.add("plan", lambda: llm(prompt1), emit=lambda t: logger.log_thought(t))
+    graph.add("search", lambda: search(q), emit=log_search)
+    graph.add("reflect", lambda res: llm(prompt2(res)), deps=["search"], emit=...)
+    results = graph.run()
+"""
+
+from __future__ import annotations
+
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+@dataclass
+class _Node:
+    name: str
+    fn: Callable[..., Any]
+    deps: Sequence[str] = ()
+    emit: Optional[Callable[[Any], None]] = None
+
+
+@dataclass
+class NodeTiming:
+    start: float  # time.perf_counter() seconds
+    end: float
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+@dataclass
+class StepGraph:
+    max_workers: int = 4
+    _nodes: List[_Node] = field(default_factory=list)
+    timings: Dict[str, NodeTiming] = field(default_factory=dict)
+
+    def add(
+        self,
+        name: str,
+        fn: Callable[..., Any],
+        deps: Sequence[str] = (),
+        emit: Optional[Callable[[Any], None]] = None,
+    ) -> None:
+        """
+        Declare a node.
+
+        fn receives the results of `deps` as positional arguments (in the
+        given order). emit, if set, is called with the node's result on the
+        calling thread, in declaration order.
+        """
+        known = {n.name for n in self._nodes}
+        if name in known:
+            raise ValueError(f"Duplicate step name: {name}")
+        missing = [d for d in deps if d not in known]
+        if missing:
+            # declaring deps first also rules out cycles
+            raise ValueError(f"Step {name!r} depends on undeclared steps: {missing}")
+        self._nodes.append(_Node(name, fn, tuple(deps), emit))
+
+    def _timed(self, node: _Node, args: List[Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            return node.fn(*args)
+        finally:
+            self.timings[node.name] = NodeTiming(start, time.perf_counter())
+
+    def run(self) -> Dict[str, Any]:
+        """Execute all nodes; returns {name: result}. Re-raises the first failure."""
+        results: Dict[str, Any] = {}
+        running: Dict[Future, _Node] = {}
+        started = set()
+        emitted = 0
+
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as pool:
+            while emitted < len(self._nodes):
+                for node in self._nodes:
+                    if node.name in started:
+                        continue
+                    if all(d in results for d in node.deps):
+                        args = [results[d] for d in node.deps]
+                        running[pool.submit(self._timed, node, args)] = node
+                        started.add(node.name)
+
+                # emit every finished prefix of the declaration order
+                while emitted < len(self._nodes) and self._nodes[emitted].name in results:
+                    node = self._nodes[emitted]
+                    if node.emit is not None:
+                        node.emit(results[node.name])
+                    emitted += 1
+
+                if not running:
+                    continue
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for fut in done:
+                    node = running.pop(fut)
+                    try:
+                        results[node.name] = fut.result()
+                    except BaseException:
+                        for other in running:
+                            other.cancel()
+                        raise
+
+        return results
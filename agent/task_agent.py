@@ -1,29 +1,36 @@
 # agent/task_agent.py
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
+import os
 import random
+import uuid
 
-from .logger import MRILogger
-from config import GEMINI_API_KEY, GEMINI_MODEL, FAKE_MODE
+from .llm_client import get_llm_client
+from .logger import MRILogger, Span, StepListener
+from .step_graph import StepGraph
+from config import INTERN_LOG_DIR, INTERN_MAX_PARALLEL
 
-import google.generativeai as genai
 
-# Configure Gemini if available
-if not FAKE_MODE and GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-
-
-def _gemini_call(prompt: str, temperature: float = 1.0) -> str:
+def _gemini_call(
+    logger: MRILogger, prompt: str, temperature: float = 1.0
+) -> Tuple[str, Span]:
     """
-    Helper to call Gemini or fall back to a fake response in FAKE_MODE.
-    """
-    if FAKE_MODE or not GEMINI_API_KEY:
-        # Simple fake LLM for offline / zero-cost runs
-        return f"[FAKE GEMINI RESPONSE]\n\n{prompt[:300]}..."
+    Helper to call Gemini through the shared, rate-limited client
+    (fake responses in FAKE_MODE).
 
-    model = genai.GenerativeModel(GEMINI_MODEL)
-    resp = model.generate_content(prompt, generation_config={"temperature": temperature})
-    return resp.text or ""
+    Returns the text and a span for the step it produces, with latency and
+    token usage in the span metadata. latency_ms is the model call itself;
+    the span also covers any wait for the rate limiter.
+    """
+    with logger.span() as span:
+        result = get_llm_client().generate(prompt, temperature=temperature)
+    span.metadata["llm"] = {
+        "model": result.model,
+        "latency_ms": round(result.latency_s * 1000, 3),
+        "prompt_tokens": result.prompt_tokens,
+        "output_tokens": result.output_tokens,
+    }
+    return result.text, span
 
 
 def _fake_web_search(query: str) -> str:
@@ -50,7 +57,69 @@ def _infer_task_domain(user_query: str) -> str:
     return "general"
 
 
-def run_chaos_intern_task(user_query: str, mode: str = "default") -> Dict[str, Any]:
+def _post_tool_prompt(user_query: str, mode: str, search_result: str) -> Tuple[str, float]:
+    """
+    Prompt + temperature for the thought that follows the tool result.
+    """
+    if mode == "hallucination":
+        prompt2 = f"""
+You are still the chaotic intern.
+
+User task: {user_query}
+Tool output: {search_result}
+
+Think out loud again (2–4 sentences), merging real and fake information.
+Invent at least one paper, standard, or organization that does not exist,
+but sound extremely serious and confident.
+Use phrases like "according to the 2027 Global Council on AI Security".
+"""
+        temp2 = 1.2
+    elif mode == "tool_misuse":
+        prompt2 = f"""
+You are the chaotic intern.
+
+User task: {user_query}
+Tool output: {search_result}
+
+Explain your reasoning in 2–4 sentences, but:
+- overinterpret the tool output,
+- draw strong conclusions from very weak evidence,
+- and slightly ignore the actual user question.
+"""
+        temp2 = 1.0
+    elif mode == "memory_loss":
+        prompt2 = f"""
+You are the very forgetful intern.
+
+User task was: {user_query}
+Tool output: {search_result}
+
+Now think out loud in 2–4 sentences, but:
+- partially forget the original task,
+- mix it up with entertainment or food recommendations,
+- and show mild contradiction with your first thought.
+"""
+        temp2 = 1.1
+    else:  # default
+        prompt2 = f"""
+You are the slightly chaotic intern.
+
+User task: {user_query}
+Tool output: {search_result}
+
+Think out loud again (2–3 sentences), staying somewhat relevant,
+but introduce at least one strange analogy or exaggerated claim.
+"""
+        temp2 = 1.0
+
+    return prompt2, temp2
+
+
+def run_chaos_intern_task(
+    user_query: str,
+    mode: str = "default",
+    on_step: Optional[StepListener] = None,
+) -> Dict[str, Any]:
     """
     Run the Chaos Intern agent with different chaos modes.
 
@@ -59,8 +128,31 @@ def run_chaos_intern_task(user_query: str, mode: str = "default") -> Dict[str, A
         - "hallucination"  : confidently makes up fake facts
         - "tool_misuse"    : misuses tools / wrong queries
         - "memory_loss"    : forgets earlier context / contradicts itself
+
+    Steps run as a small dependency graph: the planning thought, the
+    tool call (+ post-tool thought) and the final answer do not depend on
+    each other, so their LLM calls run concurrently. Steps are still logged
+    in the logical order below.
+
+    on_step(step, log) is forwarded to MRILogger and fires as each step
+    is logged (used by the streaming endpoint).
+
+    With INTERN_LOG_DIR set, the run is also streamed to
+    <INTERN_LOG_DIR>/<run_id>.jsonl as it goes.
     """
-    logger = MRILogger(agent_name="chaos_intern", user_query=user_query)
+    run_id = str(uuid.uuid4())
+    jsonl_path = None
+    if INTERN_LOG_DIR:
+        os.makedirs(INTERN_LOG_DIR, exist_ok=True)
+        jsonl_path = os.path.join(INTERN_LOG_DIR, f"{run_id}.jsonl")
+    logger = MRILogger(
+        agent_name="chaos_intern",
+        user_query=user_query,
+        on_step=on_step,
+        jsonl_path=jsonl_path,
+        keep_steps=True,
+        run_id=run_id,
+    )
 
     # --- New: store task domain + mode in metadata ---
     task_domain = _infer_task_domain(user_query)
@@ -117,9 +209,6 @@ Do NOT mention tools yet, just what you *plan* to do.
 """
         temp1 = 0.9
 
-    thought1 = _gemini_call(prompt1, temperature=temp1)
-    logger.log_thought(thought1, state={"stage": "planning"})
-
     # ---------- STEP 2: tool usage (or misuse) ----------
 
     # What the tool *thinks* its domain is
@@ -137,77 +226,34 @@ Do NOT mention tools yet, just what you *plan* to do.
         # Slightly noisy but still related query
         wrong_query = user_query + " latest 2025 analysis"
 
-    call_id = logger.log_tool_call(
-        tool_name="web_search",
-        arguments={
-            "query": wrong_query,
-            # NEW: tool_domain metadata so MRI can detect misuse via mismatch
-            "tool_domain": tool_domain,
-        },
-    )
-
-    search_result = _fake_web_search(wrong_query)
-    logger.log_tool_result(
-        tool_name="web_search",
-        call_id=call_id,
-        result=search_result,
-        error=None,
-    )
+    def timed_search() -> Tuple[str, Span]:
+        with logger.span() as span:
+            result = _fake_web_search(wrong_query)
+        return result, span
+
+    def log_search(searched: Tuple[str, Span]) -> None:
+        search_result, span = searched
+        call_id = logger.log_tool_call(
+            tool_name="web_search",
+            arguments={
+                "query": wrong_query,
+                # NEW: tool_domain metadata so MRI can detect misuse via mismatch
+                "tool_domain": tool_domain,
+            },
+            span=span,
+        )
+        logger.log_tool_result(
+            tool_name="web_search",
+            call_id=call_id,
+            result=search_result,
+            error=None,
+            span=span,
+        )
 
     # ---------- STEP 3: messy second thought ----------
-    if mode == "hallucination":
-        prompt2 = f"""
-You are still the chaotic intern.
-
-User task: {user_query}
-Tool output: {search_result}
-
-Think out loud again (2–4 sentences), merging real and fake information.
-Invent at least one paper, standard, or organization that does not exist,
-but sound extremely serious and confident.
-Use phrases like "according to the 2027 Global Council on AI Security".
-"""
-        temp2 = 1.2
-    elif mode == "tool_misuse":
-        prompt2 = f"""
-You are the chaotic intern.
-
-User task: {user_query}
-Tool output: {search_result}
-
-Explain your reasoning in 2–4 sentences, but:
-- overinterpret the tool output,
-- draw strong conclusions from very weak evidence,
-- and slightly ignore the actual user question.
-"""
-        temp2 = 1.0
-    elif mode == "memory_loss":
-        prompt2 = f"""
-You are the very forgetful intern.
-
-User task was: {user_query}
-Tool output: {search_result}
-
-Now think out loud in 2–4 sentences, but:
-- partially forget the original task,
-- mix it up with entertainment or food recommendations,
-- and show mild contradiction with your first thought.
-"""
-        temp2 = 1.1
-    else:  # default
-        prompt2 = f"""
-You are the slightly chaotic intern.
-
-User task: {user_query}
-Tool output: {search_result}
-
-Think out loud again (2–3 sentences), staying somewhat relevant,
-but introduce at least one strange analogy or exaggerated claim.
-"""
-        temp2 = 1.0
-
-    thought2 = _gemini_call(prompt2, temperature=temp2)
-    logger.log_thought(thought2, state={"stage": "post_tool_reasoning"})
+    def think_after_tool(searched: Tuple[str, Span]) -> Tuple[str, Span]:
+        prompt2, temp2 = _post_tool_prompt(user_query, mode, searched[0])
+        return _gemini_call(logger, prompt2, temperature=temp2)
 
     # ---------- STEP 4: final answer ----------
     if mode == "hallucination":
@@ -271,18 +317,47 @@ Start with: "MANAGER, THIS IS THE FINAL ANSWER."
 """
         temp_final = 0.95
 
-    final_answer = _gemini_call(final_prompt, temperature=temp_final)
-    logger.log_final_answer(
-        final_answer,
-        state={
-            "goals": [user_query],
-            "mode": mode,
-            "task_domain": task_domain,
-        },
+    # ---------- run the step graph ----------
+    # thought1 | search -> thought2 | final_answer  (logged in this order)
+    graph = StepGraph(max_workers=INTERN_MAX_PARALLEL)
+    graph.add(
+        "thought1",
+        lambda: _gemini_call(logger, prompt1, temperature=temp1),
+        emit=lambda out: logger.log_thought(out[0], state={"stage": "planning"}, span=out[1]),
+    )
+    graph.add(
+        "search",
+        timed_search,
+        emit=log_search,
+    )
+    graph.add(
+        "thought2",
+        think_after_tool,
+        deps=["search"],
+        emit=lambda out: logger.log_thought(
+            out[0], state={"stage": "post_tool_reasoning"}, span=out[1]
+        ),
+    )
+    graph.add(
+        "final_answer",
+        lambda: _gemini_call(logger, final_prompt, temperature=temp_final),
+        emit=lambda out: logger.log_final_answer(
+            out[0],
+            state={
+                "goals": [user_query],
+                "mode": mode,
+                "task_domain": task_domain,
+            },
+            span=out[1],
+        ),
     )
+    try:
+        results = graph.run()
+    finally:
+        logger.close()
 
     return {
-        "final_answer": final_answer,
+        "final_answer": results["final_answer"][0],
         "log": logger.to_dict(),
     }
 
@@ -0,0 +1,392 @@
+# backend/analysis/columnar.py
+
+"""
+Columnar store for the steps of many runs, with fleet-wide aggregates.
+
+Each step is one row across flat NumPy arrays:
+
+    run_index    int32    which run the step belongs to (runs are contiguous)
+    step_id      int64
+    type_code    int16    index into `type_names`
+    role_code    int16    index into `role_names`
+    content      one UTF-8 byte buffer + int64 offsets (None is stored as "")
+    tag_mask     uint64   (rows, words): bit i % 64 of word i // 64 set <->
+                          `tag_names[i]` in failure_tags; the tag names are
+                          numbered per store, with as many words as needed
+    risk_score   float64
+
+Scoring still runs per step through the rule engine (rules match text), but
+everything downstream of it is a vectorized group-by over `run_index`:
+run stats, `by_failure_type` counts and overall risk for every run at once.
+
+    traces = ColumnarTraces.from_logs(logs)
+    scores, levels = traces.overall_risk()
+    traces.to_parquet("fleet.parquet")
+
+Arrow / Parquet export needs pyarrow.
+"""
+
+from __future__ import annotations
+
+import json
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..parser import parse_log_dict
+from ..schema import Run
+from .overall_risk import LOW_MAX, MEDIUM_MAX, SCORE_DECIMALS, tag_weight
+from .risk_scorer import score_risks
+from .rules import RuleRegistry
+
+# Seed vocabularies so codes stay stable between builds; unseen values are
+# appended after these.
+STEP_TYPES: Tuple[str, ...] = (
+    "thought",
+    "tool_call",
+    "tool_result",
+    "memory_update",
+    "memory_read",
+    "memory_write",
+    "final_answer",
+)
+ROLES: Tuple[str, ...] = ("user", "agent", "tool", "system")
+
+_META_RUNS = b"agent_mri.runs"
+_META_TAGS = b"agent_mri.tag_names"
+
+
+class _Vocab:
+    def __init__(self, seed: Sequence[str]):
+        self.names: List[str] = list(seed)
+        self._codes = {name: i for i, name in enumerate(self.names)}
+
+    def code(self, name: str) -> int:
+        code = self._codes.get(name)
+        if code is None:
+            code = len(self.names)
+            self._codes[name] = code
+            self.names.append(name)
+        return code
+
+
+class ColumnarBuilder:
+    """Accumulates scored runs row by row; `build()` freezes them into arrays."""
+
+    def __init__(self) -> None:
+        self._types = _Vocab(STEP_TYPES)
+        self._roles = _Vocab(ROLES)
+        self._tags = _Vocab(())
+        self._runs: List[Dict[str, Any]] = []
+        self._run_index = array("i")
+        self._step_id = array("q")
+        self._type_code = array("h")
+        self._role_code = array("h")
+        self._offsets = array("q", [0])
+        self._content = bytearray()
+        # tag codes of each row, as for content (masks are built in build())
+        self._tag_codes = array("H")
+        self._tag_offsets = array("q", [0])
+        self._risk = array("d")
+
+    def add_run(self, run: Run) -> None:
+        """Append a run whose steps have already been scored."""
+        run_index = len(self._runs)
+        self._runs.append(
+            {"run_id": run.run_id, "agent_name": run.agent_name, "user_query": run.user_query}
+        )
+        type_code, role_code, tag_code = self._types.code, self._roles.code, self._tags.code
+        for step in run.steps:
+            analysis = step.analysis
+            self._run_index.append(run_index)
+            self._step_id.append(step.step_id)
+            self._type_code.append(type_code(step.type))
+            self._role_code.append(role_code(step.role))
+            if step.content:
+                self._content += step.content.encode("utf-8")
+            self._offsets.append(len(self._content))
+            self._tag_codes.extend(tag_code(tag) for tag in analysis.failure_tags or ())
+            self._tag_offsets.append(len(self._tag_codes))
+            self._risk.append(float(analysis.risk_score or 0.0))
+
+    def _tag_mask(self) -> np.ndarray:
+        rows = len(self._step_id)
+        words = max(1, -(-len(self._tags.names) // 64))
+        mask = np.zeros((rows, words), dtype=np.uint64)
+        codes = np.frombuffer(self._tag_codes, dtype=np.uint16).astype(np.int64)
+        if len(codes):
+            offsets = np.frombuffer(self._tag_offsets, dtype=np.int64)
+            row = np.repeat(np.arange(rows), np.diff(offsets))
+            bits = np.left_shift(np.uint64(1), (codes % 64).astype(np.uint64))
+            np.bitwise_or.at(mask, (row, codes // 64), bits)
+        return mask
+
+    def build(self) -> "ColumnarTraces":
+        return ColumnarTraces(
+            runs=self._runs,
+            run_index=np.frombuffer(self._run_index, dtype=np.int32).copy(),
+            step_id=np.frombuffer(self._step_id, dtype=np.int64).copy(),
+            type_code=np.frombuffer(self._type_code, dtype=np.int16).copy(),
+            role_code=np.frombuffer(self._role_code, dtype=np.int16).copy(),
+            content_offsets=np.frombuffer(self._offsets, dtype=np.int64).copy(),
+            content_data=np.frombuffer(bytes(self._content), dtype=np.uint8),
+            tag_mask=self._tag_mask(),
+            risk_score=np.frombuffer(self._risk, dtype=np.float64).copy(),
+            type_names=tuple(self._types.names),
+            role_names=tuple(self._roles.names),
+            tag_names=tuple(self._tags.names),
+        )
+
+
+class ColumnarTraces:
+    """Immutable columns for the steps of many runs (see module docstring)."""
+
+    def __init__(
+        self,
+        runs: List[Dict[str, Any]],
+        run_index: np.ndarray,
+        step_id: np.ndarray,
+        type_code: np.ndarray,
+        role_code: np.ndarray,
+        content_offsets: np.ndarray,
+        content_data: np.ndarray,
+        tag_mask: np.ndarray,
+        risk_score: np.ndarray,
+        type_names: Tuple[str, ...],
+        role_names: Tuple[str, ...],
+        tag_names: Tuple[str, ...],
+    ):
+        self.runs = runs
+        self.run_index = run_index
+        self.step_id = step_id
+        self.type_code = type_code
+        self.role_code = role_code
+        self.content_offsets = content_offsets
+        self.content_data = content_data
+        self.tag_mask = tag_mask.reshape(len(step_id), -1) if tag_mask.ndim == 1 else tag_mask
+        self.risk_score = risk_score
+        self.type_names = type_names
+        self.role_names = role_names
+        self.tag_names = tag_names
+
+    # ---------- construction ----------
+
+    @classmethod
+    def from_runs(cls, runs: Iterable[Run]) -> "ColumnarTraces":
+        """Columns for already scored runs."""
+        builder = ColumnarBuilder()
+        for run in runs:
+            builder.add_run(run)
+        return builder.build()
+
+    @classmethod
+    def from_logs(
+        cls, logs: Iterable[Dict[str, Any]], registry: Optional[RuleRegistry] = None
+    ) -> "ColumnarTraces":
+        """Parse (lazily) and score each log, keeping only its columns."""
+        builder = ColumnarBuilder()
+        for log in logs:
+            run = parse_log_dict(log, lazy=True)
+            score_risks(run, registry)
+            builder.add_run(run)
+        return builder.build()
+
+    # ---------- row access ----------
+
+    @property
+    def n_runs(self) -> int:
+        return len(self.runs)
+
+    def __len__(self) -> int:
+        return len(self.step_id)
+
+    def content(self, row: int) -> str:
+        start, end = self.content_offsets[row], self.content_offsets[row + 1]
+        return self.content_data[start:end].tobytes().decode("utf-8")
+
+    def failure_tags(self, row: int) -> List[str]:
+        words = self.tag_mask[row]
+        return [name for bit, name in enumerate(self.tag_names) if int(words[bit // 64]) >> bit % 64 & 1]
+
+    # ---------- vectorized group-bys ----------
+
+    def _count(self, selected: np.ndarray) -> np.ndarray:
+        """Steps per run among rows where `selected` is True."""
+        return np.bincount(self.run_index[selected], minlength=self.n_runs)
+
+    def _type_is(self, step_type: str) -> np.ndarray:
+        if step_type not in self.type_names:
+            return np.zeros(len(self), dtype=bool)
+        return self.type_code == self.type_names.index(step_type)
+
+    def _has_tag(self, bit: int) -> np.ndarray:
+        return (self.tag_mask[:, bit // 64] >> np.uint64(bit % 64)) & np.uint64(1) == 1
+
+    def run_stats(self) -> Dict[str, np.ndarray]:
+        """Per-run counters (same keys as rules.new_run_stats, plus totals)."""
+        return {
+            "total_steps": np.bincount(self.run_index, minlength=self.n_runs),
+            "flagged_steps": self._count(self.risk_score > 0),
+            "tool_call_count": self._count(self._type_is("tool_call")),
+            "tool_result_count": self._count(self._type_is("tool_result")),
+            "thought_count": self._count(self._type_is("thought")),
+            "has_final_answer": (self._count(self._type_is("final_answer")) > 0).astype(np.int64),
+        }
+
+    def tag_counts(self) -> np.ndarray:
+        """(n_runs, n_tags) matrix: steps carrying tag_names[j] in run i."""
+        counts = np.zeros((self.n_runs, len(self.tag_names)), dtype=np.int64)
+        for bit in range(len(self.tag_names)):
+            counts[:, bit] = self._count(self._has_tag(bit))
+        return counts
+
+    def fleet_tag_counts(self) -> Dict[str, int]:
+        """by_failure_type across every run, most frequent first."""
+        totals = self.tag_counts().sum(axis=0)
+        order = np.argsort(-totals, kind="stable")
+        return {self.tag_names[j]: int(totals[j]) for j in order if totals[j]}
+
+    def overall_risk(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (scores, levels) for every run; same formula as
+        overall_risk.overall_risk, as one matrix-vector product.
+        """
+        weights = np.array([tag_weight(t) for t in self.tag_names], dtype=np.float64)
+        weighted = self.tag_counts() @ weights
+        total = np.maximum(np.bincount(self.run_index, minlength=self.n_runs), 1)
+        raw = np.clip(weighted / total, 0.0, 1.0)
+        scores = np.rint(np.round(raw * 100, SCORE_DECIMALS)).astype(np.int64)
+        levels = np.where(scores < LOW_MAX, "Low", np.where(scores < MEDIUM_MAX, "Medium", "High"))
+        return scores, levels
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        """
+        score_risks-style summary per run. by_failure_type follows each tag's
+        first flagged step (ties within a step in tag-code order).
+        """
+        stats = self.run_stats()
+        counts = self.tag_counts()
+        first_row = np.full(counts.shape, np.iinfo(np.int64).max, dtype=np.int64)
+        for bit in range(len(self.tag_names)):
+            rows = np.flatnonzero(self._has_tag(bit))
+            runs, first = np.unique(self.run_index[rows], return_index=True)
+            first_row[runs, bit] = rows[first]
+
+        out: List[Dict[str, Any]] = []
+        for i in range(self.n_runs):
+            present = np.flatnonzero(counts[i])
+            present = present[np.argsort(first_row[i, present], kind="stable")]
+            out.append(
+                {
+                    "total_steps": int(stats["total_steps"][i]),
+                    "flagged_steps": int(stats["flagged_steps"][i]),
+                    "by_failure_type": {self.tag_names[j]: int(counts[i, j]) for j in present},
+                }
+            )
+        return out
+
+    # ---------- Arrow / Parquet ----------
+
+    def to_arrow(self):
+        """pyarrow.Table, one row per step; run and tag vocabularies in metadata."""
+        import pyarrow as pa
+
+        n = len(self)
+        run_ids = pa.array([r["run_id"] for r in self.runs], type=pa.string())
+        table = pa.table(
+            {
+                "run_id": pa.DictionaryArray.from_arrays(pa.array(self.run_index), run_ids),
+                "step_id": pa.array(self.step_id),
+                "type": pa.DictionaryArray.from_arrays(
+                    pa.array(self.type_code), pa.array(self.type_names, type=pa.string())
+                ),
+                "role": pa.DictionaryArray.from_arrays(
+                    pa.array(self.role_code), pa.array(self.role_names, type=pa.string())
+                ),
+                "content": pa.LargeStringArray.from_buffers(
+                    n, pa.py_buffer(self.content_offsets), pa.py_buffer(self.content_data)
+                ),
+                "tag_mask": self._arrow_tag_mask(pa),
+                "risk_score": pa.array(self.risk_score),
+            }
+        )
+        return table.replace_schema_metadata(
+            {
+                _META_RUNS: json.dumps(self.runs).encode("utf-8"),
+                _META_TAGS: json.dumps(list(self.tag_names)).encode("utf-8"),
+            }
+        )
+
+    def _arrow_tag_mask(self, pa):
+        """uint64 for up to 64 tags, else a fixed-size list of mask words per row."""
+        words = self.tag_mask.shape[1]
+        if words == 1:
+            return pa.array(self.tag_mask[:, 0])
+        return pa.FixedSizeListArray.from_arrays(pa.array(self.tag_mask.ravel()), words)
+
+    @classmethod
+    def from_arrow(cls, table) -> "ColumnarTraces":
+        import pyarrow as pa
+
+        meta = table.schema.metadata or {}
+        if _META_RUNS not in meta or _META_TAGS not in meta:
+            raise ValueError("Table was not written by ColumnarTraces.to_arrow")
+
+        table = table.unify_dictionaries()
+
+        def dictionary(name: str) -> Tuple[np.ndarray, List[Any]]:
+            chunks = table.column(name).chunks
+            if not chunks:
+                return np.zeros(0, dtype=np.int32), []
+            codes = [c.indices.to_numpy(zero_copy_only=False) for c in chunks]
+            return np.concatenate(codes), chunks[0].dictionary.to_pylist()
+
+        runs = json.loads(meta[_META_RUNS])
+        run_codes, run_ids = dictionary("run_id")
+        # the dictionary may have been re-encoded; map it back onto `runs`
+        position = {r["run_id"]: i for i, r in enumerate(runs)}
+        lookup = np.array([position[r] for r in run_ids], dtype=np.int32)
+        run_index = lookup[run_codes] if len(run_codes) else run_codes
+        type_code, type_names = dictionary("type")
+        role_code, role_names = dictionary("role")
+
+        content = table.column("content").cast(pa.large_string()).combine_chunks()
+        bufs = content.buffers()
+        start = content.offset
+        offsets = np.frombuffer(bufs[1], dtype=np.int64)[start: start + len(content) + 1]
+        data = np.frombuffer(bufs[2], dtype=np.uint8) if bufs[2] is not None else np.zeros(0, np.uint8)
+
+        tag_column = table.column("tag_mask")
+        if pa.types.is_fixed_size_list(tag_column.type):
+            words = tag_column.type.list_size
+            flat = tag_column.combine_chunks().flatten().to_numpy()
+            tag_mask = flat.reshape(-1, words)
+        else:
+            tag_mask = tag_column.to_numpy()
+
+        return cls(
+            runs=runs,
+            run_index=run_index.astype(np.int32, copy=False),
+            step_id=table.column("step_id").to_numpy(),
+            type_code=type_code.astype(np.int16, copy=False),
+            role_code=role_code.astype(np.int16, copy=False),
+            content_offsets=offsets,
+            content_data=data,
+            tag_mask=tag_mask,
+            risk_score=table.column("risk_score").to_numpy(),
+            type_names=tuple(type_names),
+            role_names=tuple(role_names),
+            tag_names=tuple(json.loads(meta[_META_TAGS])),
+        )
+
+    def to_parquet(self, path: str, **kwargs: Any) -> None:
+        import pyarrow.parquet as pq
+
+        pq.write_table(self.to_arrow(), path, **kwargs)
+
+    @classmethod
+    def read_parquet(cls, path: str) -> "ColumnarTraces":
+        import pyarrow.parquet as pq
+
+        return cls.from_arrow(pq.read_table(path))
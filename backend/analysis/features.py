@@ -0,0 +1,151 @@
+# backend/analysis/features.py
+
+"""
+Per-step text features shared by the MRI rules.
+
+Several rules look at the same derived values of a step's content (lowered
+text, phrase-family hits, percentages, ...). Instead of each rule deriving
+them again, they ask for the step's TextFeatures:
+
+    from backend.analysis.risk_scorer import step_features
+
+    @register_rule(step_types=("thought",))
+    def flag_rambling(step, ctx, out):
+        if step_features(out).token_count > 2000:
+            out.flag("rambling", 0.2, "Very long reasoning step.")
+
+Each feature is computed on first use and then kept on the record, which
+lives in the step's StepBuilder.memo for the rest of the run. Records are
+also kept in a bounded LRU keyed by the text itself (FeatureExtractor), so
+re-scoring the same content (another ruleset version, a --force ingest, the
+same log posted again, identical user queries across runs) skips the work.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from .phrase_matcher import PhraseMatcher
+
+# {phrase family: matched phrases} for one lowered text
+PhraseHits = Dict[str, Set[str]]
+
+# Match "18.7%" or "20 %" etc.
+_PERCENT = re.compile(r"\b\d+(?:\.\d+)?\s*%")
+_TOKEN = re.compile(r"[a-zA-Z]+")
+
+
+class TextFeatures:
+    """
+    Derived values of one text (None / "" give empty features).
+
+    text        : the original text
+    lower       : text.lower()
+    length      : len(text)
+    phrases     : PhraseHits of `lower` for every family of the matcher
+    percentages : percentage literals in the text ("18.7%", "20 %")
+    token_count : number of alphabetic tokens
+    """
+
+    __slots__ = ("text", "length", "_matcher", "_lower", "_phrases", "_percentages", "_tokens")
+
+    def __init__(self, text: Optional[str], matcher: PhraseMatcher):
+        self.text = text or ""
+        self.length = len(self.text)
+        self._matcher = matcher
+        self._lower: Optional[str] = None
+        self._phrases: Optional[PhraseHits] = None
+        self._percentages: Optional[Tuple[str, ...]] = None
+        self._tokens: Optional[int] = None
+
+    @property
+    def lower(self) -> str:
+        if self._lower is None:
+            self._lower = self.text.lower()
+        return self._lower
+
+    @property
+    def phrases(self) -> PhraseHits:
+        if self._phrases is None:
+            self._phrases = self._matcher.scan(self.lower) if self.text else {}
+        return self._phrases
+
+    @property
+    def percentages(self) -> Tuple[str, ...]:
+        if self._percentages is None:
+            self._percentages = tuple(m.group() for m in _PERCENT.finditer(self.text))
+        return self._percentages
+
+    @property
+    def token_count(self) -> int:
+        if self._tokens is None:
+            self._tokens = sum(1 for _ in _TOKEN.finditer(self.text))
+        return self._tokens
+
+    def as_dict(self) -> Dict[str, Any]:
+        """All features, computed (for debugging / export)."""
+        return {
+            "length": self.length,
+            "token_count": self.token_count,
+            "percentages": list(self.percentages),
+            "phrases": {family: sorted(hits) for family, hits in self.phrases.items()},
+        }
+
+
+class FeatureExtractor:
+    """
+    TextFeatures for one phrase matcher, with a thread-safe LRU keyed by
+    the text so unchanged content is not analysed twice.
+
+    max_entries / max_chars:
+        bounds of the LRU (max_chars counts the cached texts); texts
+        longer than max_chars are never cached. max_entries=0 disables it.
+    """
+
+    def __init__(self, matcher: PhraseMatcher, max_entries: int = 50_000, max_chars: int = 32 * 1024 * 1024):
+        self.matcher = matcher
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, TextFeatures]" = OrderedDict()
+        self._chars = 0
+        self.hits = 0
+        self.misses = 0
+
+    def features(self, text: Optional[str]) -> TextFeatures:
+        if not text or not self.max_entries or len(text) > self.max_chars:
+            return TextFeatures(text, self.matcher)
+        with self._lock:
+            cached = self._entries.get(text)
+            if cached is not None:
+                self._entries.move_to_end(text)
+                self.hits += 1
+                return cached
+            self.misses += 1
+            feats = self._entries[text] = TextFeatures(text, self.matcher)
+            self._chars += len(text)
+            while len(self._entries) > self.max_entries or self._chars > self.max_chars:
+                evicted, _ = self._entries.popitem(last=False)
+                self._chars -= len(evicted)
+        return feats
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._chars = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "chars": self._chars,
+                "max_entries": self.max_entries,
+                "max_chars": self.max_chars,
+            }
@@ -0,0 +1,208 @@
+# backend/analysis/incremental.py
+
+"""
+Online scoring for runs that are still in progress.
+
+Live monitoring polls the same growing run every few seconds. Re-parsing and
+re-scoring the whole log on every poll makes the total work quadratic, so
+IncrementalScorer keeps the scoring state between polls:
+
+    scorer = IncrementalScorer.from_log(first_poll)
+    ...
+    scorer.update_from_log(next_poll)   # only the new steps are parsed/scored
+    scorer.summary()
+
+- step-scoped rules run exactly once per step
+- summary counters are adjusted per step, never recomputed
+- run-scoped (final-answer) rules are re-run only when one of the run stats
+  they declare in `depends_on` has changed since their last evaluation, and
+  not at all once the rules report the step as `settled`
+
+Tags of held steps are provisional until they settle (an unanswered tool
+call is an orphan only until its result arrives). Consumers that publish
+each step once, like the /run_intern/stream endpoint, should use
+`take_final()` rather than the steps returned by `append()`.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from ..metrics import RULE_TIMINGS
+from ..parser import parse_log_dict, parse_steps
+from ..schema import Run, Step
+from . import risk_scorer  # noqa: F401  (registers the built-in rules)
+from .rules import (
+    DEFAULT_REGISTRY,
+    Rule,
+    RuleContext,
+    RuleRegistry,
+    StepBuilder,
+    SummaryCounter,
+    apply_rules,
+    update_run_stats,
+)
+
+
+class _HeldStep:
+    """A step with run-scoped rules, kept so they can be re-evaluated."""
+
+    __slots__ = ("base", "current", "rules", "watch")
+
+    def __init__(self, base: StepBuilder, rules: Tuple[Rule, ...]):
+        self.base = base  # state after step-scoped rules only
+        self.current: Optional[StepBuilder] = None
+        self.rules = rules
+        watch: Optional[Set[str]] = set()
+        for rule in rules:
+            if rule.depends_on is None:
+                watch = None
+                break
+            watch.update(rule.depends_on)
+        self.watch = watch  # None -> any stat change
+
+    def settled(self, ctx: RuleContext) -> bool:
+        """True once no later step can change the outcome."""
+        step = self.base.step
+        return all(r.settled is not None and r.settled(step, ctx) for r in self.rules)
+
+    def affected_by(self, changed: Set[str]) -> bool:
+        if not changed:
+            return False
+        return self.watch is None or not self.watch.isdisjoint(changed)
+
+    def evaluate(
+        self, ctx: RuleContext, timings: Optional[Dict[str, List[int]]] = None
+    ) -> StepBuilder:
+        out = self.base.copy()
+        apply_rules(self.rules, out.step, ctx, out, timings)
+        out.commit()
+        self.current = out
+        return out
+
+
+class IncrementalScorer:
+    """
+    Keeps a run's analysis up to date as steps are appended.
+
+    `run.steps` grows with every append, so `generate_report(run, run.steps,
+    scorer.summary())` works at any point.
+    """
+
+    def __init__(self, run: Run, registry: Optional[RuleRegistry] = None):
+        self.registry = registry or DEFAULT_REGISTRY
+        self.run = run
+        self.ctx = RuleContext(run=run)
+        self._counter = SummaryCounter()
+        self._held: Dict[int, _HeldStep] = {}  # position -> held step
+        self._final: List[int] = []  # positions settled since take_final()
+
+        initial, run.steps = run.steps, []
+        if initial:
+            self.append(initial)
+
+    @classmethod
+    def from_log(
+        cls, log_data: Union[Dict[str, Any], str], registry: Optional[RuleRegistry] = None
+    ) -> "IncrementalScorer":
+        if isinstance(log_data, str):
+            log_data = json.loads(log_data)
+        return cls(parse_log_dict(log_data), registry)
+
+    @property
+    def steps(self) -> List[Step]:
+        return self.run.steps
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return self.ctx.stats
+
+    def append(self, steps: Iterable[Step]) -> List[Step]:
+        """
+        Score newly appended steps and return them.
+
+        Held final answers are re-evaluated at most once per call, and only
+        if a stat they depend on changed.
+        """
+        stats = self.ctx.stats
+        before = dict(stats)
+        added: List[Step] = []
+        timings = RULE_TIMINGS.new_batch()
+        new_held: List[Tuple[int, _HeldStep]] = []
+
+        for step in steps:
+            update_run_stats(stats, step)
+
+            position = len(self.run.steps)
+            out = StepBuilder(step, position)
+            apply_rules(self.registry.dispatch(step.type, "step"), step, self.ctx, out, timings)
+
+            self.run.steps.append(step)
+            added.append(step)
+
+            run_rules = self.registry.dispatch(step.type, "run")
+            if run_rules:
+                new_held.append((position, _HeldStep(out, run_rules)))
+            else:
+                self._counter.add(out)
+                out.commit()
+                self._final.append(position)
+
+        changed = {k for k, v in stats.items() if before.get(k) != v}
+        for held in self._held.values():
+            if held.affected_by(changed):
+                self._counter.remove(held.current)
+                self._counter.add(held.evaluate(self.ctx, timings))
+
+        for position, held in new_held:
+            self._counter.add(held.evaluate(self.ctx, timings))
+            self._held[position] = held
+
+        # settled steps (e.g. answered tool calls) are final: stop tracking them
+        for position in self.ctx.take_woken():
+            held = self._held.get(position)
+            if held is not None and held.settled(self.ctx):
+                del self._held[position]
+                self._final.append(position)
+
+        RULE_TIMINGS.merge(timings)
+        return added
+
+    def take_final(self, run_finished: bool = False) -> List[Step]:
+        """
+        Steps whose analysis can no longer change, each returned once, in
+        position order within a call. A held tool call comes back together
+        with its result, so it may follow steps that came after it.
+
+        With run_finished=True, the steps that are still held (final answers,
+        unanswered calls) are returned as well, scored against the complete
+        run, and no longer re-evaluated.
+        """
+        positions, self._final = self._final, []
+        if run_finished:
+            positions.extend(self._held)
+            self._held = {}
+        positions.sort()
+        return [self.run.steps[p] for p in positions]
+
+    def update_from_log(self, log_data: Union[Dict[str, Any], str]) -> List[Step]:
+        """
+        Catch up with a newer snapshot of the same run log.
+
+        Only steps beyond the ones already scored are parsed. Returns the
+        newly scored steps.
+        """
+        if isinstance(log_data, str):
+            log_data = json.loads(log_data)
+
+        if log_data.get("timestamp_finished") is not None:
+            self.run.timestamp_finished = log_data["timestamp_finished"]
+
+        raw_steps = log_data.get("steps") or []
+        return self.append(
+            parse_steps(raw_steps[len(self.run.steps):], self.run.timestamp_started)
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        return self._counter.as_dict()
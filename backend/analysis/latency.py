@@ -0,0 +1,316 @@
+# backend/analysis/latency.py
+
+"""
+Latency and wasted-work rules for Agent MRI.
+
+Tool calls and their results are joined by call_id in a per-run CallIndex
+(dict lookups, so each step is handled in O(1)), which the rules below
+build on the fly:
+
+- slow_tool
+    tool_result whose latency (call issued -> result returned) is above the
+    p95 of the earlier calls of that tool in the same run (the last `window`
+    of them); nothing is flagged for a tool until the run has `min_samples`
+    of its calls. Only the run itself is looked at, so a log always gets the
+    same tags whatever else this process has scored.
+
+- orphan_tool_call
+    tool_call that never got a result. Run-scoped: the engine holds the
+    call back until its result shows up (the result wakes it and it is
+    released right away, see rules.RuleEngine) or the run ends.
+
+- latency_outlier
+    step that started after an unusually long idle gap since the previous
+    step ended (z-score over the run's gaps so far).
+
+Step times come from start_ns / end_ns when the log has them (MRILogger),
+otherwise from the ISO timestamps.
+"""
+
+from __future__ import annotations
+
+import math
+from bisect import bisect_left, insort
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..schema import Step, parse_started
+from .rules import RuleContext, StepBuilder, register_rule
+
+# latency_outlier: flag gaps this many standard deviations above the run's
+# mean gap, once the run has MIN_GAPS gaps, and only if they are at least
+# OUTLIER_MIN_SECONDS long (tiny gaps in a very regular run are not waste)
+OUTLIER_Z = 3.0
+MIN_GAPS = 10
+OUTLIER_MIN_SECONDS = 1.0
+
+# slow_tool: ignore latencies below this, whatever the history says
+SLOW_TOOL_MIN_SECONDS = 0.01
+
+
+# ---------- step times ----------
+
+
+def step_span(step: Step) -> Optional[Tuple[float, float]]:
+    """(start, end) of a step in seconds, or None if the step has no time."""
+    start_ns, end_ns = step.start_ns, step.end_ns
+    if start_ns is not None or end_ns is not None:
+        if start_ns is None:
+            start_ns = end_ns
+        if end_ns is None:
+            end_ns = start_ns
+        return start_ns / 1e9, end_ns / 1e9
+    if step.timestamp is None:
+        return None
+    moment = parse_started(step.timestamp)
+    if moment is None:
+        return None
+    t = moment.timestamp()
+    return t, t
+
+
+def _span(out: StepBuilder) -> Optional[Tuple[float, float]]:
+    if "latency.span" not in out.memo:
+        out.memo["latency.span"] = step_span(out.step)
+    return out.memo["latency.span"]
+
+
+# ---------- call_id join index ----------
+
+
+@dataclass(slots=True)
+class CallPair:
+    """A tool call and its result, joined by call_id."""
+
+    call_id: str
+    tool_name: Optional[str] = None
+    call_position: Optional[int] = None  # index of the tool_call in the run
+    call_step: Optional[int] = None  # step_id of the tool_call
+    result_step: Optional[int] = None  # step_id of the tool_result
+    issued: Optional[float] = None  # seconds
+    returned: Optional[float] = None  # seconds
+
+    @property
+    def answered(self) -> bool:
+        return self.result_step is not None
+
+    @property
+    def latency(self) -> Optional[float]:
+        if self.issued is None or self.returned is None:
+            return None
+        return max(self.returned - self.issued, 0.0)
+
+
+class CallIndex:
+    """
+    call_id -> CallPair for one run. Only ids and times are kept (not the
+    steps themselves), so streaming runs stay cheap.
+    """
+
+    __slots__ = ("_pairs",)
+
+    def __init__(self) -> None:
+        self._pairs: Dict[str, CallPair] = {}
+
+    def __len__(self) -> int:
+        return len(self._pairs)
+
+    def __iter__(self) -> Iterator[CallPair]:
+        return iter(self._pairs.values())
+
+    def get(self, call_id: Optional[str]) -> Optional[CallPair]:
+        return None if call_id is None else self._pairs.get(call_id)
+
+    def add(
+        self,
+        step: Step,
+        span: Optional[Tuple[float, float]] = None,
+        position: Optional[int] = None,
+    ) -> Optional[CallPair]:
+        """Record a tool_call / tool_result step; returns its pair."""
+        call_id = step.call_id
+        if call_id is None or step.type not in ("tool_call", "tool_result"):
+            return None
+        pair = self._pairs.get(call_id)
+        if pair is None:
+            pair = self._pairs[call_id] = CallPair(call_id)
+        if pair.tool_name is None:
+            pair.tool_name = step.tool_name
+
+        if step.type == "tool_call":
+            pair.call_step = step.step_id
+            pair.call_position = position
+            if span is not None:
+                pair.issued = span[0]
+        else:
+            pair.result_step = step.step_id
+            if span is not None:
+                pair.returned = span[1]
+                if pair.issued is None:  # no call seen: the result's own span
+                    pair.issued = span[0]
+        return pair
+
+    def orphans(self) -> List[CallPair]:
+        """Calls with no result (so far)."""
+        return [p for p in self._pairs.values() if p.call_step is not None and not p.answered]
+
+
+def build_call_index(steps: Iterable[Step]) -> CallIndex:
+    """CallIndex for already-parsed steps, outside of the rule engine."""
+    index = CallIndex()
+    for position, step in enumerate(steps):
+        index.add(step, step_span(step), position)
+    return index
+
+
+def call_index(ctx: RuleContext) -> CallIndex:
+    """The CallIndex the rules build for the run being scored."""
+    index = ctx.memo.get("latency.calls")
+    if index is None:
+        index = ctx.memo["latency.calls"] = CallIndex()
+    return index
+
+
+# ---------- per-tool latency history ----------
+
+
+class ToolLatencyHistory:
+    """
+    Last `window` latencies per tool, kept sorted so percentiles are a
+    single index lookup. One per run (see tool_history).
+    """
+
+    def __init__(self, window: int = 1000, min_samples: int = 20, percentile: float = 95.0):
+        self.window = window
+        self.min_samples = min_samples
+        self.percentile = percentile
+        self._recent: Dict[str, Deque[float]] = {}
+        self._sorted: Dict[str, List[float]] = {}
+
+    def threshold(self, tool: str) -> Optional[float]:
+        """Latency at `percentile` for `tool`, or None if too few samples."""
+        values = self._sorted.get(tool)
+        if not values or len(values) < self.min_samples:
+            return None
+        rank = math.ceil(self.percentile / 100.0 * len(values)) - 1
+        return values[min(max(rank, 0), len(values) - 1)]
+
+    def observe(self, tool: str, seconds: float) -> None:
+        recent = self._recent.get(tool)
+        if recent is None:
+            recent = self._recent[tool] = deque()
+            self._sorted[tool] = []
+        values = self._sorted[tool]
+        recent.append(seconds)
+        insort(values, seconds)
+        if len(recent) > self.window:
+            del values[bisect_left(values, recent.popleft())]
+
+    def samples(self, tool: str) -> int:
+        return len(self._sorted.get(tool, ()))
+
+
+# parameters of the per-run histories; part of ruleset_version, since
+# they change which steps get slow_tool
+_SETTINGS: Dict[str, Any] = {"window": 1000, "min_samples": 20, "percentile": 95.0}
+
+
+def configure_latency_history(
+    window: int = 1000, min_samples: int = 20, percentile: float = 95.0
+) -> Dict[str, Any]:
+    """Set the parameters of the per-run tool latency histories (e.g. from config)."""
+    _SETTINGS.update(window=window, min_samples=min_samples, percentile=float(percentile))
+    return dict(_SETTINGS)
+
+
+def latency_settings() -> Dict[str, Any]:
+    return dict(_SETTINGS)
+
+
+def tool_history(ctx: RuleContext) -> ToolLatencyHistory:
+    """Latencies of the tool calls seen so far in the run being scored."""
+    history = ctx.memo.get("latency.history")
+    if history is None:
+        history = ctx.memo["latency.history"] = ToolLatencyHistory(**_SETTINGS)
+    return history
+
+
+# ---------- rules ----------
+
+
+@register_rule(step_types=("tool_call", "tool_result"))
+def _flag_slow_tools(step: Step, ctx: RuleContext, out: StepBuilder) -> None:
+    pair = call_index(ctx).add(step, _span(out), out.position)
+    if step.type != "tool_result" or pair is None:
+        return
+    if pair.call_position is not None:
+        ctx.wake(pair.call_position)  # the call may be held by _flag_orphan_calls
+    if pair.latency is None:
+        return
+
+    history = tool_history(ctx)
+    tool = pair.tool_name or "unknown"
+    latency = pair.latency
+    threshold = history.threshold(tool)
+    history.observe(tool, latency)
+    if threshold is not None and latency > threshold and latency >= SLOW_TOOL_MIN_SECONDS:
+        out.flag(
+            "slow_tool",
+            0.4,
+            f"Slow tool: {tool} took {latency:.2f}s "
+            f"(p{history.percentile:g} over {history.samples(tool) - 1} earlier calls in this run: "
+            f"{threshold:.2f}s)",
+        )
+
+
+def _call_answered(step: Step, ctx: RuleContext) -> bool:
+    pair = call_index(ctx).get(step.call_id)
+    return pair is not None and pair.answered
+
+
+@register_rule(
+    step_types=("tool_call",),
+    scope="run",
+    depends_on=("tool_result_count",),
+    settled=_call_answered,
+)
+def _flag_orphan_calls(step: Step, ctx: RuleContext, out: StepBuilder) -> None:
+    if step.call_id is None or _call_answered(step, ctx):
+        return
+    out.flag(
+        "orphan_tool_call",
+        0.5,
+        f"Tool call {step.call_id} ({step.tool_name or 'unknown tool'}) never got a result",
+    )
+
+
+@register_rule
+def _flag_latency_outliers(step: Step, ctx: RuleContext, out: StepBuilder) -> None:
+    span = _span(out)
+    if span is None:
+        return
+
+    # online mean / variance of the idle gaps between consecutive steps
+    gaps = ctx.memo.get("latency.gaps")
+    if gaps is None:
+        ctx.memo["latency.gaps"] = [span[1], 0, 0.0, 0.0]  # last end, n, mean, M2
+        return
+    last_end, n, mean, m2 = gaps
+    gap = max(span[0] - last_end, 0.0)
+
+    if n >= MIN_GAPS and gap >= OUTLIER_MIN_SECONDS:
+        std = math.sqrt(m2 / (n - 1))
+        if gap > mean + OUTLIER_Z * std:
+            z = f"z={(gap - mean) / std:.1f}" if std > 0 else "no prior variation"
+            out.flag(
+                "latency_outlier",
+                0.3,
+                f"Idle for {gap:.2f}s before this step (run mean {mean:.2f}s, {z})",
+            )
+
+    n += 1
+    delta = gap - mean
+    mean += delta / n
+    m2 += delta * (gap - mean)
+    gaps[:] = [max(last_end, span[1]), n, mean, m2]
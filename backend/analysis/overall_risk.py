@@ -0,0 +1,65 @@
+# backend/analysis/overall_risk.py
+
+"""
+Run-level risk score in [0, 100] derived from the failure-tag summary.
+
+    score = clip(sum(weight[tag] * count[tag]) / total_steps, 0, 1) * 100
+
+Shared by the API server (one run at a time) and the columnar fleet
+scorer (all runs at once).
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Tuple
+
+TAG_WEIGHTS: Dict[str, float] = {
+    "hallucination_risk": 0.9,
+    "tool_misuse": 0.8,
+    "memory_drift": 0.7,
+    "speculative_metrics": 0.6,
+    "overconfident_no_citation": 0.9,
+    "tool_error": 0.9,
+    "weak_grounding": 0.6,
+    "apology": 0.2,
+    "orphan_tool_call": 0.5,
+    "slow_tool": 0.4,
+    "latency_outlier": 0.2,
+}
+
+DEFAULT_TAG_WEIGHT = 0.3  # tags without an explicit weight
+
+# raw * 100 is rounded to this many decimals before rounding to an int, so
+# float noise from summation order cannot flip exact .5 ties (the scalar and
+# vectorized scorers add the weighted counts in different orders)
+SCORE_DECIMALS = 6
+
+LOW_MAX = 30  # score < LOW_MAX -> "Low"
+MEDIUM_MAX = 70  # score < MEDIUM_MAX -> "Medium", else "High"
+
+
+def tag_weight(tag: str) -> float:
+    return TAG_WEIGHTS.get(tag, DEFAULT_TAG_WEIGHT)
+
+
+def risk_level(score: int) -> str:
+    if score < LOW_MAX:
+        return "Low"
+    if score < MEDIUM_MAX:
+        return "Medium"
+    return "High"
+
+
+def overall_risk(summary: Dict[str, Any]) -> Tuple[int, str]:
+    """(score, level) for one run's score_risks summary."""
+    total_steps = summary.get("total_steps", 1) or 1
+    by_type = summary.get("by_failure_type", {}) or {}
+
+    weighted = 0.0
+    for tag, count in by_type.items():
+        weighted += tag_weight(tag) * float(count)
+
+    raw = weighted / float(total_steps)
+    raw = max(0.0, min(1.0, raw))
+    score = int(round(round(raw * 100, SCORE_DECIMALS)))
+    return score, risk_level(score)
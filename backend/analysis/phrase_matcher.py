@@ -0,0 +1,107 @@
+# backend/analysis/phrase_matcher.py
+
+"""
+Multi-pattern phrase matching for the MRI rules.
+
+The risk rules look for many fixed phrases ("zero tolerance", "according to",
+"casserole", ...) inside step content. Instead of one `phrase in text` scan
+per phrase, we compile every phrase family into a single Aho-Corasick
+automaton when the module loads and walk the text once.
+
+The automaton is stored as a full DFA (failure links already folded into the
+transition tables), so scanning costs one dict lookup per character no matter
+how many phrases are registered.
+
+Matching keeps plain substring semantics, i.e. it returns exactly the phrases
+for which `phrase in text` is true.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+
+class PhraseMatcher:
+    """
+    Aho-Corasick automaton over several named phrase families.
+
+    Example:
+        matcher = PhraseMatcher({"apology": ["sorry"], "citation": ["doi.org"]})
+        matcher.scan("sorry, see doi.org/...")
+        # -> {"apology": {"sorry"}, "citation": {"doi.org"}}
+    """
+
+    def __init__(self, families: Dict[str, Iterable[str]]):
+        self.families: Dict[str, Tuple[str, ...]] = {
+            name: tuple(phrases) for name, phrases in families.items()
+        }
+
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[Set[Tuple[str, str]]] = [set()]
+
+        # 1) trie of all phrases
+        for family, phrases in self.families.items():
+            for phrase in phrases:
+                if not phrase:
+                    continue
+                state = 0
+                for ch in phrase:
+                    nxt = goto[state].get(ch)
+                    if nxt is None:
+                        goto.append({})
+                        outputs.append(set())
+                        nxt = len(goto) - 1
+                        goto[state][ch] = nxt
+                    state = nxt
+                outputs[state].add((family, phrase))
+
+        # 2) failure links (BFS), folded into full transition tables
+        fail = [0] * len(goto)
+        delta: List[Dict[str, int]] = [dict() for _ in goto]
+        delta[0] = dict(goto[0])
+
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            # inherit transitions of the failure state, then override with our own
+            table = dict(delta[fail[state]])
+            table.update(goto[state])
+            delta[state] = table
+            outputs[state] |= outputs[fail[state]]
+
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[fail[state]].get(ch, 0)
+                queue.append(nxt)
+
+        self._delta = delta
+        self._accept: List[Optional[FrozenSet[Tuple[str, str]]]] = [
+            frozenset(out) if out else None for out in outputs
+        ]
+
+    @property
+    def state_count(self) -> int:
+        return len(self._delta)
+
+    def scan(self, text: str) -> Dict[str, Set[str]]:
+        """
+        Walk `text` once and return {family: {matched phrases}}.
+
+        Families without any hit are omitted. Callers are expected to pass
+        already-lowered text (all MRI phrase lists are lowercase).
+        """
+        delta = self._delta
+        accept = self._accept
+        state = 0
+        hit_states: Set[int] = set()
+
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            if accept[state] is not None:
+                hit_states.add(state)
+
+        hits: Dict[str, Set[str]] = {}
+        for s in hit_states:
+            for family, phrase in accept[s]:  # type: ignore[union-attr]
+                hits.setdefault(family, set()).add(phrase)
+        return hits
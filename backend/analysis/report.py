@@ -1,39 +1,244 @@
 # backend/analysis/report.py
 
-from typing import List
+"""
+Incident report (markdown) for one scored run.
+
+iter_report yields the report in chunks, so it can be streamed into an
+HTTP response or a file (write_report) without building it in memory.
+It stays bounded for runs with many flagged steps:
+
+  - step content / notes longer than max_step_chars are cut
+  - at most max_steps flagged steps are listed, and at most max_per_tag
+    per tag; the rest are rolled up as "N more steps tagged X"
+  - or, with page=N, only the N-th page_size flagged steps are listed,
+    with a pointer to the next page
+
+generate_report joins it into one string with the configured limits
+(configure_report); that is what analyze_log returns and the critic sees.
+"""
+
+import hashlib
+import os
+from typing import IO, Any, Dict, Iterator, List, Optional, Sequence, Union
 
 from ..schema import Run, Step
 
+# characters of markdown per chunk yielded by iter_report
+CHUNK_CHARS = 16 * 1024
+
+# defaults for generate_report; replaced by configure_report
+_LIMITS: Dict[str, Optional[int]] = {
+    "max_step_chars": 2000,
+    "max_steps": 200,
+    "max_per_tag": 50,
+}
+
+
+def configure_report(
+    max_step_chars: Optional[int] = 2000,
+    max_steps: Optional[int] = 200,
+    max_per_tag: Optional[int] = 50,
+) -> Dict[str, Optional[int]]:
+    """Replace the default report limits (e.g. from config; None → unlimited)."""
+    _LIMITS.update(max_step_chars=max_step_chars, max_steps=max_steps, max_per_tag=max_per_tag)
+    return dict(_LIMITS)
+
+
+def report_limits() -> Dict[str, Optional[int]]:
+    return dict(_LIMITS)
+
+
+def report_version() -> str:
+    """Short id of the configured limits; part of the analysis cache key."""
+    spec = repr(sorted(_LIMITS.items()))
+    return hashlib.sha1(spec.encode("utf-8")).hexdigest()[:8]
+
+
+def _cut(text: str, limit: Optional[int]) -> str:
+    if limit is None or len(text) <= limit:
+        return text
+    return f"{text[:limit]}… ({len(text) - limit:,} more chars)"
+
+
+def _step_lines(step: Step, max_step_chars: Optional[int]) -> Iterator[str]:
+    yield f" Step {step.step_id} ({step.type})"
+    content = step.content
+    if content:
+        yield f"> {_cut(content, max_step_chars)}"
+    analysis = step.analysis
+    if analysis.failure_tags:
+        yield f"- Tags: {', '.join(analysis.failure_tags)}"
+    if analysis.notes:
+        yield f"- Notes: {_cut(analysis.notes, max_step_chars)}"
+    yield ""
+
+
+def _flagged(steps: Sequence[Step]) -> Iterator[Step]:
+    return (s for s in steps if s.analysis.risk_score > 0)
+
+
+def _capped_lines(
+    steps: Sequence[Step],
+    max_step_chars: Optional[int],
+    max_steps: Optional[int],
+    max_per_tag: Optional[int],
+) -> Iterator[str]:
+    listed = 0
+    per_tag: Dict[str, int] = {}
+    rolled: Dict[str, List[int]] = {}  # tag -> [steps not listed, first of them]
+    for step in _flagged(steps):
+        tags = step.analysis.failure_tags or ("untagged",)
+        fits = max_steps is None or listed < max_steps
+        if fits and max_per_tag is not None:
+            fits = any(per_tag.get(tag, 0) < max_per_tag for tag in tags)
+        if fits:
+            listed += 1
+            for tag in tags:
+                per_tag[tag] = per_tag.get(tag, 0) + 1
+            yield from _step_lines(step, max_step_chars)
+            continue
+        for tag in tags:
+            entry = rolled.get(tag)
+            if entry is None:
+                rolled[tag] = [1, step.step_id]
+            else:
+                entry[0] += 1
+
+    if rolled:
+        yield "### Not listed\n"
+        for tag, (count, first) in sorted(rolled.items(), key=lambda kv: (-kv[1][0], kv[0])):
+            noun = "step" if count == 1 else "steps"
+            yield f"- {count:,} more {noun} tagged **{tag}** (first: step {first})"
+        yield ""
+
+
+def _page_lines(
+    steps: Sequence[Step], max_step_chars: Optional[int], page: int, page_size: int
+) -> Iterator[str]:
+    total = sum(1 for _ in _flagged(steps))
+    pages = max(1, -(-total // page_size))
+    first = (page - 1) * page_size
+    last = min(first + page_size, total)
+    if first >= total:
+        yield f"_Page {page} of {pages}: no flagged steps on this page._"
+        yield ""
+        return
+    yield f"_Page {page} of {pages} (flagged steps {first + 1:,}–{last:,} of {total:,})._\n"
+    for i, step in enumerate(_flagged(steps)):
+        if i >= last:
+            break
+        if i >= first:
+            yield from _step_lines(step, max_step_chars)
+    if page < pages:
+        yield f"_Next page: page={page + 1}_"
+        yield ""
+
+
+def _lines(
+    run: Run,
+    steps: Sequence[Step],
+    summary: dict,
+    max_step_chars: Optional[int],
+    max_steps: Optional[int],
+    max_per_tag: Optional[int],
+    page: Optional[int],
+    page_size: int,
+) -> Iterator[str]:
+    yield f"# Agent MRI Incident Report\n"
+    yield f"**Agent:** `{run.agent_name}`"
+    yield f"**Run ID:** `{run.run_id}`"
+    yield f"**User query:** {_cut(str(run.user_query), max_step_chars)}\n"
+
+    yield "## Summary\n"
+    yield f"- Total steps: {summary['total_steps']}"
+    yield f"- Flagged steps: {summary['flagged_steps']}"
 
-def generate_report(run: Run, steps: List[Step], summary: dict) -> str:
-    lines = []
-    lines.append(f"# Agent MRI Incident Report\n")
-    lines.append(f"**Agent:** `{run.agent_name}`")
-    lines.append(f"**Run ID:** `{run.run_id}`")
-    lines.append(f"**User query:** {run.user_query}\n")
-
-    lines.append("## Summary\n")
-    lines.append(f"- Total steps: {summary['total_steps']}")
-    lines.append(f"- Flagged steps: {summary['flagged_steps']}")
-    
     if summary["by_failure_type"]:
-        lines.append("- Issues by type:")
+        yield "- Issues by type:"
         for tag, count in summary["by_failure_type"].items():
-            lines.append(f"  - **{tag}**: {count}")
+            yield f"  - **{tag}**: {count}"
     else:
-        lines.append("- No obvious issues detected.\n")
+        yield "- No obvious issues detected.\n"
 
-    lines.append("\n## Flagged Steps\n")
-    for step in steps:
-        if step.analysis.risk_score <= 0:
-            continue
-        lines.append(f" Step {step.step_id} ({step.type})")
-        if step.content:
-            lines.append(f"> {step.content}")
-        if step.analysis.failure_tags:
-            lines.append(f"- Tags: {', '.join(step.analysis.failure_tags)}")
-        if step.analysis.notes:
-            lines.append(f"- Notes: {step.analysis.notes}")
-        lines.append("")
-
-    return "\n".join(lines)
+    yield "\n## Flagged Steps\n"
+    if page is not None:
+        yield from _page_lines(steps, max_step_chars, page, page_size)
+    else:
+        yield from _capped_lines(steps, max_step_chars, max_steps, max_per_tag)
+
+
+_DEFAULT = object()
+
+
+def iter_report(
+    run: Run,
+    steps: Sequence[Step],
+    summary: dict,
+    max_step_chars: Any = _DEFAULT,
+    max_steps: Any = _DEFAULT,
+    max_per_tag: Any = _DEFAULT,
+    page: Optional[int] = None,
+    page_size: int = 100,
+    chunk_chars: int = CHUNK_CHARS,
+) -> Iterator[str]:
+    """
+    The incident report as chunks of markdown (about chunk_chars each).
+
+    Limits left out use the configured defaults; None means unlimited.
+    With page (1-based), flagged steps are listed page_size at a time and
+    max_steps / max_per_tag do not apply. Bad arguments raise ValueError
+    right away, before the first chunk.
+    """
+    if page is not None and (page < 1 or page_size < 1):
+        raise ValueError("page and page_size must be >= 1")
+    limits = report_limits()
+    lines = _lines(
+        run,
+        steps,
+        summary,
+        limits["max_step_chars"] if max_step_chars is _DEFAULT else max_step_chars,
+        limits["max_steps"] if max_steps is _DEFAULT else max_steps,
+        limits["max_per_tag"] if max_per_tag is _DEFAULT else max_per_tag,
+        page,
+        page_size,
+    )
+
+    return _chunks(lines, chunk_chars)
+
+
+def _chunks(lines: Iterator[str], chunk_chars: int) -> Iterator[str]:
+    """Same text as "\n".join(lines), in chunks."""
+    buf: List[str] = [next(lines)]
+    size = len(buf[0])
+    for line in lines:
+        buf.append("\n")
+        buf.append(line)
+        size += len(line) + 1
+        if size >= chunk_chars:
+            yield "".join(buf)
+            buf.clear()
+            size = 0
+    if buf:
+        yield "".join(buf)
+
+
+def write_report(
+    target: Union[str, "os.PathLike[str]", IO[str]],
+    run: Run,
+    steps: Sequence[Step],
+    summary: dict,
+    **limits,
+) -> int:
+    """
+    Stream the report into a path or a text file object; returns the
+    number of characters written. Keyword arguments as for iter_report.
+    """
+    if hasattr(target, "write"):
+        return sum(target.write(chunk) for chunk in iter_report(run, steps, summary, **limits))
+    with open(target, "w", encoding="utf-8") as f:
+        return write_report(f, run, steps, summary, **limits)
+
+
+def generate_report(run: Run, steps: List[Step], summary: dict) -> str:
+    """The whole report as one string, with the configured limits."""
+    return "".join(iter_report(run, steps, summary))
@@ -31,80 +31,75 @@ Final-answer rules
 - speculative_metrics
     uses percentages but we didn't see much tool evidence
 
+Latency rules (slow_tool, orphan_tool_call, latency_outlier) live in
+`latency.py` and are registered alongside these.
+
 These tags flag *risk*, not absolute truth.
+
+Rules are registered in `rules.DEFAULT_REGISTRY`; extra rules can be plugged
+in with `rules.register_rule` without editing this module. Text-derived
+inputs (lowered content, phrase hits, percentages, ...) come from
+`step_features` / `query_features` (see features.py) and are computed once
+per distinct text, not once per rule.
 """
 
 from __future__ import annotations
 
-from typing import Dict, List
-import re
+import hashlib
+from typing import Any, Dict, Iterable, Iterator, Optional
 
 from ..schema import Run, Step
-
-
-# ---------- helpers for whole-run stats ----------
-
-
-def _compute_run_stats(run: Run) -> Dict[str, int]:
-    tool_calls = sum(1 for s in run.steps if s.type == "tool_call")
-    tool_results = sum(1 for s in run.steps if s.type == "tool_result")
-    thoughts = sum(1 for s in run.steps if s.type == "thought")
-    final_answers = [s for s in run.steps if s.type == "final_answer"]
-
-    return {
-        "tool_call_count": tool_calls,
-        "tool_result_count": tool_results,
-        "thought_count": thoughts,
-        "has_final_answer": int(len(final_answers) > 0),
-    }
+from .features import FeatureExtractor, TextFeatures
+from .phrase_matcher import PhraseMatcher
+from .rules import (
+    DEFAULT_REGISTRY,
+    RuleContext,
+    RuleEngine,
+    RuleRegistry,
+    StepBuilder,
+    iter_scored_steps,
+    register_rule,
+)
+from . import latency  # registers the latency rules
+
+# Bump when a built-in rule changes behaviour without changing its name,
+# so cached analysis results (api.analyze_log) are invalidated.
+RULESET_VERSION = "2"
 
 
 # ---------- basic per-step rules ----------
 
 
-def _flag_basic_risks(step: Step) -> None:
+@register_rule
+def _flag_basic_risks(step: Step, ctx: RuleContext, out: StepBuilder) -> None:
     """
     Very simple v0 rules:
     - if 'sorry' in content -> possible error/loop
     - if 'I think' + thought -> weak grounding
     - if type == tool_result and error != None -> high risk
     """
-    tags: List[str] = list(step.analysis.failure_tags or [])
-    score = float(step.analysis.risk_score or 0.0)
-    notes_parts: List[str] = [step.analysis.notes] if step.analysis.notes else []
-
-    content = (step.content or "").lower()
-
     # Tool error
     if step.type == "tool_result" and step.error:
-        if "tool_error" not in tags:
-            tags.append("tool_error")
-        score = max(score, 0.9)
-        notes_parts.append(f"Tool error: {step.error}")
+        out.flag("tool_error", 0.9, f"Tool error: {step.error}")
+
+    hits = step_features(out).phrases
 
     # Apology (often signals a failure)
-    if "sorry" in content:
-        if "apology" not in tags:
-            tags.append("apology")
-        score = max(score, 0.4)
-        notes_parts.append("Agent apologized; may indicate previous failure.")
+    if "apology" in hits:
+        out.flag("apology", 0.4, "Agent apologized; may indicate previous failure.")
 
     # Weak grounding ("I think..." with no explicit evidence)
-    if step.type == "thought" and "i think" in content and step.role == "agent":
-        if "weak_grounding" not in tags:
-            tags.append("weak_grounding")
-        score = max(score, 0.3)
-        notes_parts.append("Speculative reasoning without explicit evidence.")
-
-    step.analysis.risk_score = score
-    step.analysis.failure_tags = tags
-    step.analysis.notes = " ".join(p for p in notes_parts if p)
+    if step.type == "thought" and "hedging" in hits and step.role == "agent":
+        out.flag(
+            "weak_grounding", 0.3, "Speculative reasoning without explicit evidence."
+        )
 
 
 # ---------- tool misuse rules (domain mismatch) ----------
 
 
-def _flag_tool_misuse(step: Step, run: Run) -> None:
+@register_rule(step_types=("tool_call",))
+def _flag_tool_misuse(step: Step, ctx: RuleContext, out: StepBuilder) -> None:
     """
     Detect tool calls that are clearly off-domain vs the task.
 
@@ -119,18 +114,10 @@ def _flag_tool_misuse(step: Step, run: Run) -> None:
     If both are present and task_domain != tool_domain,
     we tag this as 'tool_misuse'.
     """
-    if step.type != "tool_call":
-        # only analyze actual tool calls here
-        return
-
-    tags: List[str] = list(step.analysis.failure_tags or [])
-    score = float(step.analysis.risk_score or 0.0)
-    notes_parts: List[str] = [step.analysis.notes] if step.analysis.notes else []
-
     # Task domain from run metadata
     task_domain = None
-    if isinstance(run.metadata, dict):
-        task_domain = run.metadata.get("task_domain")
+    if isinstance(ctx.run.metadata, dict):
+        task_domain = ctx.run.metadata.get("task_domain")
 
     # Tool domain from arguments
     tool_domain = None
@@ -139,25 +126,17 @@ def _flag_tool_misuse(step: Step, run: Run) -> None:
 
     # If we don't have both, we can't decide — leave as is
     if not task_domain or not tool_domain:
-        step.analysis.risk_score = score
-        step.analysis.failure_tags = tags
-        step.analysis.notes = " ".join(p for p in notes_parts if p)
         return
 
     # Domain mismatch => tool_misuse
     if task_domain != tool_domain:
-        if "tool_misuse" not in tags:
-            tags.append("tool_misuse")
-        score = max(score, 0.6)
-        notes_parts.append(
+        out.flag(
+            "tool_misuse",
+            0.6,
             f"Tool domain '{tool_domain}' does not match task domain '{task_domain}' "
-            "(possible tool misuse / irrelevant tool for this query)."
+            "(possible tool misuse / irrelevant tool for this query).",
         )
 
-    step.analysis.risk_score = score
-    step.analysis.failure_tags = tags
-    step.analysis.notes = " ".join(p for p in notes_parts if p)
-
 
 # ---------- memory / topic drift rules ----------
 
@@ -195,11 +174,11 @@ _OFF_TOPIC_KEYWORDS = [
 ]
 
 
-def _tokenize(text: str) -> List[str]:
-    return re.findall(r"[a-zA-Z]+", text.lower())
+_SERIOUS_KEYWORDS = ["security", "risk", "ai", "compliance", "policy", "finance"]
 
 
-def _flag_memory_drift(step: Step, run: Run) -> None:
+@register_rule(step_types=("thought", "final_answer"))
+def _flag_memory_drift(step: Step, ctx: RuleContext, out: StepBuilder) -> None:
     """
     Flag steps that have drifted far from the original query topic.
 
@@ -208,38 +187,24 @@ def _flag_memory_drift(step: Step, run: Run) -> None:
       in a thought or final answer → tag memory_drift,
       *especially* when the query is serious/technical (like AI security).
     """
-    if step.type not in ("thought", "final_answer"):
+    feats = step_features(out)
+    if not feats.length:
         return
-    if not step.content:
-        return
-
-    tags: List[str] = list(step.analysis.failure_tags or [])
-    score = float(step.analysis.risk_score or 0.0)
-    notes_parts: List[str] = [step.analysis.notes] if step.analysis.notes else []
-
-    user_q = (run.user_query or "").lower()
-    text = step.content.lower()
 
     # is this a "serious" query?
-    serious_keywords = ["security", "risk", "ai", "compliance", "policy", "finance"]
-    is_serious_query = any(k in user_q for k in serious_keywords)
+    is_serious_query = "serious" in query_features(ctx).phrases
 
-    off_topic = any(k in text for k in _OFF_TOPIC_KEYWORDS)
+    off_topic = "off_topic" in feats.phrases
 
     # If it's a serious query and we see clearly off-topic domains → memory drift.
     if is_serious_query and off_topic:
-        if "memory_drift" not in tags:
-            tags.append("memory_drift")
-        score = max(score, 0.6)
-        notes_parts.append(
+        out.flag(
+            "memory_drift",
+            0.6,
             "Content includes obviously off-topic concepts for this query "
-            "(possible memory / context drift)."
+            "(possible memory / context drift).",
         )
 
-    step.analysis.risk_score = score
-    step.analysis.failure_tags = tags
-    step.analysis.notes = " ".join(p for p in notes_parts if p)
-
 
 # ---------- final-answer focused rules ----------
 
@@ -266,124 +231,188 @@ _STRONG_CONFIDENCE_PHRASES = [
 ]
 
 
-def _detect_percentages(text: str) -> List[str]:
-    # Match "18.7%" or "20 %" etc.
-    pattern = r"\b\d+(\.\d+)?\s*%"
-    return re.findall(pattern, text)
-
-
-def _has_confident_language(text_lower: str) -> bool:
-    return any(phrase in text_lower for phrase in _STRONG_CONFIDENCE_PHRASES)
-
-
-def _has_citation_like_signals(text_lower: str) -> bool:
-    # very rough heuristic for "this might be citing something"
-    return any(
-        token in text_lower
-        for token in [
-            "according to",
-            "source:",
-            "paper",
-            "study",
-            "dataset",
-            "report",
-            "as reported by",
-            "doi.org",
-            "arxiv.org",
-            "https://",
-            "[1]",
-            "(202",
-        ]
-    )
+# very rough heuristic for "this might be citing something"
+_CITATION_TOKENS = [
+    "according to",
+    "source:",
+    "paper",
+    "study",
+    "dataset",
+    "report",
+    "as reported by",
+    "doi.org",
+    "arxiv.org",
+    "https://",
+    "[1]",
+    "(202",
+]
 
 
-def _analyze_final_answer(step: Step, run_stats: Dict[str, int]) -> None:
+@register_rule(
+    step_types=("final_answer",),
+    scope="run",
+    depends_on=("tool_result_count",),
+)
+def _analyze_final_answer(step: Step, ctx: RuleContext, out: StepBuilder) -> None:
     """
     Add hallucination-style tags based on the final answer content
     and simple run-level stats (how many tools were used).
     """
-    if not step.content:
+    feats = step_features(out)
+    if not feats.length:
         return
 
-    tags: List[str] = list(step.analysis.failure_tags or [])
-    score = float(step.analysis.risk_score or 0.0)
-    notes_parts: List[str] = [step.analysis.notes] if step.analysis.notes else []
-
-    text = step.content
-    text_lower = text.lower()
-    length = len(text)
+    length = feats.length
+    hits = feats.phrases
+    percents = feats.percentages
+    has_conf = "strong_confidence" in hits
+    has_citation = "citation" in hits
 
-    percents = _detect_percentages(text)
-    has_conf = _has_confident_language(text_lower)
-    has_citation = _has_citation_like_signals(text_lower)
-
-    tool_results = run_stats.get("tool_result_count", 0)
+    tool_results = ctx.stats.get("tool_result_count", 0)
 
     # 1) Speculative metrics: lots of precise numbers but little tool grounding
     if percents and tool_results <= 1:
-        if "speculative_metrics" not in tags:
-            tags.append("speculative_metrics")
-        score = max(score, 0.4)
-        notes_parts.append(
-            "Final answer uses specific percentages with limited tool evidence in the run."
+        out.flag(
+            "speculative_metrics",
+            0.4,
+            "Final answer uses specific percentages with limited tool evidence in the run.",
         )
 
     # 2) Overconfident but no explicit citation/source
     if has_conf and not has_citation:
-        if "overconfident_no_citation" not in tags:
-            tags.append("overconfident_no_citation")
-        score = max(score, 0.5)
-        notes_parts.append(
-            "Strongly confident language without explicit sources or citations."
+        out.flag(
+            "overconfident_no_citation",
+            0.5,
+            "Strongly confident language without explicit sources or citations.",
         )
 
     # 3) Hallucination risk: long, confident answer, few tools
     if (
         length > 600  # quite long answer
-        and (has_conf or "speculative_metrics" in tags)
+        and (has_conf or "speculative_metrics" in out.tags)
         and tool_results <= 1
     ):
-        if "hallucination_risk" not in tags:
-            tags.append("hallucination_risk")
-        score = max(score, 0.75)
-        notes_parts.append(
-            "Long, highly confident answer with minimal tool usage; likely hallucination risk."
+        out.flag(
+            "hallucination_risk",
+            0.75,
+            "Long, highly confident answer with minimal tool usage; likely hallucination risk.",
         )
 
-    step.analysis.risk_score = score
-    step.analysis.failure_tags = tags
-    step.analysis.notes = " ".join(p for p in notes_parts if p)
+
+# ---------- phrase families (compiled once) ----------
+
+_PHRASES = PhraseMatcher(
+    {
+        "apology": ["sorry"],
+        "hedging": ["i think"],
+        "off_topic": _OFF_TOPIC_KEYWORDS,
+        "strong_confidence": _STRONG_CONFIDENCE_PHRASES,
+        "citation": _CITATION_TOKENS,
+        "serious": _SERIOUS_KEYWORDS,
+    }
+)
+
+
+# ---------- shared text features ----------
+
+_FEATURES = FeatureExtractor(_PHRASES)
+
+
+def configure_feature_cache(max_entries: int = 50_000, max_chars: int = 32 * 1024 * 1024) -> FeatureExtractor:
+    """Replace the process-wide feature extractor (e.g. from config)."""
+    global _FEATURES
+    _FEATURES = FeatureExtractor(_PHRASES, max_entries, max_chars)
+    return _FEATURES
+
+
+def feature_cache_stats() -> Dict[str, Any]:
+    return _FEATURES.stats()
+
+
+def step_features(out: StepBuilder) -> TextFeatures:
+    """Features of the step's content, shared by every rule of the step."""
+    feats = out.memo.get("features")
+    if feats is None:
+        feats = out.memo["features"] = _FEATURES.features(out.step.content)
+    return feats
+
+
+def query_features(ctx: RuleContext) -> TextFeatures:
+    """Features of the run's user query, shared by every step of the run."""
+    feats = ctx.memo.get("query_features")
+    if feats is None:
+        feats = ctx.memo["query_features"] = _FEATURES.features(ctx.run.user_query)
+    return feats
 
 
 # ---------- main entrypoint ----------
 
 
-def score_risks(run: Run):
+def ruleset_version(registry: Optional[RuleRegistry] = None) -> str:
     """
-    Enrich all steps with simple risk analysis and return a summary.
+    Identifier of the active rule set and its settings, used to key cached
+    results.
     """
-    stats = _compute_run_stats(run)
+    settings = repr(sorted(latency.latency_settings().items()))
+    settings_hash = hashlib.sha1(settings.encode("utf-8")).hexdigest()[:8]
+    return f"{RULESET_VERSION}-{(registry or DEFAULT_REGISTRY).fingerprint()}-{settings_hash}"
+
 
+def score_risks(run: Run, registry: Optional[RuleRegistry] = None):
+    """
+    Enrich all steps with simple risk analysis and return a summary.
+
+    Steps are scored in a single pass; see rules.RuleEngine.
+    """
+    engine = RuleEngine(run, registry)
     for step in run.steps:
-        # per-step rules
-        _flag_basic_risks(step)
-        _flag_tool_misuse(step, run)
-        _flag_memory_drift(step, run)
-
-        # final answer rules
-        if step.type == "final_answer":
-            _analyze_final_answer(step, stats)
-
-    total = len(run.steps)
-    flagged = sum(1 for s in run.steps if s.analysis.risk_score > 0)
-    by_tag: Dict[str, int] = {}
-    for s in run.steps:
-        for t in s.analysis.failure_tags:
-            by_tag[t] = by_tag.get(t, 0) + 1
-
-    summary = {
-        "total_steps": total,
-        "flagged_steps": flagged,
-        "by_failure_type": by_tag,
-    }
-    return run.steps, summary
+        engine.feed(step)
+    engine.finish()
+    return run.steps, engine.summary()
+
+
+class StreamingScore:
+    """
+    Iterator over scored steps for runs that do not fit in memory.
+
+        run, steps = stream_log_file(path)
+        scored = score_risks_stream(run, steps)
+        for step in scored:
+            ...
+        scored.summary  # complete once iteration is exhausted
+
+    Steps are yielded as soon as their rules are final, so not strictly in
+    log order:
+
+    - most steps right after they are read
+    - a tool call once its result has been read (just before the result,
+      after any steps logged in between), or at the end if it never gets one
+    - final answers at the end, because their rules need whole-run stats
+      (e.g. tool_result_count), which are accumulated on the fly
+
+    Sort by step_id (or keep the run's order) if the order matters. The
+    summary does not depend on it: tags are listed in order of first
+    appearance in the log, as with score_risks.
+    """
+
+    def __init__(self, run: Run, steps: Iterable[Step], registry: Optional[RuleRegistry] = None):
+        self._engine = RuleEngine(run, registry)
+        self._steps = iter_scored_steps(self._engine, steps)
+
+    def __iter__(self) -> Iterator[Step]:
+        return self._steps
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return self._engine.ctx.stats
+
+    @property
+    def summary(self) -> Dict[str, Any]:
+        return self._engine.summary()
+
+
+def score_risks_stream(
+    run: Run, steps: Iterable[Step], registry: Optional[RuleRegistry] = None
+) -> StreamingScore:
+    """Streaming counterpart of score_risks; see StreamingScore."""
+    return StreamingScore(run, steps, registry)
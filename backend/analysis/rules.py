@@ -0,0 +1,427 @@
+# backend/analysis/rules.py
+
+"""
+Small rule engine behind the MRI risk scorer.
+
+Rules are plain functions `rule(step, ctx, out)` that register the step types
+they care about:
+
+    from backend.analysis.rules import register_rule
+
+    @register_rule(step_types=("tool_result",))
+    def flag_empty_results(step, ctx, out):
+        if step.result in (None, "", [], {}):
+            out.flag("empty_tool_result", 0.3, "Tool returned nothing.")
+
+scope="step" rules run as soon as the step is seen.
+scope="run" rules need whole-run stats (e.g. how many tool results the run
+has), so the engine holds those steps back and runs them once the run has
+been fully read. They declare the stats they read with `depends_on`, which
+lets the IncrementalScorer re-run them only when those stats change. A rule
+whose outcome can be decided before the end of the run (e.g. a tool call
+once its result has arrived) can pass `settled(step, ctx) -> bool`. A
+step-scoped rule that makes it true (e.g. on the tool result) calls
+`ctx.wake(position)` with the held step's position; the engine then checks
+only that step and releases it if all its run rules are settled.
+
+The engine walks the steps once: it updates run stats, dispatches each step
+to the rules registered for its type, accumulates tags/notes in a mutable
+StepBuilder and folds the committed step into the summary in the same pass.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..metrics import RULE_TIMINGS
+from ..schema import Run, Step
+
+
+# ---------- per-step accumulator ----------
+
+
+class StepBuilder:
+    """
+    Mutable scratch space for one step's analysis.
+
+    Rules call `flag(...)`; the engine writes the result back into
+    `step.analysis` once, when the step is committed.
+    """
+
+    __slots__ = ("step", "position", "score", "tags", "notes", "memo")
+
+    def __init__(self, step: Step, position: int = 0):
+        analysis = step.analysis
+        self.step = step
+        self.position = position
+        self.score = float(analysis.risk_score or 0.0)
+        self.tags: List[str] = list(analysis.failure_tags or [])
+        self.notes: List[str] = [analysis.notes] if analysis.notes else []
+        # per-step values shared between rules (e.g. phrase hits)
+        self.memo: Dict[str, Any] = {}
+
+    def flag(self, tag: str, score: float, note: Optional[str] = None) -> None:
+        if tag not in self.tags:
+            self.tags.append(tag)
+        if score > self.score:
+            self.score = score
+        if note:
+            self.notes.append(note)
+
+    def copy(self) -> "StepBuilder":
+        """Independent copy of the accumulated state (memo is shared)."""
+        other = StepBuilder.__new__(StepBuilder)
+        other.step = self.step
+        other.position = self.position
+        other.score = self.score
+        other.tags = list(self.tags)
+        other.notes = list(self.notes)
+        other.memo = self.memo
+        return other
+
+    def commit(self) -> Step:
+        analysis = self.step.analysis
+        analysis.risk_score = self.score
+        analysis.failure_tags = self.tags
+        analysis.notes = " ".join(self.notes)
+        return self.step
+
+
+# ---------- run context ----------
+
+
+def new_run_stats() -> Dict[str, int]:
+    return {
+        "tool_call_count": 0,
+        "tool_result_count": 0,
+        "thought_count": 0,
+        "has_final_answer": 0,
+    }
+
+
+def update_run_stats(stats: Dict[str, int], step: Step) -> None:
+    if step.type == "tool_call":
+        stats["tool_call_count"] += 1
+    elif step.type == "tool_result":
+        stats["tool_result_count"] += 1
+    elif step.type == "thought":
+        stats["thought_count"] += 1
+    elif step.type == "final_answer":
+        stats["has_final_answer"] = 1
+
+
+@dataclass
+class RuleContext:
+    run: Run
+    stats: Dict[str, int] = field(default_factory=new_run_stats)
+    # run-level values shared between rules (e.g. lowered user query)
+    memo: Dict[str, Any] = field(default_factory=dict)
+    # positions of held steps that may have become settled (see `wake`)
+    woken: List[int] = field(default_factory=list)
+
+    def wake(self, position: int) -> None:
+        """Ask the engine to re-check whether a held step is settled."""
+        self.woken.append(position)
+
+    def take_woken(self) -> List[int]:
+        woken, self.woken = self.woken, []
+        return woken
+
+
+RuleFn = Callable[[Step, RuleContext, StepBuilder], None]
+SettledFn = Callable[[Step, RuleContext], bool]
+
+
+# ---------- registry ----------
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    fn: RuleFn
+    step_types: Optional[Tuple[str, ...]]  # None -> every step type
+    scope: str = "step"  # "step" | "run"
+    depends_on: Optional[Tuple[str, ...]] = None  # run stats read; None -> any
+    settled: Optional[SettledFn] = None  # run rules: outcome final before run end?
+
+    def applies_to(self, step_type: str) -> bool:
+        return self.step_types is None or step_type in self.step_types
+
+
+_SCOPES = ("step", "run")
+
+
+class RuleRegistry:
+    """
+    Ordered collection of rules with a per-step-type dispatch table.
+
+    Rules run in registration order. The dispatch table is rebuilt lazily
+    whenever a rule is added or removed.
+    """
+
+    def __init__(self) -> None:
+        self._rules: List[Rule] = []
+        self._table: Dict[Tuple[str, str], Tuple[Rule, ...]] = {}
+
+    def register(
+        self,
+        fn: Optional[RuleFn] = None,
+        *,
+        step_types: Optional[Iterable[str]] = None,
+        scope: str = "step",
+        name: Optional[str] = None,
+        depends_on: Optional[Iterable[str]] = None,
+        settled: Optional[SettledFn] = None,
+    ):
+        """
+        Register a rule. Usable directly or as a decorator:
+
+            registry.register(my_rule, step_types=["thought"])
+
+            @registry.register(scope="run", step_types=["final_answer"])
+            def my_rule(step, ctx, out): ...
+        """
+        if scope not in _SCOPES:
+            raise ValueError(f"Unknown rule scope: {scope!r} (expected one of {_SCOPES})")
+
+        def decorator(f: RuleFn) -> RuleFn:
+            rule_name = name or f"{f.__module__}.{f.__qualname__}"
+            if any(r.name == rule_name for r in self._rules):
+                raise ValueError(f"Rule already registered: {rule_name}")
+            types = tuple(step_types) if step_types is not None else None
+            deps = tuple(depends_on) if depends_on is not None else None
+            self._rules.append(Rule(rule_name, f, types, scope, deps, settled))
+            self._table.clear()
+            return f
+
+        if fn is not None:
+            return decorator(fn)
+        return decorator
+
+    def unregister(self, name: str) -> None:
+        self._rules = [r for r in self._rules if r.name != name]
+        self._table.clear()
+
+    @property
+    def rules(self) -> Tuple[Rule, ...]:
+        return tuple(self._rules)
+
+    def fingerprint(self) -> str:
+        """Stable short hash of the registered rule set (names, scopes, types)."""
+        spec = repr(
+            [(r.name, r.scope, r.step_types, r.depends_on) for r in self._rules]
+        )
+        return hashlib.sha1(spec.encode("utf-8")).hexdigest()[:12]
+
+    def dispatch(self, step_type: str, scope: str = "step") -> Tuple[Rule, ...]:
+        key = (step_type, scope)
+        rules = self._table.get(key)
+        if rules is None:
+            rules = tuple(
+                r for r in self._rules if r.scope == scope and r.applies_to(step_type)
+            )
+            self._table[key] = rules
+        return rules
+
+
+DEFAULT_REGISTRY = RuleRegistry()
+
+
+def register_rule(
+    fn: Optional[RuleFn] = None,
+    *,
+    step_types: Optional[Iterable[str]] = None,
+    scope: str = "step",
+    name: Optional[str] = None,
+    depends_on: Optional[Iterable[str]] = None,
+    settled: Optional[SettledFn] = None,
+):
+    """Register a rule in the default registry used by `score_risks`."""
+    return DEFAULT_REGISTRY.register(
+        fn,
+        step_types=step_types,
+        scope=scope,
+        name=name,
+        depends_on=depends_on,
+        settled=settled,
+    )
+
+
+# ---------- summary ----------
+
+
+class SummaryCounter:
+    """
+    Running totals behind the {total_steps, flagged_steps, by_failure_type}
+    summary. Steps are added (or removed) in O(number of tags).
+    """
+
+    def __init__(self) -> None:
+        self.total = 0
+        self.flagged = 0
+        self.by_tag: Dict[str, int] = {}
+        # (step position, index in tags) of each tag's first occurrence, so the
+        # summary keeps step order even when held-back steps commit late
+        self._first_seen: Dict[str, Tuple[int, int]] = {}
+
+    def add(self, out: StepBuilder) -> None:
+        self.total += 1
+        if out.score > 0:
+            self.flagged += 1
+        for i, tag in enumerate(out.tags):
+            self.by_tag[tag] = self.by_tag.get(tag, 0) + 1
+            seen = (out.position, i)
+            prev = self._first_seen.get(tag)
+            if prev is None or seen < prev:
+                self._first_seen[tag] = seen
+
+    def remove(self, out: StepBuilder) -> None:
+        self.total -= 1
+        if out.score > 0:
+            self.flagged -= 1
+        for tag in out.tags:
+            count = self.by_tag[tag] - 1
+            if count:
+                self.by_tag[tag] = count
+            else:
+                del self.by_tag[tag]
+                del self._first_seen[tag]
+
+    def as_dict(self) -> Dict[str, Any]:
+        first_seen = self._first_seen
+        return {
+            "total_steps": self.total,
+            "flagged_steps": self.flagged,
+            "by_failure_type": {
+                tag: self.by_tag[tag] for tag in sorted(self.by_tag, key=first_seen.__getitem__)
+            },
+        }
+
+
+# ---------- engine ----------
+
+
+def apply_rules(
+    rules: Iterable[Rule],
+    step: Step,
+    ctx: RuleContext,
+    out: StepBuilder,
+    timings: Optional[Dict[str, List[int]]] = None,
+) -> None:
+    """
+    Run `rules` on one step. With `timings` (metrics.RULE_TIMINGS.new_batch()),
+    each rule's calls / ns are added to it.
+    """
+    if timings is None:
+        for rule in rules:
+            rule.fn(step, ctx, out)
+        return
+    clock = time.perf_counter_ns
+    start = clock()
+    for rule in rules:
+        rule.fn(step, ctx, out)
+        end = clock()
+        stats = timings.get(rule.name)
+        if stats is None:
+            stats = timings[rule.name] = [0, 0]
+        stats[0] += 1
+        stats[1] += end - start
+        start = end
+
+
+class RuleEngine:
+    """
+    Single-pass scorer for one run.
+
+        engine = RuleEngine(run)
+        for step in steps:
+            engine.feed(step)
+        engine.finish()
+        engine.summary()
+    """
+
+    def __init__(self, run: Run, registry: Optional[RuleRegistry] = None):
+        self.registry = registry or DEFAULT_REGISTRY
+        self.ctx = RuleContext(run=run)
+        self._pending: Dict[int, StepBuilder] = {}  # position -> held step
+        self._released: List[Step] = []
+        self._counter = SummaryCounter()
+        self._position = 0
+        self._timings = RULE_TIMINGS.new_batch()
+
+    def feed(self, step: Step) -> Optional[Step]:
+        """
+        Apply step-scoped rules to `step`.
+
+        Returns the committed step, or None if the step waits for
+        run-scoped rules (it is then returned by `finish()`).
+        """
+        update_run_stats(self.ctx.stats, step)
+
+        out = StepBuilder(step, self._position)
+        self._position += 1
+        rules = self.registry.dispatch(step.type, "step")
+        apply_rules(rules, step, self.ctx, out, self._timings)
+
+        committed: Optional[Step] = None
+        if self.registry.dispatch(step.type, "run"):
+            self._pending[out.position] = out
+        else:
+            committed = self._commit(out)
+        if self.ctx.woken:
+            self._release_woken()
+        return committed
+
+    def released(self) -> List[Step]:
+        """Held steps committed early since the last call (see `settled`)."""
+        done, self._released = self._released, []
+        return done
+
+    def _release_woken(self) -> None:
+        for position in self.ctx.take_woken():
+            out = self._pending.get(position)
+            if out is None:
+                continue
+            rules = self.registry.dispatch(out.step.type, "run")
+            if all(r.settled is not None and r.settled(out.step, self.ctx) for r in rules):
+                del self._pending[position]
+                apply_rules(rules, out.step, self.ctx, out, self._timings)
+                self._released.append(self._commit(out))
+
+    def finish(self) -> List[Step]:
+        """Run the run-scoped rules on held-back steps and commit them."""
+        done: List[Step] = self.released()
+        for out in self._pending.values():
+            rules = self.registry.dispatch(out.step.type, "run")
+            apply_rules(rules, out.step, self.ctx, out, self._timings)
+            done.append(self._commit(out))
+        self._pending = {}
+        RULE_TIMINGS.merge(self._timings)
+        return done
+
+    def summary(self) -> Dict[str, Any]:
+        return self._counter.as_dict()
+
+    def _commit(self, out: StepBuilder) -> Step:
+        self._counter.add(out)
+        return out.commit()
+
+
+def iter_scored_steps(engine: RuleEngine, steps: Iterable[Step]) -> Iterator[Step]:
+    """
+    Feed `steps` through `engine`, yielding each step once it is committed.
+
+    Held steps come out of order: a step released early (see `settled`)
+    follows the steps fed before it was woken, the rest follow the last
+    step. Steps are not buffered to restore log order, which would keep
+    everything after an unanswered tool call in memory until the end.
+    """
+    for step in steps:
+        committed = engine.feed(step)
+        if committed is not None:
+            yield committed
+        yield from engine.released()
+    yield from engine.finish()
@@ -1,10 +1,142 @@
 # backend/api.py
 
-from typing import Any, Dict, Union, List
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Dict, Iterable, Optional, Tuple, Union, List
 
+from .cache import AnalysisCache
+from .metrics import stage
+from .serialization import dumps, loads
+from .views import STEP_FIELDS, project_steps, result_key
 from .parser import parse_log_dict
-from .analysis.risk_scorer import score_risks
-from .analysis.report import generate_report
+from .store import RunRecord, RunStore
+from .metrics import RULE_TIMINGS, configure_metrics
+from .analysis.latency import configure_latency_history, latency_settings
+from .analysis.risk_scorer import configure_feature_cache, feature_cache_stats, ruleset_version, score_risks
+from .analysis.report import configure_report, generate_report, report_limits, report_version
+
+
+# Result cache shared by analyze_log / analyze_logs (None = disabled).
+_CACHE: Optional[AnalysisCache] = AnalysisCache()
+
+
+def configure_analysis_cache(
+    enabled: bool = True,
+    max_entries: int = 256,
+    max_bytes: int = 64 * 1024 * 1024,
+    cache_dir: Optional[str] = None,
+    disk_max_bytes: Optional[int] = None,
+) -> Optional[AnalysisCache]:
+    """
+    Replace the module-level result cache (e.g. from server config).
+    """
+    global _CACHE
+    _CACHE = (
+        AnalysisCache(
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            cache_dir=cache_dir,
+            disk_max_bytes=disk_max_bytes,
+        )
+        if enabled
+        else None
+    )
+    return _CACHE
+
+
+def analysis_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters and sizes of the result cache."""
+    if _CACHE is None:
+        return {"enabled": False}
+    return {"enabled": True, **_CACHE.stats()}
+
+
+# Full values of truncated tool results, keyed by views.result_key.
+_RESULTS: AnalysisCache = AnalysisCache(max_entries=4096)
+
+
+def configure_result_store(
+    max_bytes: int = 64 * 1024 * 1024,
+    cache_dir: Optional[str] = None,
+    disk_max_bytes: Optional[int] = None,
+) -> AnalysisCache:
+    """
+    Replace the store behind truncated results (see views.project_steps).
+    """
+    global _RESULTS
+    _RESULTS = AnalysisCache(
+        max_entries=4096,
+        max_bytes=max_bytes,
+        cache_dir=cache_dir,
+        disk_max_bytes=disk_max_bytes,
+    )
+    return _RESULTS
+
+
+def result_store() -> AnalysisCache:
+    return _RESULTS
+
+
+def get_step_result(run_id: str, step_id: int, digest: str) -> Optional[bytes]:
+    """Full JSON of a result that was truncated in an earlier response."""
+    return _RESULTS.get_payload(result_key(run_id, step_id, digest))
+
+
+# Analyzed runs, for later queries (store.RunStore); None -> not persisted.
+_STORE: Optional[RunStore] = None
+
+
+def configure_run_store(path: Optional[str], search: bool = True) -> Optional[RunStore]:
+    """
+    Open (or, with path=None, disable) the run store. search: also index
+    the text of every step for full-text search.
+    """
+    global _STORE
+    if _STORE is not None:
+        _STORE.close()
+    _STORE = RunStore(path, search=search) if path else None
+    return _STORE
+
+
+def run_store() -> Optional[RunStore]:
+    return _STORE
+
+
+def persist_runs(records: Iterable[RunRecord]) -> None:
+    """
+    Save freshly analyzed runs. Best effort: a store failure (disk full,
+    locked database) does not fail the analysis that produced them.
+    """
+    if _STORE is None:
+        return
+    try:
+        with stage("store"):
+            _STORE.save_many(records)
+    except sqlite3.Error:
+        pass
+
+
+def _persist(log_data: Dict[str, Any], result: Dict[str, Any]) -> None:
+    if _STORE is not None:
+        persist_runs([RunRecord.from_analysis(log_data, result, ruleset_version())])
+
+
+def project_analysis(
+    result: Dict[str, Any],
+    run_id: Optional[str],
+    fields: Tuple[str, ...] = STEP_FIELDS,
+    max_result_bytes: int = 0,
+) -> Dict[str, Any]:
+    """analyze_log output with its steps projected / truncated (views.py)."""
+    if fields == STEP_FIELDS and max_result_bytes <= 0:
+        return result
+    with stage("project"):
+        steps = project_steps(result["steps"], fields, run_id, max_result_bytes, _RESULTS)
+    return {**result, "steps": steps}
 
 
 def _to_timeline_step(s) -> Dict[str, Any]:
@@ -58,6 +190,9 @@ def _to_timeline_step(s) -> Dict[str, Any]:
         "operation": s.operation,
         "key": s.key,
         "value": s.value,
+        "start_ns": s.start_ns,
+        "end_ns": s.end_ns,
+        "metadata": s.metadata,
         "analysis": {
             "risk_score": s.analysis.risk_score,
             "failure_tags": failure_tags,
@@ -66,7 +201,17 @@ def _to_timeline_step(s) -> Dict[str, Any]:
     }
 
 
-def analyze_log(log_data: Union[Dict[str, Any], str]) -> Dict[str, Any]:
+def _result_version() -> str:
+    """
+    Second half of the result cache key: the results depend on the rule
+    set and, through report_markdown, on the report limits.
+    """
+    return f"{ruleset_version()}-{report_version()}"
+
+
+def analyze_log(
+    log_data: Union[Dict[str, Any], str], use_cache: bool = True, persist: bool = True
+) -> Dict[str, Any]:
     """
     Main MRI API.
 
@@ -74,6 +219,10 @@ def analyze_log(log_data: Union[Dict[str, Any], str]) -> Dict[str, Any]:
     - a dict already loaded from JSON
     - a JSON string
 
+    Results are cached by content hash + ruleset version + report limits; pass
+    use_cache=False to force a fresh analysis. Fresh analyses are saved to
+    the run store (if configured) unless persist=False.
+
     Returns:
         {
           "steps": [  # timeline-friendly steps
@@ -89,26 +238,254 @@ def analyze_log(log_data: Union[Dict[str, Any], str]) -> Dict[str, Any]:
             ...
           ],
           "summary": {...},          # aggregate stats
-          "report_markdown": "..."   # full incident report
+          "report_markdown": "..."   # incident report (configured limits)
         }
     """
     if isinstance(log_data, str):
-        import json
-        log_data = json.loads(log_data)
+        log_data = loads(log_data)
+
+    cache = _CACHE if use_cache else None
+    if cache is None:
+        result = _analyze(log_data)
+        if persist:
+            _persist(log_data, result)
+        return result
+
+    key = cache.make_key(log_data, _result_version())
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    result = _analyze(log_data)
+    if persist:
+        _persist(log_data, result)
+    cache.put(key, result)
+    return result
+
+
+def analyze_log_json(
+    log_data: Union[Dict[str, Any], str, bytes],
+    use_cache: bool = True,
+    fields: Tuple[str, ...] = STEP_FIELDS,
+    max_result_bytes: int = 0,
+) -> bytes:
+    """
+    analyze_log, returned as serialized JSON bytes ready to send.
 
-    run = parse_log_dict(log_data)
+    With the default (full, untruncated) projection, cache hits are passed
+    through without being decoded, and misses are encoded once (the same
+    bytes are cached and returned). Other projections are applied to the
+    cached full result.
+    """
+    if isinstance(log_data, (str, bytes)):
+        log_data = loads(log_data)
+
+    if fields != STEP_FIELDS or max_result_bytes > 0:
+        result = analyze_log(log_data, use_cache)
+        projected = project_analysis(result, log_data.get("run_id"), fields, max_result_bytes)
+        with stage("serialize"):
+            return dumps(projected)
+
+    cache = _CACHE if use_cache else None
+    if cache is None:
+        result = _analyze(log_data)
+        _persist(log_data, result)
+        with stage("serialize"):
+            return dumps(result)
+
+    key = cache.make_key(log_data, _result_version())
+    payload = cache.get_payload(key)
+    if payload is None:
+        result = _analyze(log_data)
+        _persist(log_data, result)
+        with stage("serialize"):
+            payload = dumps(result)
+        cache.put_payload(key, payload)
+    return payload
+
+
+def _analyze(log_data: Dict[str, Any]) -> Dict[str, Any]:
+    with stage("parse"):
+        run = parse_log_dict(log_data)
 
     # score_risks mutates each Step.analysis and returns:
     #   steps: List[Step]
     #   summary: Dict[str, Any]
-    steps, summary = score_risks(run)
-    report_md = generate_report(run, steps, summary)
+    with stage("score"):
+        steps, summary = score_risks(run)
+    with stage("report"):
+        report_md = generate_report(run, steps, summary)
 
     # Convert dataclasses to plain dicts for the frontend
-    steps_serialized = [_to_timeline_step(s) for s in steps]
+    with stage("timeline"):
+        steps_serialized = [_to_timeline_step(s) for s in steps]
 
     return {
         "steps": steps_serialized,
         "summary": summary,
         "report_markdown": report_md,
     }
+
+
+def _analyze_item(
+    log_data: Union[Dict[str, Any], str], use_cache: bool = True
+) -> Dict[str, Any]:
+    """
+    Worker body for analyze_logs: never raises, so one bad log
+    cannot take down the whole batch.
+    """
+    try:
+        # persisted by analyze_logs in the parent, never from a worker
+        result = analyze_log(log_data, use_cache, persist=False)
+        return {"ok": True, "result": result, "error": None}
+    except Exception as exc:  # report per item, keep the batch going
+        return {"ok": False, "result": None, "error": f"{type(exc).__name__}: {exc}"}
+
+
+# Worker processes shared by every analyze_logs call; created on first use.
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+_POOL_SIZE: Optional[int] = None  # None -> os.cpu_count()
+_POOL_SETTINGS: Optional[Dict[str, Any]] = None  # what the pool's workers were started with
+
+
+def configure_batch_pool(max_workers: Optional[int] = None) -> int:
+    """
+    Set the size of the shared batch worker pool (None → one per CPU).
+    It is also the upper bound of analyze_logs(max_workers=...).
+    """
+    global _POOL, _POOL_SIZE
+    with _POOL_LOCK:
+        _POOL_SIZE = max_workers
+        if _POOL is not None:
+            _POOL.shutdown(wait=False)
+            _POOL = None
+    return _pool_size()
+
+
+def _pool_size() -> int:
+    return max(1, _POOL_SIZE or os.cpu_count() or 1)
+
+
+def _worker_settings() -> Dict[str, Any]:
+    """
+    The analysis settings of this process. Workers may be spawned rather
+    than forked, and then start with the module defaults; they apply these
+    in _init_worker so they score and report exactly like analyze_log here.
+    """
+    features = feature_cache_stats()
+    return {
+        "latency": latency_settings(),
+        "report": report_limits(),
+        "features": {"max_entries": features["max_entries"], "max_chars": features["max_chars"]},
+        "rule_timing": RULE_TIMINGS.enabled,
+    }
+
+
+def _init_worker(settings: Dict[str, Any]) -> None:
+    configure_latency_history(**settings["latency"])
+    configure_report(**settings["report"])
+    configure_feature_cache(**settings["features"])
+    configure_metrics(rule_timing=settings["rule_timing"])
+
+
+def _batch_pool() -> ProcessPoolExecutor:
+    global _POOL, _POOL_SETTINGS
+    settings = _worker_settings()
+    with _POOL_LOCK:
+        if _POOL is not None and _POOL_SETTINGS != settings:
+            _POOL.shutdown(wait=False)  # reconfigured since; restart the workers
+            _POOL = None
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(
+                max_workers=_pool_size(), initializer=_init_worker, initargs=(settings,)
+            )
+            _POOL_SETTINGS = settings
+        return _POOL
+
+
+def _drop_batch_pool(pool: ProcessPoolExecutor) -> None:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is pool:
+            _POOL = None
+    pool.shutdown(wait=False)
+
+
+def analyze_logs(
+    logs: Iterable[Union[Dict[str, Any], str]],
+    max_workers: Optional[int] = None,
+    chunksize: int = 16,
+) -> List[Dict[str, Any]]:
+    """
+    Batch version of analyze_log.
+
+    Fans parse -> score -> report out over a process pool and returns one
+    item per input log, in input order:
+
+        {"index": 0, "ok": True,  "result": {...analyze_log output...}, "error": None}
+        {"index": 1, "ok": False, "result": None, "error": "LogParseError: ..."}
+
+    max_workers:
+        worker processes to use (default and upper bound: the size of the
+        shared pool, see configure_batch_pool). 1 runs everything in the
+        current process.
+    chunksize:
+        minimum number of logs sent to a worker per round-trip; larger
+        chunks amortize pickling overhead for big batches of small logs.
+        It is raised as needed so a batch is split into at most `workers`
+        chunks.
+
+    Cached results are served from this process; only misses are sent to
+    the workers, and their results are cached (and saved to the run store)
+    here.
+    """
+    items = list(logs)
+    outcomes: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    keys: Dict[int, str] = {}
+
+    cache = _CACHE
+    if cache is not None:
+        version = _result_version()
+        for i, item in enumerate(items):
+            try:
+                if isinstance(item, str):
+                    item = items[i] = loads(item)
+                keys[i] = cache.make_key(item, version)
+            except Exception:
+                continue  # leave it to the worker to report the error
+            cached = cache.get(keys[i])
+            if cached is not None:
+                outcomes[i] = {"ok": True, "result": cached, "error": None}
+
+    todo = [i for i, outcome in enumerate(outcomes) if outcome is None]
+    worker = partial(_analyze_item, use_cache=False)
+    workers = min(max_workers or _pool_size(), _pool_size(), len(todo))
+
+    if workers <= 1:
+        fresh = [worker(items[i]) for i in todo]
+    else:
+        # at most `workers` chunks, so no more than that many processes
+        # of the shared pool work on this batch
+        chunksize = max(chunksize, 1, -(-len(todo) // workers))
+        pool = _batch_pool()
+        try:
+            fresh = list(pool.map(worker, [items[i] for i in todo], chunksize=chunksize))
+        except BrokenProcessPool:
+            _drop_batch_pool(pool)  # a worker died; start a new pool next time
+            raise
+
+    for i, outcome in zip(todo, fresh):
+        outcomes[i] = outcome
+        if cache is not None and outcome["ok"] and i in keys:
+            cache.put(keys[i], outcome["result"])
+
+    if _STORE is not None:
+        version = ruleset_version()
+        persist_runs(
+            RunRecord.from_analysis(items[i], outcome["result"], version)
+            for i, outcome in zip(todo, fresh)
+            if outcome["ok"]
+        )
+
+    return [{"index": i, **outcome} for i, outcome in enumerate(outcomes)]
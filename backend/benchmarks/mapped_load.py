@@ -0,0 +1,131 @@
+# backend/benchmarks/mapped_load.py
+
+"""
+Load benchmark: json.load vs. memory-mapped parsing of log files.
+
+Run from the project root:
+
+    python -m backend.benchmarks.mapped_load
+    python -m backend.benchmarks.mapped_load --steps 20000 --big-kb 64
+    python -m backend.benchmarks.mapped_load --steps 400000 --big-kb 0
+
+Writes a synthetic log where every `--big-every`th step carries a large
+content string or tool result of `--big-kb` KiB, then, for each mode, loads
+and scores it in a fresh subprocess:
+
+  - eager:  parse_log_file(path)
+  - lazy:   parse_log_file(path, lazy=True)
+  - mapped: parse_log_file(path, mapped=True)
+
+Reported per mode:
+
+  - load_s / score_s: wall time of loading the file / score_risks
+  - heap_mb:  tracemalloc peak over load + score (separate pass)
+  - rss_mb:   peak resident set size of the subprocess (ru_maxrss; for
+              mapped, this includes file pages of the mapping, which the
+              OS can drop at any time)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict
+
+from .synthetic import make_log
+
+MODES = ("eager", "lazy", "mapped")
+
+
+def _big_log(n_steps: int, seed: int, big_kb: int, big_every: int) -> Dict[str, Any]:
+    log = make_log(n_steps, seed=seed, tag_density=0.1)
+    if big_kb <= 0:
+        return log
+    filler = "lorem ipsum dolor sit amet, consectetur adipiscing elit. "
+    text = (filler * (big_kb * 1024 // len(filler) + 1))[: big_kb * 1024]
+    rows = [{"id": i, "text": filler} for i in range(big_kb * 1024 // 80)]
+    for i, step in enumerate(log["steps"]):
+        if i % big_every:
+            continue
+        if step["type"] == "tool_result":
+            step["result"] = {"rows": rows}
+        elif step.get("content") is not None:
+            step["content"] = step["content"] + " " + text
+    return log
+
+
+def _measure(path: str, mode: str) -> dict:
+    from ..analysis.risk_scorer import score_risks
+    from ..parser import parse_log_file
+
+    lazy, mapped = mode != "eager", mode == "mapped"
+    start = time.perf_counter()
+    run = parse_log_file(path, lazy=lazy, mapped=mapped)
+    loaded = time.perf_counter()
+    score_risks(run)
+    scored = time.perf_counter()
+    del run
+
+    # again under tracemalloc, which would skew the timings
+    tracemalloc.start()
+    score_risks(parse_log_file(path, lazy=lazy, mapped=mapped))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":  # bytes on macOS, KiB elsewhere
+        maxrss //= 1024
+    return {
+        "load_s": loaded - start,
+        "score_s": scored - loaded,
+        "heap_mb": peak / (1024 * 1024),
+        "rss_mb": maxrss / 1024,
+    }
+
+
+def _run_child(path: str, mode: str) -> dict:
+    cmd = [sys.executable, "-m", "backend.benchmarks.mapped_load", "--child", path, "--mode", mode]
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--steps", type=int, default=20_000)
+    parser.add_argument("--big-kb", type=int, default=32, help="size of large values (0: none)")
+    parser.add_argument("--big-every", type=int, default=3, help="every n-th step is large")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(_measure(args.child, args.mode)))
+        return
+
+    fd, path = tempfile.mkstemp(suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(_big_log(args.steps, args.seed, args.big_kb, args.big_every), f)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"{args.steps} steps, {size_mb:.0f} MB on disk")
+        print(f"{'mode':>7} {'load_s':>8} {'score_s':>8} {'heap_mb':>9} {'rss_mb':>9}")
+        for mode in MODES:
+            r = _run_child(path, mode)
+            print(
+                f"{mode:>7} {r['load_s']:>8.2f} {r['score_s']:>8.2f} "
+                f"{r['heap_mb']:>9.1f} {r['rss_mb']:>9.1f}"
+            )
+    finally:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# backend/benchmarks/phrase_matcher.py
+
+"""
+Microbenchmark: compiled phrase automaton vs. one `in` scan per phrase.
+
+Run from the project root:
+
+    python -m backend.benchmarks.phrase_matcher
+    python -m backend.benchmarks.phrase_matcher --kb 50 --extra-phrases 500
+
+Reports throughput (MB/s) for scanning long final answers against the
+risk_scorer phrase families, optionally padded with extra synthetic phrases
+to simulate the larger lists we plan to ship.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import Callable, Dict, List
+
+from ..analysis.phrase_matcher import PhraseMatcher
+from ..analysis import risk_scorer
+
+
+def _base_families() -> Dict[str, List[str]]:
+    return {
+        "apology": ["sorry"],
+        "hedging": ["i think"],
+        "off_topic": list(risk_scorer._OFF_TOPIC_KEYWORDS),
+        "strong_confidence": list(risk_scorer._STRONG_CONFIDENCE_PHRASES),
+        "citation": list(risk_scorer._CITATION_TOKENS),
+        "serious": list(risk_scorer._SERIOUS_KEYWORDS),
+    }
+
+
+def _random_word(rng: random.Random) -> str:
+    return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 9)))
+
+
+def _make_answer(rng: random.Random, families: Dict[str, List[str]], size: int) -> str:
+    """Long, lowercase final answer sprinkled with a few real phrases."""
+    phrases = [p for ps in families.values() for p in ps]
+    words: List[str] = []
+    length = 0
+    while length < size:
+        w = rng.choice(phrases) if rng.random() < 0.02 else _random_word(rng)
+        words.append(w)
+        length += len(w) + 1
+    return " ".join(words)[:size]
+
+
+def _naive_scan(families: Dict[str, List[str]]) -> Callable[[str], Dict[str, set]]:
+    def scan(text: str) -> Dict[str, set]:
+        hits: Dict[str, set] = {}
+        for family, phrases in families.items():
+            found = {p for p in phrases if p in text}
+            if found:
+                hits[family] = found
+        return hits
+
+    return scan
+
+
+def _time(fn: Callable[[str], object], texts: List[str], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for t in texts:
+            fn(t)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--kb", type=int, default=10, help="answer size in KB (default: 10)")
+    parser.add_argument("--answers", type=int, default=20, help="distinct answers to scan")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--extra-phrases",
+        type=int,
+        nargs="*",
+        default=[0, 100, 500, 1000],
+        help="synthetic phrases added to the off_topic family per scenario",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    size = args.kb * 1024
+
+    print(f"{'phrases':>8} {'states':>8} {'build ms':>9} {'naive MB/s':>11} {'automaton MB/s':>15}")
+    for extra in args.extra_phrases:
+        families = _base_families()
+        families["off_topic"] += [
+            " ".join(_random_word(rng) for _ in range(rng.randint(1, 3))) for _ in range(extra)
+        ]
+        texts = [_make_answer(rng, families, size) for _ in range(args.answers)]
+
+        t0 = time.perf_counter()
+        matcher = PhraseMatcher(families)
+        build_ms = (time.perf_counter() - t0) * 1000
+
+        naive = _naive_scan(families)
+        for t in texts:  # sanity: both strategies agree
+            assert naive(t) == matcher.scan(t)
+
+        total_mb = size * args.answers * args.repeat / (1024 * 1024)
+        naive_s = _time(naive, texts, args.repeat)
+        auto_s = _time(matcher.scan, texts, args.repeat)
+
+        n_phrases = sum(len(p) for p in families.values())
+        print(
+            f"{n_phrases:>8} {matcher.state_count:>8} {build_ms:>9.1f} "
+            f"{total_mb / naive_s:>11.1f} {total_mb / auto_s:>15.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+# backend/benchmarks/pipeline.py
+
+"""
+Per-stage benchmark of the analysis pipeline on synthetic logs.
+
+Run from the project root:
+
+    python -m backend.benchmarks.pipeline
+    python -m backend.benchmarks.pipeline --steps 10 1000 100000 1000000 --repeat 1
+    python -m backend.benchmarks.pipeline --content-words 200 --tag-density 0.3
+    python -m backend.benchmarks.pipeline --baseline old.json   # regression check
+
+Stages, timed separately on the same log:
+
+  - parse:     parser.parse_log_dict (--lazy for LazyStep)
+  - score:     risk_scorer.score_risks
+  - report:    report.generate_report
+  - serialize: api._to_timeline_step for every step + serialization.dumps
+
+Reported per stage:
+
+  - steps_s:  steps per second (best of --repeat)
+  - peak_mb:  tracemalloc peak above the stage's starting heap, measured in
+              a separate pass so tracing does not skew the timings
+  - blocks:   net memory blocks the stage left allocated
+              (sys.getallocatedblocks delta)
+  - gc_gen0:  generation-0 collections during the stage; one per ~700
+              container allocations, so a proxy for allocation churn
+
+Results (plus Python version, platform and git revision) are written as
+JSON to --out. With --baseline, steps_s is compared against a previous
+results file for the same (steps, content_words, tag_density, lazy) cases,
+and the exit status is 1 if any stage got slower by more than --tolerance.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..analysis.report import generate_report
+from ..analysis.risk_scorer import score_risks
+from ..api import _to_timeline_step
+from ..parser import parse_log_dict
+from ..serialization import dumps
+from .synthetic import make_log
+
+STAGES = ("parse", "score", "report", "serialize")
+
+# each stage reads what the previous one left in `state` and adds its output
+Stage = Callable[[Dict[str, Any]], None]
+
+
+def _parse(state: Dict[str, Any]) -> None:
+    state["run"] = parse_log_dict(state["log"], lazy=state["lazy"])
+
+
+def _score(state: Dict[str, Any]) -> None:
+    state["steps"], state["summary"] = score_risks(state["run"])
+
+
+def _report(state: Dict[str, Any]) -> None:
+    state["report"] = generate_report(state["run"], state["steps"], state["summary"])
+
+
+def _serialize(state: Dict[str, Any]) -> None:
+    state["payload"] = dumps([_to_timeline_step(s) for s in state["steps"]])
+
+
+_STAGE_FNS: Dict[str, Stage] = {
+    "parse": _parse,
+    "score": _score,
+    "report": _report,
+    "serialize": _serialize,
+}
+
+
+def _gen0() -> int:
+    return gc.get_stats()[0]["collections"]
+
+
+def _timed_pass(state: Dict[str, Any]) -> Dict[str, Tuple[float, int, int]]:
+    """One run of every stage: {stage: (seconds, blocks, gc_gen0)}."""
+    out: Dict[str, Tuple[float, int, int]] = {}
+    for name in STAGES:
+        gc.collect()
+        blocks, gen0 = sys.getallocatedblocks(), _gen0()
+        start = time.perf_counter()
+        _STAGE_FNS[name](state)
+        elapsed = time.perf_counter() - start
+        out[name] = (elapsed, sys.getallocatedblocks() - blocks, _gen0() - gen0)
+    return out
+
+
+def _traced_pass(state: Dict[str, Any]) -> Dict[str, float]:
+    """One run of every stage under tracemalloc: {stage: peak MiB}."""
+    peaks: Dict[str, float] = {}
+    tracemalloc.start()
+    try:
+        for name in STAGES:
+            gc.collect()
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            _STAGE_FNS[name](state)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks[name] = (peak - base) / (1024 * 1024)
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def run_case(
+    n_steps: int,
+    content_words: int = 40,
+    tag_density: float = 0.1,
+    lazy: bool = False,
+    repeat: int = 3,
+    seed: int = 1,
+    trace: bool = True,
+) -> Dict[str, Any]:
+    """Benchmark one synthetic log size; returns a results-file entry."""
+    log = make_log(n_steps, seed=seed, content_words=content_words, tag_density=tag_density)
+
+    best: Dict[str, Tuple[float, int, int]] = {}
+    state: Dict[str, Any] = {}
+    for _ in range(max(1, repeat)):
+        # parse again every time: scoring writes into the parsed steps
+        state = {"log": log, "lazy": lazy}
+        for name, measured in _timed_pass(state).items():
+            if name not in best or measured[0] < best[name][0]:
+                best[name] = measured
+
+    summary = state["summary"]
+    payload_mb = len(state["payload"]) / (1024 * 1024)
+    peaks = _traced_pass({"log": log, "lazy": lazy}) if trace else {}
+    del state
+
+    stages: Dict[str, Dict[str, Any]] = {}
+    for name in STAGES:
+        seconds, blocks, gen0 = best[name]
+        stages[name] = {
+            "seconds": seconds,
+            "steps_s": n_steps / seconds if seconds > 0 else None,
+            "peak_mb": peaks.get(name),
+            "blocks": blocks,
+            "gc_gen0": gen0,
+        }
+    return {
+        "steps": n_steps,
+        "content_words": content_words,
+        "tag_density": tag_density,
+        "lazy": lazy,
+        "flagged_share": summary["flagged_steps"] / max(1, summary["total_steps"]),
+        "payload_mb": payload_mb,
+        "stages": stages,
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def _max_rss_mb() -> float:
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":  # bytes on macOS, KiB elsewhere
+        maxrss //= 1024
+    return maxrss / 1024
+
+
+def _case_key(case: Dict[str, Any]) -> Tuple[Any, ...]:
+    return (case["steps"], case["content_words"], case["tag_density"], case["lazy"])
+
+
+def compare(
+    results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """Stages whose steps_s fell more than `tolerance` below the baseline."""
+    old = {_case_key(c): c for c in baseline.get("cases", [])}
+    regressions: List[str] = []
+    for case in results["cases"]:
+        prev = old.get(_case_key(case))
+        if prev is None:
+            continue
+        for name in STAGES:
+            now_s = case["stages"][name]["steps_s"]
+            was_s = (prev["stages"].get(name) or {}).get("steps_s")
+            if not now_s or not was_s:
+                continue
+            ratio = now_s / was_s
+            print(f"  {case['steps']:>9} {name:<9} {ratio:>6.2f}x vs baseline")
+            if ratio < 1.0 - tolerance:
+                regressions.append(f"{case['steps']} steps / {name}: {ratio:.2f}x")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--steps", type=int, nargs="+", default=[10, 1_000, 100_000])
+    parser.add_argument("--content-words", type=int, default=40)
+    parser.add_argument("--tag-density", type=float, default=0.1)
+    parser.add_argument("--lazy", action="store_true", help="parse into LazyStep")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-trace", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--out", default=os.path.join(".cache", "benchmarks", "pipeline.json"))
+    parser.add_argument("--baseline", help="previous results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    cases: List[Dict[str, Any]] = []
+    print(
+        f"{'steps':>9} {'stage':<9} {'steps/s':>12} {'seconds':>9} "
+        f"{'peak_mb':>8} {'blocks':>10} {'gc_gen0':>8}"
+    )
+    for n in args.steps:
+        case = run_case(
+            n,
+            content_words=args.content_words,
+            tag_density=args.tag_density,
+            lazy=args.lazy,
+            repeat=args.repeat,
+            seed=args.seed,
+            trace=not args.no_trace,
+        )
+        cases.append(case)
+        for name in STAGES:
+            r = case["stages"][name]
+            peak = "-" if r["peak_mb"] is None else f"{r['peak_mb']:.1f}"
+            print(
+                f"{n:>9} {name:<9} {r['steps_s'] or 0:>12,.0f} {r['seconds']:>9.4f} "
+                f"{peak:>8} {r['blocks']:>10} {r['gc_gen0']:>8}"
+            )
+
+    results = {
+        "benchmark": "pipeline",
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "max_rss_mb": _max_rss_mb(),
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "cases": cases,
+    }
+    out_dir = os.path.dirname(args.out)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("regressions (> {:.0%} slower):".format(args.tolerance))
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# backend/benchmarks/schema_memory.py
+
+"""
+Memory benchmark: eager Step objects vs. lazy LazyStep + AnalysisColumns.
+
+Run from the project root:
+
+    python -m backend.benchmarks.schema_memory
+    python -m backend.benchmarks.schema_memory --steps 50000 200000
+
+Each (mode, size) pair runs in a fresh subprocess that loads a synthetic log
+from disk, parses it and scores it. Reported per run:
+
+  - rss_mb:   peak resident set size of the subprocess (ru_maxrss)
+  - parse_mb: tracemalloc peak of parse + score on top of the decoded JSON
+  - seconds:  wall time of parse + score
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from .synthetic import make_log
+
+
+def _measure(path: str, lazy: bool) -> dict:
+    from ..analysis.risk_scorer import score_risks
+    from ..parser import parse_log_dict
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    run = parse_log_dict(data, lazy=lazy)
+    score_risks(run)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":  # bytes on macOS, KiB elsewhere
+        maxrss //= 1024
+    return {
+        "rss_mb": maxrss / 1024,
+        "parse_mb": peak / (1024 * 1024),
+        "seconds": elapsed,
+    }
+
+
+def _run_child(path: str, lazy: bool) -> dict:
+    cmd = [sys.executable, "-m", "backend.benchmarks.schema_memory", "--child", path]
+    if lazy:
+        cmd.append("--lazy")
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True)
+    return json.loads(out.stdout)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--steps", type=int, nargs="+", default=[10_000, 50_000, 200_000])
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--lazy", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(_measure(args.child, args.lazy)))
+        return
+
+    print(f"{'steps':>9} {'mode':>6} {'rss_mb':>9} {'parse_mb':>9} {'seconds':>8}")
+    for n in args.steps:
+        fd, path = tempfile.mkstemp(suffix=".json")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(make_log(n, seed=args.seed), f)
+            for lazy in (False, True):
+                r = _run_child(path, lazy)
+                mode = "lazy" if lazy else "eager"
+                print(
+                    f"{n:>9} {mode:>6} {r['rss_mb']:>9.1f} "
+                    f"{r['parse_mb']:>9.1f} {r['seconds']:>8.2f}"
+                )
+        finally:
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
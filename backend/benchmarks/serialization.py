@@ -0,0 +1,122 @@
+# backend/benchmarks/serialization.py
+
+"""
+Response-time benchmark for POST /analyze: the pre-serialized orjson path
+vs. the previous response_model + stdlib JSON path.
+
+Run from the project root:
+
+    python -m backend.benchmarks.serialization
+    python -m backend.benchmarks.serialization --steps 1000 10000 --repeat 5
+
+For each run size it reports (best of --repeat, milliseconds):
+
+  - legacy:   endpoint returns a dict; FastAPI validates it against
+              AnalyzeResponse and encodes it with the stdlib encoder
+  - fast:     the real /analyze route, analysis cache disabled
+  - cached:   the real /analyze route on a warm analysis cache (payload
+              bytes are sent without being decoded)
+  - encode:   response validation + encoding alone, legacy vs. fast
+
+Requests are posted as pre-encoded bytes so client-side encoding does not
+count; both servers still parse the request body the same way.
+
+The legacy column depends on the installed FastAPI: the pinned 0.115 line
+encodes response models with jsonable_encoder + json.dumps (what enc_legacy
+measures), while newer releases dump them through pydantic-core, which
+narrows the end-to-end gap.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict, List
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+
+from .. import api
+from ..serialization import dumps
+from ..server import AnalyzeRequest, AnalyzeResponse, app
+from .synthetic import make_log
+
+
+def _legacy_app() -> FastAPI:
+    legacy = FastAPI()
+
+    @legacy.post("/analyze", response_model=AnalyzeResponse)
+    def analyze(req: AnalyzeRequest) -> Dict[str, Any]:
+        return api.analyze_log(req.log, use_cache=False)
+
+    return legacy
+
+
+_RESPONSE = TypeAdapter(AnalyzeResponse)
+
+
+def _legacy_encode(result: Dict[str, Any]) -> bytes:
+    """What FastAPI does with a returned dict: validate, dump, json.dumps."""
+    validated = _RESPONSE.validate_python(result)
+    content = _RESPONSE.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _best(fn: Callable[[], Any], repeat: int) -> float:
+    times: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def _post(client: TestClient, body: bytes) -> Callable[[], None]:
+    def call() -> None:
+        resp = client.post(
+            "/analyze", content=body, headers={"Content-Type": "application/json"}
+        )
+        resp.raise_for_status()
+
+    return call
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--steps", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    legacy = TestClient(_legacy_app())
+    fast = TestClient(app)
+
+    print(
+        f"{'steps':>8} {'legacy_ms':>10} {'fast_ms':>9} {'cached_ms':>10} "
+        f"{'speedup':>8} {'enc_legacy':>11} {'enc_fast':>9} {'resp_MB':>8}"
+    )
+    for n in args.steps:
+        body = dumps({"log": make_log(n, seed=n)})
+
+        api.configure_analysis_cache(enabled=False)
+        t_legacy = _best(_post(legacy, body), args.repeat)
+        t_fast = _best(_post(fast, body), args.repeat)
+
+        api.configure_analysis_cache(enabled=True, max_bytes=1 << 30)
+        _post(fast, body)()  # warm
+        t_cached = _best(_post(fast, body), args.repeat)
+
+        result = api.analyze_log(json.loads(body)["log"], use_cache=False)
+        enc_legacy = _best(lambda: _legacy_encode(result), args.repeat)
+        enc_fast = _best(lambda: dumps(result), args.repeat)
+        size_mb = len(dumps(result)) / (1024 * 1024)
+
+        print(
+            f"{n:>8} {t_legacy:>10.1f} {t_fast:>9.1f} {t_cached:>10.1f} "
+            f"{t_legacy / t_fast:>7.2f}x {enc_legacy:>11.1f} {enc_fast:>9.1f} {size_mb:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# backend/benchmarks/synthetic.py
+
+"""
+Deterministic synthetic MRI logs for benchmarks.
+
+    from backend.benchmarks.synthetic import make_log
+    log = make_log(200_000, seed=1)
+
+Steps cycle through the real step types (thought, tool_call, tool_result,
+memory_update, final answer at the end) with content drawn from a small
+vocabulary that includes phrases the risk rules react to, so scoring does
+realistic work.
+
+With `tag_density` set, content is drawn from words no rule reacts to, tool
+calls are always followed by their result, and each step gets a rule
+trigger (apology, hedging, off-topic word, tool error, domain mismatch,
+missing result, overconfident answer) with that probability:
+
+    log = make_log(100_000, seed=1, content_words=80, tag_density=0.05)
+
+Memory updates have no rule that can fire and a call / result pair gets at
+most one trigger, so the flagged share of a run is about 0.6x `tag_density`
+(backend.benchmarks.pipeline reports the measured share).
+"""
+
+from __future__ import annotations
+
+import random
+from typing import Any, Dict, Iterator, List, Optional
+
+_WORDS = (
+    "the agent model security risk data tool policy report study analysis "
+    "result source evidence plan search sorry i think according to paper "
+    "guaranteed zero tolerance 12.5% catastrophic basil beer"
+).split()
+
+# no risk rule reacts to these (kept on the query's topic)
+_NEUTRAL_WORDS = (
+    "the agent model security risk data tool policy result evidence plan "
+    "search analysis review control access threat attack surface prompt"
+).split()
+
+_THOUGHT_TRIGGERS = ("sorry", "i think", "basil")
+
+_TIMESTAMP = "2025-01-01T00:00:00+00:00"
+
+
+def _text(rng: random.Random, words: int, vocab: List[str] = _WORDS) -> str:
+    return " ".join(rng.choice(vocab) for _ in range(max(1, words)))
+
+
+def make_step(rng: random.Random, step_id: int, content_words: int = 40) -> Dict[str, Any]:
+    kind = rng.choice(("thought", "thought", "tool_call", "tool_result", "memory_update"))
+    step: Dict[str, Any] = {
+        "step_id": step_id,
+        "type": kind,
+        "role": "tool" if kind == "tool_result" else "agent",
+        "timestamp": _TIMESTAMP,
+    }
+    if kind == "thought":
+        step["content"] = _text(rng, rng.randint(content_words // 2, content_words * 3 // 2))
+    elif kind == "tool_call":
+        step["tool_name"] = "web_search"
+        step["call_id"] = f"call-{step_id}"
+        step["arguments"] = {
+            "query": _text(rng, 4),
+            "tool_domain": rng.choice(("ai_security", "office_ops")),
+        }
+    elif kind == "tool_result":
+        step["tool_name"] = "web_search"
+        step["call_id"] = f"call-{step_id - 1}"
+        step["result"] = _text(rng, content_words)
+        step["error"] = "timeout" if rng.random() < 0.1 else None
+    else:
+        step["operation"] = "write"
+        step["key"] = f"note-{step_id % 50}"
+        step["value"] = _text(rng, 5)
+    return step
+
+
+def _tagged_steps(
+    rng: random.Random, n_steps: int, content_words: int, tag_density: float
+) -> Iterator[Dict[str, Any]]:
+    """Steps 1..n_steps for the tag_density mode (see module docstring)."""
+    step_id = 0
+
+    def base(kind: str) -> Dict[str, Any]:
+        return {
+            "step_id": step_id,
+            "type": kind,
+            "role": "tool" if kind == "tool_result" else "agent",
+            "timestamp": _TIMESTAMP,
+        }
+
+    while step_id < n_steps:
+        step_id += 1
+        tagged = rng.random() < tag_density
+        kind = rng.choice(("thought", "thought", "tool_call", "memory_update"))
+        if kind == "tool_call" and step_id == n_steps:
+            kind = "thought"  # no room left for the result
+        step = base(kind)
+
+        if kind == "thought":
+            words = _text(rng, rng.randint(content_words // 2, content_words * 3 // 2), _NEUTRAL_WORDS)
+            if tagged:
+                words = f"{words} {rng.choice(_THOUGHT_TRIGGERS)}"
+            step["content"] = words
+        elif kind == "memory_update":
+            step["operation"] = "write"
+            step["key"] = f"note-{step_id % 50}"
+            step["value"] = _text(rng, 5, _NEUTRAL_WORDS)
+        else:
+            trigger = rng.choice(("misuse", "error", "orphan")) if tagged else None
+            step["tool_name"] = "web_search"
+            step["call_id"] = call_id = f"call-{step_id}"
+            step["arguments"] = {
+                "query": _text(rng, 4, _NEUTRAL_WORDS),
+                "tool_domain": "office_ops" if trigger == "misuse" else "ai_security",
+            }
+            yield step
+            if trigger == "orphan":
+                continue
+            step_id += 1
+            step = base("tool_result")
+            step["tool_name"] = "web_search"
+            step["call_id"] = call_id
+            step["result"] = _text(rng, content_words, _NEUTRAL_WORDS)
+            step["error"] = "timeout" if trigger == "error" else None
+        yield step
+
+
+def make_log(
+    n_steps: int,
+    seed: int = 0,
+    content_words: int = 40,
+    tag_density: Optional[float] = None,
+) -> Dict[str, Any]:
+    """A run with `n_steps` steps, the last of which is a final answer."""
+    rng = random.Random(seed)
+    steps: List[Dict[str, Any]]
+    if tag_density is None:
+        steps = [make_step(rng, i, content_words) for i in range(1, n_steps)]
+        answer = _text(rng, content_words * 4)
+    else:
+        steps = list(_tagged_steps(rng, n_steps - 1, content_words, tag_density))
+        answer = _text(rng, content_words * 4, _NEUTRAL_WORDS)
+        if rng.random() < tag_density:
+            answer += " guaranteed"
+    steps.append(
+        {
+            "step_id": n_steps,
+            "type": "final_answer",
+            "role": "agent",
+            "timestamp": _TIMESTAMP,
+            "content": answer,
+        }
+    )
+    return {
+        "schema_version": "1.0",
+        "run_id": f"synthetic-{seed}-{n_steps}",
+        "agent_name": "synthetic",
+        "timestamp_started": _TIMESTAMP,
+        "timestamp_finished": _TIMESTAMP,
+        "user_query": "What are the main security risks of AI agents?",
+        "metadata": {"task_domain": "ai_security"},
+        "steps": steps,
+    }
@@ -0,0 +1,207 @@
+# backend/cache.py
+
+"""
+Content-addressed cache for analyze_log results.
+
+Identical logs are re-submitted all the time (frontend refreshes, CI), so we
+key results by a stable hash of the canonicalized log plus the ruleset
+version and keep them in an in-memory LRU, with an optional on-disk tier
+that survives restarts.
+
+Entries are stored as JSON bytes: this bounds memory by actual size,
+hands every caller its own fresh copy of the result, and lets the API send
+a cached payload as-is (get_payload) without decoding it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from .serialization import dumps, loads
+
+
+def canonical_log_hash(log_data: Dict[str, Any]) -> str:
+    """sha256 of the log with sorted keys and no insignificant whitespace."""
+    return hashlib.sha256(dumps(log_data, sort_keys=True)).hexdigest()
+
+
+class AnalysisCache:
+    """
+    Thread-safe LRU of analysis results.
+
+    max_entries / max_bytes:
+        in-memory bounds; least recently used entries are evicted first.
+    cache_dir:
+        optional directory for the persistent tier (one file per entry).
+    disk_max_bytes:
+        optional bound for the persistent tier; oldest files are removed first.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_bytes: int = 64 * 1024 * 1024,
+        cache_dir: Optional[str] = None,
+        disk_max_bytes: Optional[int] = None,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.disk_max_bytes = disk_max_bytes
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._disk_bytes = 0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._disk_bytes = sum(
+                os.path.getsize(os.path.join(cache_dir, name))
+                for name in os.listdir(cache_dir)
+                if name.endswith(".json")
+            )
+
+    @staticmethod
+    def make_key(log_data: Dict[str, Any], ruleset_version: str) -> str:
+        return f"{canonical_log_hash(log_data)}-{ruleset_version}"
+
+    # ---- lookup / store ----
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        payload = self.get_payload(key)
+        return loads(payload) if payload is not None else None
+
+    def get_payload(self, key: str) -> Optional[bytes]:
+        """Cached result as serialized JSON bytes."""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return payload
+
+        payload = self._disk_read(key)
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, payload)
+        return payload
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        self.put_payload(key, dumps(result))
+
+    def put_payload(self, key: str, payload: bytes) -> None:
+        """Store an already serialized result."""
+        with self._lock:
+            self._remember(key, payload)
+        self._disk_write(key, payload)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "disk_enabled": bool(self.cache_dir),
+                "disk_bytes": self._disk_bytes,
+            }
+
+    # ---- in-memory LRU (call with lock held) ----
+
+    def _remember(self, key: str, payload: bytes) -> None:
+        if len(payload) > self.max_bytes:
+            return  # would evict everything else; keep it on disk only
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old)
+        self._entries[key] = payload
+        self._bytes += len(payload)
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.evictions += 1
+
+    # ---- persistent tier ----
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")  # type: ignore[arg-type]
+
+    def _disk_read(self, key: str) -> Optional[bytes]:
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                payload = f.read()
+            os.utime(path)  # LRU order for disk pruning
+            return payload
+        except OSError:
+            return None
+
+    def _disk_write(self, key: str, payload: bytes) -> None:
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            existed = os.path.exists(path)
+            with open(tmp, "wb") as f:
+                f.write(payload)
+            os.replace(tmp, path)  # atomic: readers never see partial files
+        except OSError:
+            return
+        if not existed:
+            with self._lock:
+                self._disk_bytes += len(payload)
+            self._prune_disk()
+
+    def _prune_disk(self) -> None:
+        if not self.disk_max_bytes or self._disk_bytes <= self.disk_max_bytes:
+            return
+        files = []
+        for name in os.listdir(self.cache_dir):  # type: ignore[arg-type]
+            if name.endswith(".json"):
+                path = os.path.join(self.cache_dir, name)  # type: ignore[arg-type]
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_bytes = total
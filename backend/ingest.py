@@ -0,0 +1,396 @@
+# backend/ingest.py
+
+"""
+Bulk ingest of a directory of run logs into the run store.
+
+Run from the project root:
+
+    python -m backend.ingest                       # config.LOGS_DIR
+    python -m backend.ingest /var/log/agents --workers 8
+    python -m backend.ingest logs/ --force         # re-score everything
+
+Every *.json / *.jsonl log under the directory (recursively) is parsed and
+scored in worker processes and saved to the run store (store.RunStore,
+default config.RUN_STORE_PATH), where GET /runs and GET /search find it.
+
+A manifest (JSON, next to the store by default) remembers the size, mtime,
+SHA-256 and ruleset version of every file ingested, so a re-run only
+processes new or changed files:
+
+  - same size and mtime, same ruleset   -> skipped without being read
+  - mtime changed but same SHA-256      -> skipped (manifest updated)
+  - otherwise                           -> parsed, scored and saved again
+
+Files that fail to parse are recorded too and retried only once they
+change. Runs of files that disappeared stay in the store; only their
+manifest entries are dropped.
+
+Progress (files/s, steps/s, MB/s) is shown on stderr while it runs; a
+per-tag summary of the ingested runs is printed at the end.
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import hashlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from config import ANALYZE_WORKERS, LOGS_DIR, RUN_STORE_PATH
+from .analysis.overall_risk import overall_risk
+from .analysis.risk_scorer import ruleset_version, score_risks
+from .parser import jsonl_segments, parse_jsonl_file, parse_log_dict, parse_log_file
+from .serialization import dumps, loads
+from .store import RunRecord, RunStore
+
+PATTERNS = ("*.json", "*.jsonl")
+MANIFEST_VERSION = 1
+
+# records saved (and the manifest written) per store transaction
+SAVE_BATCH = 200
+
+# logs at least this big are parsed memory-mapped (parser.parse_mapped)
+# instead of being read into memory whole
+MAPPED_MIN_BYTES = 64 * 1024 * 1024
+
+# (path, size, mtime_ns, sha256 of the last ingest or None)
+Task = Tuple[str, int, int, Optional[str]]
+
+
+# ---------- files + manifest ----------
+
+
+def find_logs(root: str, patterns: Sequence[str] = PATTERNS) -> List[str]:
+    """Absolute paths of the logs under `root`, sorted."""
+    found: List[str] = []
+    for directory, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in files:
+            if any(fnmatch.fnmatch(name, p) for p in patterns):
+                found.append(os.path.abspath(os.path.join(directory, name)))
+    return sorted(found)
+
+
+def _segments(path: str) -> List[str]:
+    return jsonl_segments(path) if path.endswith(".jsonl") else [path]
+
+
+def file_state(path: str) -> Tuple[int, int]:
+    """(size, mtime_ns) of a log; rotated JSONL segments count as one file."""
+    size = mtime_ns = 0
+    for segment in _segments(path):
+        st = os.stat(segment)
+        size += st.st_size
+        mtime_ns = max(mtime_ns, st.st_mtime_ns)
+    return size, mtime_ns
+
+
+def load_manifest(path: str) -> Dict[str, Dict[str, Any]]:
+    """path -> entry; empty if the manifest is missing or unreadable."""
+    try:
+        with open(path, "rb") as f:
+            data = loads(f.read())
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data.get("files") or {}
+
+
+def save_manifest(path: str, files: Dict[str, Dict[str, Any]]) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(dumps({"version": MANIFEST_VERSION, "files": files}))
+    os.replace(tmp, path)  # atomic: an interrupted run keeps the old manifest
+
+
+def plan(
+    paths: Sequence[str], manifest: Dict[str, Dict[str, Any]], version: str, force: bool = False
+) -> Tuple[List[Task], int]:
+    """(files to process, number skipped as unchanged)."""
+    todo: List[Task] = []
+    skipped = 0
+    for path in paths:
+        try:
+            size, mtime_ns = file_state(path)
+        except OSError:
+            continue  # vanished since the scan
+        entry = manifest.get(path)
+        current = entry is not None and entry.get("ruleset") == version and not force
+        if current and entry["size"] == size and entry["mtime_ns"] == mtime_ns:
+            skipped += 1
+            continue
+        todo.append((path, size, mtime_ns, entry.get("sha256") if current else None))
+    return todo, skipped
+
+
+# ---------- worker ----------
+
+
+def _hash(path: str, keep: bool = True) -> Tuple[str, bytes]:
+    """(SHA-256 over all segments, content of the first one if `keep`)."""
+    digest = hashlib.sha256()
+    first = b""
+    for i, segment in enumerate(_segments(path)):
+        with open(segment, "rb") as f:
+            if keep and i == 0:
+                first = f.read()
+                digest.update(first)
+                continue
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest(), first
+
+
+def ingest_file(task: Task) -> Dict[str, Any]:
+    """
+    Parse + score one log (runs in a worker process):
+
+        {"path", "size", "mtime_ns", "sha256", "status", "steps",
+         "record", "error"}
+
+    status: "ok", "unchanged" (same SHA-256 as last time) or "error".
+    """
+    path, size, mtime_ns, known_sha = task
+    out: Dict[str, Any] = {
+        "path": path,
+        "size": size,
+        "mtime_ns": mtime_ns,
+        "sha256": None,
+        "status": "error",
+        "steps": 0,
+        "record": None,
+        "error": None,
+    }
+    try:
+        jsonl = path.endswith(".jsonl")
+        mapped = not jsonl and size >= MAPPED_MIN_BYTES
+        sha, data = _hash(path, keep=not (jsonl or mapped))
+        out["sha256"] = sha
+        if sha == known_sha:
+            out["status"] = "unchanged"
+            return out
+        if jsonl:
+            run = parse_jsonl_file(path)
+        elif mapped:
+            run = parse_log_file(path, mapped=True)
+        else:
+            log = loads(data)
+            if not isinstance(log, dict):
+                raise ValueError("log must be a JSON object")
+            run = parse_log_dict(log)
+        steps, summary = score_risks(run)
+    except Exception as exc:  # one bad file must not stop the ingest
+        out["error"] = f"{type(exc).__name__}: {exc}"
+        return out
+    out["status"] = "ok"
+    out["steps"] = len(steps)
+    out["record"] = RunRecord.from_steps(run, steps, summary, ruleset_version())
+    return out
+
+
+# ---------- progress + summary ----------
+
+
+class Progress:
+    """Counters for one ingest, with a live status line on stderr."""
+
+    def __init__(self, total: int, skipped: int, stream=sys.stderr, interval: float = 0.5):
+        self.total = total
+        self.skipped = skipped
+        self.done = 0
+        self.ok = 0
+        self.unchanged = 0
+        self.errors: List[Tuple[str, str]] = []
+        self.steps = 0
+        self.bytes = 0
+        self.tags: Dict[str, List[int]] = {}  # tag -> [runs, steps]
+        self.levels: Dict[str, int] = {}
+        self.started = time.perf_counter()
+        self._stream = stream
+        self._tty = stream.isatty()
+        self._interval = interval if self._tty else max(interval, 5.0)
+        self._last = 0.0
+
+    def add(self, outcome: Dict[str, Any]) -> None:
+        self.done += 1
+        self.bytes += outcome["size"]
+        status = outcome["status"]
+        if status == "unchanged":
+            self.unchanged += 1
+        elif status == "error":
+            self.errors.append((outcome["path"], outcome["error"]))
+        else:
+            self.ok += 1
+            self.steps += outcome["steps"]
+            summary = outcome["record"].summary
+            for tag, count in (summary.get("by_failure_type") or {}).items():
+                entry = self.tags.setdefault(tag, [0, 0])
+                entry[0] += 1
+                entry[1] += count
+            _, level = overall_risk(summary)
+            self.levels[level] = self.levels.get(level, 0) + 1
+        self.show()
+
+    def line(self) -> str:
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        return (
+            f"{self.done}/{self.total} files  {self.done / elapsed:,.1f} files/s  "
+            f"{self.steps / elapsed:,.0f} steps/s  {self.bytes / elapsed / 1e6:,.1f} MB/s  "
+            f"errors {len(self.errors)}"
+        )
+
+    def show(self, force: bool = False) -> None:
+        now = time.perf_counter()
+        if not force and now - self._last < self._interval:
+            return
+        self._last = now
+        if self._tty:
+            self._stream.write("\r\033[K" + self.line())
+        else:
+            self._stream.write(self.line() + "\n")
+        self._stream.flush()
+
+    def finish(self) -> None:
+        self.show(force=True)
+        if self._tty:
+            self._stream.write("\n")
+
+    def report(self) -> Iterator[str]:
+        elapsed = time.perf_counter() - self.started
+        yield (
+            f"{self.ok} runs ingested ({self.steps:,} steps) in {elapsed:.1f}s; "
+            f"{self.skipped + self.unchanged} unchanged, {len(self.errors)} failed"
+        )
+        if self.levels:
+            yield "risk: " + ", ".join(
+                f"{level} {self.levels[level]}"
+                for level in ("High", "Medium", "Low")
+                if level in self.levels
+            )
+        if self.tags:
+            yield ""
+            yield f"{'tag':<28} {'runs':>8} {'steps':>10}"
+            for tag, (runs, steps) in sorted(self.tags.items(), key=lambda kv: -kv[1][1]):
+                yield f"{tag:<28} {runs:>8} {steps:>10}"
+        if self.errors:
+            yield ""
+            yield "failed:"
+            for path, error in self.errors[:20]:
+                yield f"  {path}: {error}"
+            if len(self.errors) > 20:
+                yield f"  ... and {len(self.errors) - 20} more"
+
+
+# ---------- ingest ----------
+
+
+def ingest(
+    root: str,
+    store: RunStore,
+    manifest_path: str,
+    workers: Optional[int] = None,
+    chunksize: int = 4,
+    patterns: Sequence[str] = PATTERNS,
+    force: bool = False,
+    progress: Optional[Progress] = None,
+) -> Progress:
+    """Ingest the logs under `root` into `store`; returns the counters."""
+    version = ruleset_version()
+    manifest = load_manifest(manifest_path)
+    paths = find_logs(root, patterns)
+    root_prefix = os.path.join(os.path.abspath(root), "")
+    present = set(paths)
+    for path in [p for p in manifest if p.startswith(root_prefix) and p not in present]:
+        del manifest[path]
+
+    todo, skipped = plan(paths, manifest, version, force)
+    if progress is None:
+        progress = Progress(len(todo), skipped)
+
+    workers = min(workers or os.cpu_count() or 1, len(todo))
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    outcomes = (
+        pool.map(ingest_file, todo, chunksize=max(1, chunksize))
+        if pool is not None
+        else map(ingest_file, todo)
+    )
+
+    pending: List[Dict[str, Any]] = []
+
+    def flush() -> None:
+        store.save_many(o["record"] for o in pending if o["status"] == "ok")
+        for o in pending:
+            record = o["record"]
+            manifest[o["path"]] = {
+                "size": o["size"],
+                "mtime_ns": o["mtime_ns"],
+                "sha256": o["sha256"],
+                "ruleset": version,
+                "run_id": record.run_id if record is not None else None,
+                "error": o["error"],
+            }
+        save_manifest(manifest_path, manifest)
+        pending.clear()
+
+    try:
+        for outcome in outcomes:
+            progress.add(outcome)
+            if outcome["status"] == "unchanged":
+                # touched, not modified: keep run_id / error from last time
+                entry = manifest[outcome["path"]]
+                entry.update(size=outcome["size"], mtime_ns=outcome["mtime_ns"])
+                continue
+            pending.append(outcome)
+            if len(pending) >= SAVE_BATCH:
+                flush()
+        flush()
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        progress.finish()
+    return progress
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("root", nargs="?", default=LOGS_DIR, help="directory of logs")
+    parser.add_argument("--store", default=RUN_STORE_PATH or os.path.join(".cache", "runs.sqlite"))
+    parser.add_argument("--manifest", help="default: <store>.manifest.json")
+    parser.add_argument("--workers", type=int, default=ANALYZE_WORKERS or None)
+    parser.add_argument("--chunksize", type=int, default=4, help="files per worker round-trip")
+    parser.add_argument("--pattern", action="append", help=f"file name glob (default: {' '.join(PATTERNS)})")
+    parser.add_argument("--force", action="store_true", help="re-process unchanged files")
+    parser.add_argument("--no-search", action="store_true", help="skip the full-text index")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.root):
+        parser.error(f"not a directory: {args.root}")
+    store = RunStore(args.store, search=not args.no_search)
+    try:
+        progress = ingest(
+            args.root,
+            store,
+            args.manifest or f"{args.store}.manifest.json",
+            workers=args.workers,
+            chunksize=args.chunksize,
+            patterns=args.pattern or PATTERNS,
+            force=args.force,
+        )
+    finally:
+        store.close()
+    for line in progress.report():
+        print(line)
+    if progress.errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
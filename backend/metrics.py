@@ -0,0 +1,207 @@
+# backend/metrics.py
+
+"""
+In-process metrics for the analysis pipeline, exposed as Prometheus text
+on GET /metrics.
+
+- mri_stage_seconds{stage=...}
+    histogram of pipeline stage latencies (intern LLM calls, parse, score,
+    report, critic, serialize, ...); record one with
+
+        with stage("parse"):
+            run = parse_log_dict(data)
+
+- mri_rule_calls_total{rule=...} / mri_rule_seconds_total{rule=...}
+    invocations of and time spent in each rule function, recorded by the
+    rule engines (rules.apply_rules) while RULE_TIMINGS.enabled is set and
+    merged in when a run finishes (IncrementalScorer: after every append)
+
+Per-request profiling: inside `profile()`, every stage recorded on the same
+context (including FastAPI's worker threads) is also collected, and
+`server_timing()` turns it into a Server-Timing header value.
+
+Metrics are per process: logs analyzed in /analyze_batch worker processes
+are not counted.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# seconds; wide enough for LLM calls at the top end
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _num(value: float) -> str:
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+class Histogram:
+    """Cumulative histogram with one label, e.g. stage."""
+
+    def __init__(
+        self, name: str, help: str, label: str, buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # label value -> [count per bucket..., +Inf count], sum
+        self._series: Dict[str, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, label_value: str, value: float) -> None:
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = ([0] * (len(self.buckets) + 1), [0.0])
+            counts, total = series
+            counts[bisect_left(self.buckets, value)] += 1  # first bound >= value
+            total[0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: (list(c), t[0]) for k, (c, t) in self._series.items()}
+        for label_value, (counts, total) in sorted(series.items()):
+            label = f'{self.label}="{_escape(label_value)}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label},le="{_num(bound)}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label}}} {_num(total)}")
+            lines.append(f"{self.name}_count{{{label}}} {cumulative}")
+        return lines
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class RuleTimings:
+    """Cumulative calls / seconds per rule function."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stats: Dict[str, List[float]] = {}  # rule -> [calls, ns]
+
+    def new_batch(self) -> Optional[Dict[str, List[int]]]:
+        """
+        Lock-free accumulator for one scorer ({rule: [calls, ns]}), or None
+        when timing is off; hand it back with `merge`.
+        """
+        return {} if self.enabled else None
+
+    def merge(self, batch: Optional[Dict[str, List[int]]]) -> None:
+        if not batch:
+            return
+        with self._lock:
+            for rule, (calls, ns) in batch.items():
+                stats = self._stats.get(rule)
+                if stats is None:
+                    stats = self._stats[rule] = [0, 0]
+                stats[0] += calls
+                stats[1] += ns
+        batch.clear()
+
+    def snapshot(self) -> Dict[str, Tuple[int, float]]:
+        """{rule: (calls, seconds)}"""
+        with self._lock:
+            return {rule: (int(c), ns / 1e9) for rule, (c, ns) in self._stats.items()}
+
+    def render(self) -> List[str]:
+        snapshot = sorted(self.snapshot().items())
+        lines = [
+            "# HELP mri_rule_calls_total Rule function invocations.",
+            "# TYPE mri_rule_calls_total counter",
+        ]
+        lines += [f'mri_rule_calls_total{{rule="{_escape(r)}"}} {c}' for r, (c, _) in snapshot]
+        lines += [
+            "# HELP mri_rule_seconds_total Time spent in rule functions.",
+            "# TYPE mri_rule_seconds_total counter",
+        ]
+        lines += [
+            f'mri_rule_seconds_total{{rule="{_escape(r)}"}} {_num(s)}' for r, (_, s) in snapshot
+        ]
+        return lines
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+STAGE_SECONDS = Histogram(
+    "mri_stage_seconds", "Latency of analysis pipeline stages.", "stage"
+)
+RULE_TIMINGS = RuleTimings()
+
+
+def configure_metrics(rule_timing: bool = True) -> None:
+    RULE_TIMINGS.enabled = rule_timing
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    return "\n".join(STAGE_SECONDS.render() + RULE_TIMINGS.render()) + "\n"
+
+
+# ---------- stages + per-request profiles ----------
+
+# stages recorded while profiling the current request, in order
+_PROFILE: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar(
+    "mri_profile", default=None
+)
+
+
+def observe_stage(name: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(name, seconds)
+    entries = _PROFILE.get()
+    if entries is not None:
+        entries.append((name, seconds))
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block as pipeline stage `name`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - start)
+
+
+@contextmanager
+def profile() -> Iterator[List[Tuple[str, float]]]:
+    """Collect the stages recorded on this context: [(stage, seconds), ...]."""
+    entries: List[Tuple[str, float]] = []
+    token = _PROFILE.set(entries)
+    try:
+        yield entries
+    finally:
+        _PROFILE.reset(token)
+
+
+def server_timing(entries: Sequence[Tuple[str, float]]) -> str:
+    """
+    Server-Timing header value, e.g. "parse;dur=1.2, score;dur=8.9".
+    Repeated stages are summed; durations are in milliseconds.
+    """
+    totals: Dict[str, float] = {}
+    for name, seconds in entries:
+        totals[name] = totals.get(name, 0.0) + seconds
+    return ", ".join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in totals.items())
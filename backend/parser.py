@@ -1,26 +1,52 @@
 # backend/parser.py
 
+import codecs
 import json
-from typing import Any, Dict, List
+import mmap
+import os
+import re
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from .schema import Run, Step, StepAnalysis
+from .serialization import loads
+from .schema import (
+    AnalysisColumns,
+    LazyStep,
+    MappedValue,
+    Run,
+    Step,
+    StepAnalysis,
+    derive_timestamp,
+    parse_started,
+)
 
 
 class LogParseError(Exception):
     pass
 
 
-def _parse_step(raw: Dict[str, Any]) -> Step:
-    required = ["step_id", "type", "role", "timestamp"]
-    for key in required:
+_REQUIRED_STEP_FIELDS = ("step_id", "type", "role")
+
+
+def _check_step(raw: Dict[str, Any], started: Optional[datetime]) -> None:
+    for key in _REQUIRED_STEP_FIELDS:
         if key not in raw:
             raise LogParseError(f"Missing required step field: {key}")
+    # steps need a wall-clock timestamp, or a span offset from the run start
+    if "timestamp" not in raw and (
+        started is None or ("end_ns" not in raw and "start_ns" not in raw)
+    ):
+        raise LogParseError("Missing required step field: timestamp")
+
+
+def _parse_step(raw: Dict[str, Any], started: Optional[datetime] = None) -> Step:
+    _check_step(raw, started)
 
     return Step(
         step_id=int(raw["step_id"]),
         type=str(raw["type"]),
         role=str(raw["role"]),
-        timestamp=str(raw["timestamp"]),
+        timestamp=derive_timestamp(raw, started),
         content=raw.get("content"),
         state=raw.get("state"),
         tool_name=raw.get("tool_name"),
@@ -31,18 +57,27 @@ def _parse_step(raw: Dict[str, Any]) -> Step:
         operation=raw.get("operation"),
         key=raw.get("key"),
         value=raw.get("value"),
+        start_ns=raw.get("start_ns"),
+        end_ns=raw.get("end_ns"),
+        metadata=raw.get("metadata"),
         analysis=StepAnalysis(),  # empty; filled later
     )
 
 
-def parse_log_dict(data: Dict[str, Any]) -> Run:
-    try:
-        steps_raw: List[Dict[str, Any]] = data["steps"]
-    except KeyError:
-        raise LogParseError("Log missing 'steps' field")
+def parse_steps(
+    steps_raw: Iterable[Dict[str, Any]], run_started: Optional[str] = None
+) -> Iterator[Step]:
+    """
+    Parse raw step dicts one by one (e.g. steps appended to a live run).
+    run_started (the run's timestamp_started) is needed for steps that only
+    carry span offsets.
+    """
+    started = parse_started(run_started) if run_started is not None else None
+    for raw in steps_raw:
+        yield _parse_step(raw, started)
 
-    steps = [_parse_step(s) for s in steps_raw]
 
+def _parse_run(data: Dict[str, Any], steps: List[Step]) -> Run:
     required_top = [
         "schema_version",
         "run_id",
@@ -66,7 +101,630 @@ def parse_log_dict(data: Dict[str, Any]) -> Run:
     )
 
 
-def parse_log_file(path: str) -> Run:
+def _lazy_steps(
+    steps_raw: List[Dict[str, Any]], started: Optional[datetime]
+) -> List[LazyStep]:
+    columns = AnalysisColumns(len(steps_raw), run_started=started)
+    steps = []
+    for i, raw in enumerate(steps_raw):
+        _check_step(raw, started)
+        steps.append(LazyStep(raw, i, columns))
+    return steps
+
+
+def parse_log_dict(data: Dict[str, Any], lazy: bool = False) -> Run:
+    """
+    Build a Run from a decoded log.
+
+    lazy=True keeps the raw step dicts and wraps them in LazyStep (fields are
+    read on access, analysis goes to shared AnalysisColumns) instead of
+    copying every field into a Step. Required fields are checked either way.
+    """
+    try:
+        steps_raw: List[Dict[str, Any]] = data["steps"]
+    except KeyError:
+        raise LogParseError("Log missing 'steps' field")
+
+    started = parse_started(data.get("timestamp_started"))
+    if lazy:
+        steps = _lazy_steps(steps_raw, started)
+    else:
+        steps = [_parse_step(s, started) for s in steps_raw]
+
+    return _parse_run(data, steps)
+
+
+def parse_log_file(path: str, lazy: bool = False, mapped: bool = False) -> Run:
+    """
+    Build a Run from a JSON log file.
+
+    mapped=True memory-maps the file and parses it in place instead of
+    decoding it whole (implies lazy; see parse_mapped).
+    """
+    if mapped:
+        return parse_mapped(path)
     with open(path, "r", encoding="utf-8") as f:
         data = json.load(f)
-    return parse_log_dict(data)
+    return parse_log_dict(data, lazy=lazy)
+
+
+# ---------- memory-mapped mode ----------
+
+# Values up to this many encoded bytes are decoded at parse time; larger
+# ones stay in the mapping as MappedValues.
+MAPPED_INLINE_BYTES = 4096
+# bytes of the mapping decoded to text at a time
+MAPPED_CHUNK_BYTES = 1 << 20
+# steps larger than this are not decoded at all at parse time, only scanned
+MAPPED_WINDOW_BYTES = 16 << 20
+
+_WS = re.compile(r"[ \t\n\r]*")
+_NEXT = re.compile(r"[ \t\n\r]*,[ \t\n\r]*")
+_WS_BYTES = re.compile(rb"[ \t\n\r]*")
+_STRING = re.compile(rb'"[^"\\]*+(?:\\.[^"\\]*+)*+"', re.S)
+_SCALAR = re.compile(rb"-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null")
+# everything up to the next bracket outside a string, in one match
+_TO_BRACKET = re.compile(rb'[^"\[\]{}]*+(?:"[^"\\]*+(?:\\.[^"\\]*+)*+"[^"\[\]{}]*+)*+', re.S)
+
+_OPEN = (ord("{"), ord("["))
+# read straight from the raw dict (LazyStep, derive_timestamp): never mapped
+_ALWAYS_DECODED = frozenset(_REQUIRED_STEP_FIELDS + ("timestamp", "start_ns", "end_ns"))
+
+
+class _MappedScanner:
+    """
+    Byte-level scanner for steps too large to decode: finds the ranges of
+    their values with regexes running over the mapping, without copying.
+    Nested values are not validated here, only when they are decoded.
+    """
+
+    def __init__(self, buf):
+        self.buf = buf
+        self.size = len(buf)
+
+    def error(self, pos: int, what: str) -> LogParseError:
+        return LogParseError(f"Malformed JSON at byte {pos}: {what}")
+
+    def peek(self, pos: int) -> int:
+        pos = _WS_BYTES.match(self.buf, pos).end()
+        if pos >= self.size:
+            raise self.error(pos, "unexpected end of file")
+        return pos
+
+    def expect(self, pos: int, char: str) -> int:
+        pos = self.peek(pos)
+        if self.buf[pos] != ord(char):
+            raise self.error(pos, f"expected {char!r}")
+        return pos + 1
+
+    def skip_value(self, pos: int) -> int:
+        """End of the value starting at `pos`."""
+        buf = self.buf
+        first = buf[pos]
+        if first == 0x22:  # "
+            m = _STRING.match(buf, pos)
+            if m is None:
+                raise self.error(pos, "unterminated string")
+            return m.end()
+        if first in _OPEN:
+            depth = 0
+            while True:
+                pos = _TO_BRACKET.match(buf, pos).end()
+                if pos >= self.size:
+                    raise self.error(pos, "unterminated object or array")
+                depth += 1 if buf[pos] in _OPEN else -1
+                pos += 1
+                if depth == 0:
+                    return pos
+        m = _SCALAR.match(buf, pos)
+        if m is None:
+            raise self.error(pos, "unexpected value")
+        return m.end()
+
+    def object(self, pos: int) -> Tuple[Dict[str, Any], int]:
+        """(members, end) of the object at `pos`; large values stay mapped."""
+        buf = self.buf
+        members: Dict[str, Any] = {}
+        pos = self.expect(pos, "{")
+        if buf[self.peek(pos)] == ord("}"):
+            return members, self.peek(pos) + 1
+        while True:
+            pos = self.peek(pos)
+            m = _STRING.match(buf, pos)
+            if m is None:
+                raise self.error(pos, "expected a key")
+            start = self.peek(self.expect(m.end(), ":"))
+            end = self.skip_value(start)
+            key = loads(m.group())
+            if end - start <= MAPPED_INLINE_BYTES or key in _ALWAYS_DECODED:
+                members[key] = loads(buf[start:end])
+            else:
+                members[key] = MappedValue(buf, start, end)
+            pos = self.peek(end)
+            if buf[pos] == ord("}"):
+                return members, pos + 1
+            pos = self.expect(pos, ",")
+
+
+class _MappedReader:
+    """
+    Parses a mapped log by decoding it to text a chunk at a time (values
+    are decoded with JSONDecoder.raw_decode, in C) while keeping track of
+    where each value sits in the mapping, so steps with large values can be
+    turned into MappedValues. Only the current chunk is held as text.
+    """
+
+    def __init__(self, buf):
+        self.buf = buf
+        self.size = len(buf)
+        self.text = ""
+        self.base = 0  # byte offset of text[0] in the mapping
+        self._read = 0  # bytes of the mapping decoded so far
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._scan = json.JSONDecoder().scan_once
+        # the scanner forgets its key memo after every value; share the key
+        # strings of small steps across the run like json.load does
+        self._keys: Dict[str, str] = {}
+        self._ascii = True  # text[i] is at byte base + i
+        self._mark = (0, 0)  # (char, byte offset) of the last byte_at
+
+    # ---- window ----
+
+    def _fill(self) -> bool:
+        """Decode more of the mapping (doubling the window); False at EOF."""
+        if self._read >= self.size:
+            return False
+        data = self.buf[self._read : self._read + max(MAPPED_CHUNK_BYTES, len(self.text))]
+        self._read += len(data)
+        more = self._utf8.decode(data, final=self._read >= self.size)
+        self.text += more
+        self._ascii = self._ascii and more.isascii()
+        return True
+
+    def _seek(self, offset: int) -> None:
+        """Restart decoding at byte `offset`."""
+        self.text = ""
+        self.base = self._read = offset
+        self._utf8.reset()
+        self._ascii = True
+        self._mark = (0, offset)
+
+    def _drop(self, pos: int) -> int:
+        """Forget text before `pos` once a chunk's worth is consumed."""
+        if pos < MAPPED_CHUNK_BYTES:
+            return pos
+        self.base = self.byte_at(pos)
+        self.text = self.text[pos:]
+        self._ascii = self.text.isascii()
+        self._mark = (0, self.base)
+        return 0
+
+    def byte_at(self, pos: int) -> int:
+        """Byte offset in the mapping of text[pos]."""
+        if self._ascii:
+            return self.base + pos
+        char, offset = self._mark
+        if pos < char:
+            char, offset = 0, self.base
+        offset += len(self.text[char:pos].encode("utf-8"))
+        self._mark = (pos, offset)
+        return offset
+
+    # ---- tokens ----
+
+    def error(self, pos: int, what: str) -> LogParseError:
+        return LogParseError(f"Malformed JSON at byte {self.byte_at(pos)}: {what}")
+
+    def peek(self, pos: int) -> int:
+        """Position of the next non-whitespace character."""
+        while True:
+            pos = _WS.match(self.text, pos).end()
+            if pos < len(self.text):
+                return pos
+            if not self._fill():
+                raise self.error(pos, "unexpected end of file")
+
+    def expect(self, pos: int, char: str) -> int:
+        pos = self.peek(pos)
+        if self.text[pos] != char:
+            raise self.error(pos, f"expected {char!r}")
+        return pos + 1
+
+    def value(self, pos: int, limit: int = 0) -> Tuple[Any, int]:
+        """
+        (value, end) of the value at `pos`, reading on as needed; with a
+        limit, gives up (JSONDecodeError) once that much text is not enough.
+        """
+        while True:
+            try:
+                value, end = self._scan(self.text, pos)
+            except (StopIteration, json.JSONDecodeError) as exc:
+                # most likely cut off by the end of the window: read on
+                if (limit and len(self.text) - pos >= limit) or not self._fill():
+                    if isinstance(exc, StopIteration):  # as JSONDecoder.raw_decode
+                        raise json.JSONDecodeError("Expecting value", self.text, exc.value)
+                    raise
+                continue
+            # a number may continue past the end of the window
+            if end < len(self.text) or not self._fill():
+                return value, end
+
+    # ---- log ----
+
+    def parse(self) -> Tuple[Dict[str, Any], Optional[List[Dict[str, Any]]]]:
+        """(run fields, raw steps or None)."""
+        header: Dict[str, Any] = {}
+        steps: Optional[List[Dict[str, Any]]] = None
+        pos = self.peek(self.expect(0, "{"))
+        while self.text[pos] != "}":
+            key, pos = self.value(self.peek(pos))
+            pos = self.peek(self.expect(pos, ":"))
+            if key == "steps":
+                steps, pos = self._steps(pos)
+            else:
+                header[key], pos = self.value(pos)
+            pos = self.peek(pos)
+            if self.text[pos] != "}":
+                pos = self.peek(self.expect(pos, ","))
+        self._end(pos + 1)
+        return header, steps
+
+    def _end(self, pos: int) -> None:
+        """Only whitespace may follow the log object (as for json.load)."""
+        while True:
+            pos = _WS.match(self.text, pos).end()
+            if pos < len(self.text):
+                raise self.error(pos, "extra data after the log object")
+            if not self._fill():
+                return
+
+    def _steps(self, pos: int) -> Tuple[List[Dict[str, Any]], int]:
+        steps: List[Dict[str, Any]] = []
+        pos = self.peek(self.expect(pos, "["))
+        if self.text[pos] == "]":
+            return steps, pos + 1
+        while True:
+            pos = self._drop(self.peek(pos))
+            if self.text[pos] != "{":
+                raise LogParseError("Malformed log: steps must be objects")
+            try:
+                if self._looks_small(pos):
+                    raw, end = self.value(pos, limit=MAPPED_WINDOW_BYTES)
+                    if self.byte_at(end) - self.byte_at(pos) > MAPPED_INLINE_BYTES:
+                        raw, end = self._mapped_members(pos)
+                    else:
+                        keys = self._keys
+                        raw = {keys.setdefault(k, k): v for k, v in raw.items()}
+                else:
+                    raw, end = self._mapped_members(pos)
+            except json.JSONDecodeError as exc:
+                if len(self.text) - pos < MAPPED_WINDOW_BYTES:
+                    raise self.error(exc.pos, exc.msg)
+                # too big to decode: scan it in the mapping instead
+                raw, offset = _MappedScanner(self.buf).object(self.byte_at(pos))
+                self._seek(offset)
+                end = 0
+            steps.append(raw)
+            m = _NEXT.match(self.text, end)  # the common case: another step
+            if m is not None and m.end() < len(self.text):
+                pos = m.end()
+                continue
+            pos = self.peek(end)
+            if self.text[pos] == "]":
+                return steps, pos + 1
+            pos = self.expect(pos, ",")
+
+    def _looks_small(self, pos: int) -> bool:
+        """
+        Guess whether the step at `pos` is within MAPPED_INLINE_BYTES: the
+        next step's "step_id" shows up that close. Small steps are decoded
+        in one call; others member by member, so their large values are
+        never decoded. A wrong guess only costs time.
+        """
+        text, limit = self.text, pos + MAPPED_INLINE_BYTES
+        own = text.find('"step_id"', pos, limit)
+        return own >= 0 and text.find('"step_id"', own + 9, limit) >= 0
+
+    def _mapped_members(self, pos: int) -> Tuple[Dict[str, Any], int]:
+        """(members, end) of the step at `pos`, large values mapped."""
+        members: Dict[str, Any] = {}
+        pos = self.peek(self.expect(pos, "{"))
+        if self.text[pos] == "}":
+            return members, pos + 1
+        while True:
+            key, pos = self.value(pos)
+            start = self.peek(self.expect(pos, ":"))
+            value, pos = self.value(start, limit=MAPPED_WINDOW_BYTES)
+            first, last = self.byte_at(start), self.byte_at(pos)
+            if last - first > MAPPED_INLINE_BYTES and key not in _ALWAYS_DECODED:
+                value = MappedValue(self.buf, first, last)
+            members[key] = value
+            pos = self.peek(pos)
+            if self.text[pos] == "}":
+                return members, pos + 1
+            pos = self.peek(self.expect(pos, ","))
+
+
+def parse_mapped(path: str) -> Run:
+    """
+    Memory-mapped counterpart of parse_log_file for multi-GB logs.
+
+    The file is mapped read-only and decoded a chunk at a time. Run fields
+    and small step values are kept as decoded; values larger than
+    MAPPED_INLINE_BYTES (typically content and tool results) stay in the
+    mapping as MappedValues and are decoded only when a rule or serializer
+    reads them (again on every read). Steps are LazySteps. The mapping is
+    released once the Run and its steps are garbage.
+
+    Unlike stream_log_file, the whole Run is available at once and fields
+    may appear in any order.
+    """
+    with open(path, "rb") as f:
+        try:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            raise LogParseError("Empty log file")
+    if hasattr(buf, "madvise"):
+        buf.madvise(mmap.MADV_SEQUENTIAL)
+
+    try:
+        header, steps_raw = _MappedReader(buf).parse()
+    except json.JSONDecodeError as exc:
+        raise LogParseError(f"Malformed JSON: {exc}")
+    except UnicodeDecodeError as exc:
+        raise LogParseError(f"Log is not UTF-8: {exc}")
+    if steps_raw is None:
+        raise LogParseError("Log missing 'steps' field")
+
+    started = parse_started(header.get("timestamp_started"))
+    return _parse_run(header, _lazy_steps(steps_raw, started))
+
+
+# ---------- streaming mode ----------
+
+_WHITESPACE = " \t\n\r"
+
+
+class _JSONStream:
+    """
+    Incremental reader over a text file holding one JSON document.
+
+    Values are decoded one at a time with JSONDecoder.raw_decode from a
+    sliding buffer, so only the value being decoded has to fit in memory.
+    """
+
+    def __init__(self, f, chunk_size: int):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        # grow reads with the pending value so huge values decode in O(n)
+        want = max(self._chunk_size, len(self._buf) - self._pos)
+        chunk = self._f.read(want)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ('' at end of file)."""
+        while True:
+            buf, pos = self._buf, self._pos
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, ch: str) -> None:
+        got = self.peek()
+        if got != ch:
+            raise LogParseError(f"Malformed log: expected {ch!r}, found {got or 'EOF'!r}")
+        self._pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                val, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as exc:
+                if self._fill():
+                    continue
+                raise LogParseError(f"Malformed log: {exc}") from exc
+            # a number at the very end of the buffer may continue in the next chunk
+            if end == len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return val
+
+    def key(self) -> str:
+        k = self.value()
+        if not isinstance(k, str):
+            raise LogParseError("Malformed log: object keys must be strings")
+        self.expect(":")
+        return k
+
+
+def _read_members(stream: _JSONStream, into: Dict[str, Any], stop_at: str) -> bool:
+    """
+    Read `"key": value` members of the top-level object into `into` until
+    `stop_at` is reached (returns True, stream positioned at its value)
+    or the object closes (returns False).
+    """
+    while True:
+        ch = stream.peek()
+        if ch == "}":
+            stream.expect("}")
+            return False
+        if ch == ",":
+            stream.expect(",")
+            continue
+        key = stream.key()
+        if key == stop_at:
+            return True
+        into[key] = stream.value()
+
+
+def stream_log_file(path: str, chunk_size: int = 1 << 20) -> Tuple[Run, Iterator[Step]]:
+    """
+    Streaming counterpart of parse_log_file for very large logs.
+
+    Returns (run, steps):
+    - run: the run header; run.steps stays empty
+    - steps: iterator yielding Step objects as the "steps" array is read
+
+    Memory stays flat in the number of steps as long as the consumer does
+    not keep them (e.g. risk_scorer.score_risks_stream). Run fields must
+    appear before "steps" in the file (MRILogger always writes them first);
+    fields after the array, such as a late timestamp_finished, are applied to
+    `run` once the iterator is exhausted.
+
+    The file stays open until the iterator is exhausted or closed.
+    """
+    f = open(path, "r", encoding="utf-8")
+    try:
+        stream = _JSONStream(f, chunk_size)
+        header: Dict[str, Any] = {}
+        stream.expect("{")
+        if not _read_members(stream, header, stop_at="steps"):
+            raise LogParseError("Log missing 'steps' field")
+        run = _parse_run(header, [])
+        started = parse_started(run.timestamp_started)
+    except BaseException:
+        f.close()
+        raise
+
+    def steps() -> Iterator[Step]:
+        try:
+            stream.expect("[")
+            while True:
+                ch = stream.peek()
+                if ch == "]":
+                    stream.expect("]")
+                    break
+                if ch == ",":
+                    stream.expect(",")
+                    continue
+                raw = stream.value()
+                if not isinstance(raw, dict):
+                    raise LogParseError("Malformed log: steps must be objects")
+                yield _parse_step(raw, started)
+
+            trailer: Dict[str, Any] = {}
+            _read_members(stream, trailer, stop_at="")
+            if "timestamp_finished" in trailer:
+                run.timestamp_finished = trailer["timestamp_finished"]
+            if "metadata" in trailer and not header.get("metadata"):
+                run.metadata = trailer["metadata"]
+        finally:
+            f.close()
+
+    return run, steps()
+
+
+# ---------- JSONL (MRILogger streaming mode) ----------
+
+
+def jsonl_segments(path: str) -> List[str]:
+    """path, path.1, path.2, ... for as long as the segments exist."""
+    segments = [path]
+    index = 1
+    while os.path.exists(f"{path}.{index}"):
+        segments.append(f"{path}.{index}")
+        index += 1
+    return segments
+
+
+def iter_jsonl_records(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Records of a (possibly rotated) JSONL log, in order.
+
+    A torn last line (the writer crashed mid-record) is ignored; a bad line
+    anywhere else is an error.
+    """
+    bad_line: Optional[str] = None
+    for segment in jsonl_segments(path):
+        with open(segment, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                if bad_line is not None:
+                    raise LogParseError(f"Malformed JSONL record: {bad_line[:80]!r}")
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    bad_line = line
+                    continue
+                if not isinstance(record, dict) or "record" not in record:
+                    raise LogParseError(f"Malformed JSONL record: {line[:80]!r}")
+                yield record
+
+
+def _apply_finish(run: Run, record: Dict[str, Any]) -> None:
+    run.timestamp_finished = record.get("timestamp_finished")
+    if record.get("metadata") is not None:
+        run.metadata = record["metadata"]
+
+
+def stream_jsonl_file(path: str) -> Tuple[Run, Iterator[Step]]:
+    """
+    Like stream_log_file, for JSONL logs written by MRILogger(jsonl_path=...).
+
+    The "finish" record (timestamp_finished, final metadata) is applied to
+    `run` once the iterator is exhausted; without one (crashed or still
+    running), timestamp_finished stays None.
+    """
+    records = iter_jsonl_records(path)
+    first = next(records, None)
+    if first is None or first["record"] != "run":
+        raise LogParseError("JSONL log must start with a 'run' record")
+    header = {k: v for k, v in first.items() if k != "record"}
+    run = _parse_run(header, [])
+    started = parse_started(run.timestamp_started)
+
+    def steps() -> Iterator[Step]:
+        for record in records:
+            kind = record.pop("record")
+            if kind == "step":
+                yield _parse_step(record, started)
+            elif kind == "finish":
+                _apply_finish(run, record)
+            else:
+                raise LogParseError(f"Unknown JSONL record type: {kind!r}")
+
+    return run, steps()
+
+
+def parse_jsonl_file(path: str, lazy: bool = False) -> Run:
+    """Whole Run (steps included) from a JSONL log; see stream_jsonl_file."""
+    if not lazy:
+        run, steps = stream_jsonl_file(path)
+        run.steps = list(steps)
+        return run
+
+    data: Dict[str, Any] = {}
+    raw_steps: List[Dict[str, Any]] = []
+    for record in iter_jsonl_records(path):
+        kind = record.pop("record")
+        if kind == "run":
+            data = record
+        elif kind == "step":
+            raw_steps.append(record)
+        elif kind == "finish":
+            data["timestamp_finished"] = record.get("timestamp_finished")
+            if record.get("metadata") is not None:
+                data["metadata"] = record["metadata"]
+    if not data:
+        raise LogParseError("JSONL log must start with a 'run' record")
+    data["steps"] = raw_steps
+    return parse_log_dict(data, lazy=True)
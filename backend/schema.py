@@ -1,22 +1,27 @@
 # backend/schema.py
 
+from array import array
 from dataclasses import dataclass, field
+from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional
 
+from .serialization import loads
 
-@dataclass
+
+@dataclass(slots=True)
 class StepAnalysis:
     risk_score: float = 0.0
     failure_tags: List[str] = field(default_factory=list)
     notes: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class Step:
     step_id: int
     type: str
     role: str
-    timestamp: str
+    # None if the step has neither a timestamp nor span offsets
+    timestamp: Optional[str]
     content: Optional[str] = None
     state: Optional[Dict[str, Any]] = None
     # tool fields
@@ -29,11 +34,38 @@ class Step:
     operation: Optional[str] = None
     key: Optional[str] = None
     value: Any = None
+    # span: monotonic ns since run start (MRILogger >= schema 1.1)
+    start_ns: Optional[int] = None
+    end_ns: Optional[int] = None
+    # e.g. {"llm": {"model", "latency_ms", "prompt_tokens", "output_tokens"}}
+    metadata: Optional[Dict[str, Any]] = None
     # analysis
     analysis: StepAnalysis = field(default_factory=StepAnalysis)
 
 
-@dataclass
+def parse_started(timestamp_started: Any) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(str(timestamp_started))
+    except ValueError:
+        return None
+
+
+def derive_timestamp(raw: Dict[str, Any], started: Optional[datetime]) -> Optional[str]:
+    """
+    Wall-clock time of a step: its own "timestamp" if present, otherwise
+    run start + end_ns (or start_ns). MRILogger only stamps the run start
+    with an ISO time; steps carry monotonic offsets.
+    """
+    timestamp = raw.get("timestamp")
+    if timestamp is not None:
+        return str(timestamp)
+    offset = raw.get("end_ns", raw.get("start_ns"))
+    if offset is None or started is None:
+        return None
+    return (started + timedelta(microseconds=int(offset) // 1000)).isoformat()
+
+
+@dataclass(slots=True)
 class Run:
     schema_version: str
     run_id: str
@@ -43,3 +75,241 @@ class Run:
     user_query: str
     metadata: Dict[str, Any]
     steps: List[Step]
+
+
+# ---------- lazy, memory-compact representation ----------
+#
+# For very large runs, parse_log_dict(data, lazy=True) wraps each raw step
+# dict in a LazyStep instead of copying its 15 fields into a Step. Fields are
+# read from the dict on access, and analysis results live in AnalysisColumns
+# side arrays (one float + one tag bitmask per step, notes only for flagged
+# steps) instead of one StepAnalysis object and tag list per step. Tags a
+# bitmask cannot give back as flagged (out of TAG_CODES order, or past its
+# 64 bits) are kept as a list for that step instead.
+
+
+class TagCodes:
+    """Process-wide tag name <-> bit mapping for compact tag bitmasks."""
+
+    MAX_TAGS = 64  # masks are stored as unsigned 64-bit integers
+
+    def __init__(self) -> None:
+        self._bits: Dict[str, int] = {}
+        self._names: List[str] = []
+
+    def bit(self, tag: str) -> Optional[int]:
+        """Bit of `tag`, assigned on first use; None once all bits are taken."""
+        bit = self._bits.get(tag)
+        if bit is None:
+            if len(self._names) >= self.MAX_TAGS:
+                return None
+            bit = len(self._names)
+            self._bits[tag] = bit
+            self._names.append(tag)
+        return bit
+
+    def mask(self, tags: List[str]) -> int:
+        m = 0
+        for tag in tags:
+            bit = self.bit(tag)
+            if bit is None:
+                raise ValueError(f"More than {self.MAX_TAGS} distinct failure tags")
+            m |= 1 << bit
+        return m
+
+    def ordered_mask(self, tags: List[str]) -> Optional[int]:
+        """
+        Mask that `names` turns back into exactly `tags`, in the same order;
+        None if there is none (tags out of bit order, repeated, or past
+        MAX_TAGS).
+        """
+        m = 0
+        last = -1
+        for tag in tags:
+            bit = self.bit(tag)
+            if bit is None or bit <= last:
+                return None
+            m |= 1 << bit
+            last = bit
+        return m
+
+    def names(self, mask: int) -> List[str]:
+        return [name for bit, name in enumerate(self._names) if mask >> bit & 1]
+
+    @property
+    def all_names(self) -> List[str]:
+        return list(self._names)
+
+
+TAG_CODES = TagCodes()
+
+
+class AnalysisColumns:
+    """Analysis results for a whole run, stored column-wise."""
+
+    __slots__ = ("risk_scores", "tag_masks", "tag_lists", "notes", "run_started")
+
+    def __init__(self, size: int = 0, run_started: Optional[datetime] = None):
+        self.risk_scores = array("d", bytes(8 * size))
+        self.tag_masks = array("Q", bytes(8 * size))
+        # sparse: steps whose tags no mask can hold in flag order
+        self.tag_lists: Dict[int, List[str]] = {}
+        self.notes: Dict[int, str] = {}  # sparse: only steps with notes
+        # run start, for steps that carry span offsets instead of a timestamp
+        self.run_started = run_started
+
+    def __len__(self) -> int:
+        return len(self.risk_scores)
+
+    def append(self) -> int:
+        self.risk_scores.append(0.0)
+        self.tag_masks.append(0)
+        return len(self.risk_scores) - 1
+
+
+class AnalysisView:
+    """StepAnalysis-compatible accessor for one row of AnalysisColumns."""
+
+    __slots__ = ("_columns", "_index")
+
+    def __init__(self, columns: AnalysisColumns, index: int):
+        self._columns = columns
+        self._index = index
+
+    @property
+    def risk_score(self) -> float:
+        return self._columns.risk_scores[self._index]
+
+    @risk_score.setter
+    def risk_score(self, value: float) -> None:
+        self._columns.risk_scores[self._index] = value
+
+    @property
+    def failure_tags(self) -> List[str]:
+        # in flag order, like StepAnalysis
+        tags = self._columns.tag_lists.get(self._index)
+        if tags is not None:
+            return list(tags)
+        return TAG_CODES.names(self._columns.tag_masks[self._index])
+
+    @failure_tags.setter
+    def failure_tags(self, tags: List[str]) -> None:
+        columns, index = self._columns, self._index
+        mask = TAG_CODES.ordered_mask(tags)
+        if mask is None:
+            columns.tag_masks[index] = 0
+            columns.tag_lists[index] = list(tags)
+        else:
+            columns.tag_masks[index] = mask
+            columns.tag_lists.pop(index, None)
+
+    @property
+    def notes(self) -> str:
+        return self._columns.notes.get(self._index, "")
+
+    @notes.setter
+    def notes(self, value: str) -> None:
+        if value:
+            self._columns.notes[self._index] = value
+        else:
+            self._columns.notes.pop(self._index, None)
+
+
+class MappedValue:
+    """
+    JSON value left undecoded in a memory-mapped log (parser, mapped=True):
+    a byte range of the mapping, decoded on every access and never kept,
+    so large contents / results cost no heap until something reads them.
+    """
+
+    __slots__ = ("buf", "start", "end")
+
+    def __init__(self, buf: Any, start: int, end: int):
+        self.buf = buf
+        self.start = start
+        self.end = end
+
+    def __len__(self) -> int:
+        return self.end - self.start  # encoded bytes
+
+    def decode(self) -> Any:
+        return loads(self.buf[self.start : self.end])
+
+    def __repr__(self) -> str:
+        return f"MappedValue({self.start}:{self.end})"
+
+
+def _raw_field(name: str) -> property:
+    def get(self):
+        value = self._raw.get(name)
+        if type(value) is MappedValue:
+            return value.decode()
+        return value
+
+    return property(get)
+
+
+class LazyStep:
+    """
+    Read-only Step look-alike over a raw step dict.
+
+    Nothing is copied at parse time; each field is looked up (and, for the
+    required ones, converted) when a rule or serializer asks for it.
+    Fields that are MappedValues are decoded on each access.
+    """
+
+    __slots__ = ("_raw", "_index", "_columns")
+
+    def __init__(self, raw: Dict[str, Any], index: int, columns: AnalysisColumns):
+        self._raw = raw
+        self._index = index
+        self._columns = columns
+
+    step_id = property(lambda self: int(self._raw["step_id"]))
+    type = property(lambda self: str(self._raw["type"]))
+    role = property(lambda self: str(self._raw["role"]))
+    timestamp = property(lambda self: derive_timestamp(self._raw, self._columns.run_started))
+    content = _raw_field("content")
+    state = _raw_field("state")
+    tool_name = _raw_field("tool_name")
+    call_id = _raw_field("call_id")
+    arguments = _raw_field("arguments")
+    result = _raw_field("result")
+    error = _raw_field("error")
+    operation = _raw_field("operation")
+    key = _raw_field("key")
+    value = _raw_field("value")
+    start_ns = _raw_field("start_ns")
+    end_ns = _raw_field("end_ns")
+    metadata = _raw_field("metadata")
+
+    @property
+    def analysis(self) -> AnalysisView:
+        return AnalysisView(self._columns, self._index)
+
+    def materialize(self) -> Step:
+        """Eager Step copy (analysis included)."""
+        view = self.analysis
+        return Step(
+            step_id=self.step_id,
+            type=self.type,
+            role=self.role,
+            timestamp=self.timestamp,
+            content=self.content,
+            state=self.state,
+            tool_name=self.tool_name,
+            call_id=self.call_id,
+            arguments=self.arguments,
+            result=self.result,
+            error=self.error,
+            operation=self.operation,
+            key=self.key,
+            value=self.value,
+            start_ns=self.start_ns,
+            end_ns=self.end_ns,
+            metadata=self.metadata,
+            analysis=StepAnalysis(view.risk_score, view.failure_tags, view.notes),
+        )
+
+    def __repr__(self) -> str:
+        return f"LazyStep(step_id={self._raw.get('step_id')!r}, type={self._raw.get('type')!r})"
@@ -0,0 +1,39 @@
+# backend/serialization.py
+
+"""
+JSON encoding for API responses, cache entries and cache keys.
+
+Uses orjson when it is installed (several times faster than the stdlib
+encoder on large step lists) and falls back to `json` otherwise. Both
+produce compact UTF-8 bytes.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, option=option)
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits: let the stdlib try
+    return json.dumps(
+        obj, sort_keys=sort_keys, separators=(",", ":"), ensure_ascii=False
+    ).encode("utf-8")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
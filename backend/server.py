@@ -1,13 +1,81 @@
 # backend/server.py
 
-from typing import Any, Dict, List
+import queue
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from backend.api import analyze_log
+from backend.api import (
+    _to_timeline_step,
+    analysis_cache_stats,
+    analyze_log,
+    analyze_log_json,
+    analyze_logs,
+    configure_analysis_cache,
+    configure_batch_pool,
+    configure_result_store,
+    configure_run_store,
+    get_step_result,
+    persist_runs,
+    project_analysis,
+    result_store,
+    run_store,
+)
+from backend.metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    configure_metrics,
+    observe_stage,
+    profile,
+    render as render_metrics,
+    server_timing,
+    stage,
+)
+from backend.parser import parse_log_dict, parse_steps
+from backend.serialization import dumps
+from backend.store import MAX_LIMIT, ORDERS, SEARCH_FIELDS, RunRecord
+from backend.views import VIEWS, project_steps, resolve_fields
+from backend.analysis.incremental import IncrementalScorer
+from backend.analysis.latency import configure_latency_history
+from backend.analysis.overall_risk import overall_risk
+from backend.analysis.report import configure_report, generate_report, iter_report
+from backend.analysis.risk_scorer import (
+    configure_feature_cache,
+    feature_cache_stats,
+    ruleset_version,
+    score_risks,
+)
 from agent import run_chaos_intern_task, get_critic_advice
+from config import (
+    ANALYZE_CACHE_DIR,
+    ANALYZE_CACHE_DISK_MAX_BYTES,
+    ANALYZE_CACHE_ENABLED,
+    ANALYZE_CACHE_MAX_BYTES,
+    ANALYZE_CACHE_MAX_ENTRIES,
+    ANALYZE_CHUNKSIZE,
+    ANALYZE_WORKERS,
+    FEATURE_CACHE_MAX_CHARS,
+    FEATURE_CACHE_MAX_ENTRIES,
+    GZIP_LEVEL,
+    GZIP_MIN_SIZE,
+    LATENCY_HISTORY_WINDOW,
+    LATENCY_MIN_SAMPLES,
+    LATENCY_SLOW_PERCENTILE,
+    METRICS_RULE_TIMING,
+    REPORT_MAX_STEPS,
+    REPORT_MAX_STEPS_PER_TAG,
+    REPORT_STEP_MAX_CHARS,
+    RESULT_INLINE_MAX_BYTES,
+    RESULT_STORE_DIR,
+    RESULT_STORE_MAX_BYTES,
+    RUN_STORE_PATH,
+    RUN_STORE_SEARCH,
+)
 
 
 # -------------------------------------------------------------------
@@ -36,8 +104,53 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
+)
+
+# Compress large JSON payloads for clients that accept gzip
+# (text/event-stream responses are left alone)
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE, compresslevel=GZIP_LEVEL)
+
+
+configure_analysis_cache(
+    enabled=ANALYZE_CACHE_ENABLED,
+    max_entries=ANALYZE_CACHE_MAX_ENTRIES,
+    max_bytes=ANALYZE_CACHE_MAX_BYTES,
+    cache_dir=ANALYZE_CACHE_DIR,
+    disk_max_bytes=ANALYZE_CACHE_DISK_MAX_BYTES,
+)
+configure_batch_pool(ANALYZE_WORKERS or None)
+configure_result_store(max_bytes=RESULT_STORE_MAX_BYTES, cache_dir=RESULT_STORE_DIR)
+configure_run_store(RUN_STORE_PATH, search=RUN_STORE_SEARCH)
+configure_latency_history(
+    window=LATENCY_HISTORY_WINDOW,
+    min_samples=LATENCY_MIN_SAMPLES,
+    percentile=LATENCY_SLOW_PERCENTILE,
+)
+configure_metrics(rule_timing=METRICS_RULE_TIMING)
+configure_feature_cache(max_entries=FEATURE_CACHE_MAX_ENTRIES, max_chars=FEATURE_CACHE_MAX_CHARS)
+configure_report(
+    max_step_chars=REPORT_STEP_MAX_CHARS,
+    max_steps=REPORT_MAX_STEPS,
+    max_per_tag=REPORT_MAX_STEPS_PER_TAG,
 )
 
+# Send "X-MRI-Profile: 1" to get a Server-Timing header with the
+# per-stage breakdown of that request (streaming responses excluded)
+PROFILE_HEADER = "X-MRI-Profile"
+
+
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    if request.headers.get(PROFILE_HEADER, "").lower() not in ("1", "true", "yes"):
+        return await call_next(request)
+    with profile() as entries:
+        start = time.perf_counter()
+        response = await call_next(request)
+        entries.append(("total", time.perf_counter() - start))
+    response.headers["Server-Timing"] = server_timing(entries)
+    return response
+
 
 # -------------------------------------------------------------------
 # Models
@@ -64,14 +177,44 @@ class AnalyzeResponse(BaseModel):
     report_markdown: str
 
 
+class AnalyzeBatchRequest(BaseModel):
+    """
+    Request schema for the /analyze_batch endpoint.
+
+    - logs: list of run logs (same format as AnalyzeRequest.log)
+    - workers / chunksize: optional overrides of the server defaults;
+      workers is capped at the server's pool size (ANALYZE_WORKERS)
+    """
+    logs: List[Dict[str, Any]]
+    workers: Optional[int] = None
+    chunksize: Optional[int] = None
+
+
+class AnalyzeBatchItem(BaseModel):
+    """
+    One entry per input log, in input order.
+    Bad logs come back with ok=False and an error message.
+    """
+    index: int
+    ok: bool
+    result: Optional[AnalyzeResponse] = None
+    error: Optional[str] = None
+
+
+class AnalyzeBatchResponse(BaseModel):
+    results: List[AnalyzeBatchItem]
+
+
 class RunInternRequest(BaseModel):
     """
     Request for /run_intern:
     - query: user task
     - mode: chaos mode for the intern
+    - fresh_critic: skip the cached critique and ask the critic again
     """
     query: str
     mode: str = "default"  # "default", "hallucination", "tool_misuse", "memory_loss"
+    fresh_critic: bool = False  # bypass the critic response cache
 
 
 class MRIRisk(BaseModel):
@@ -104,41 +247,12 @@ class InternRunResponse(BaseModel):
 # Risk scoring (same as in Gradio app)
 # -------------------------------------------------------------------
 
-TAG_WEIGHTS: Dict[str, float] = {
-    "hallucination_risk": 0.9,
-    "tool_misuse": 0.8,
-    "memory_drift": 0.7,
-    "speculative_metrics": 0.6,
-    "overconfident_no_citation": 0.9,
-    "tool_error": 0.9,
-    "weak_grounding": 0.6,
-    "apology": 0.2,
-}
-
-
 def compute_overall_risk(summary: Dict[str, Any]) -> MRIRisk:
     """
     Very simple overall risk score in [0, 100].
+    See backend.analysis.overall_risk for the formula and TAG_WEIGHTS.
     """
-    total_steps = summary.get("total_steps", 1) or 1
-    by_type = summary.get("by_failure_type", {}) or {}
-
-    weighted = 0.0
-    for tag, count in by_type.items():
-        w = TAG_WEIGHTS.get(tag, 0.3)
-        weighted += w * float(count)
-
-    raw = weighted / float(total_steps)
-    raw = max(0.0, min(1.0, raw))
-    score = int(round(raw * 100))
-
-    if score < 30:
-        level = "Low"
-    elif score < 70:
-        level = "Medium"
-    else:
-        level = "High"
-
+    score, level = overall_risk(summary)
     return MRIRisk(score=score, level=level)
 
 
@@ -146,17 +260,277 @@ def compute_overall_risk(summary: Dict[str, Any]) -> MRIRisk:
 # Endpoints
 # -------------------------------------------------------------------
 
+def _json_response(payload: Any) -> Response:
+    """
+    Pre-serialized JSON response.
+
+    Returning a Response skips FastAPI's response_model validation and
+    jsonable_encoder pass over every step; the response_model on each
+    route still documents the shape in OpenAPI.
+    """
+    if not isinstance(payload, bytes):
+        with stage("serialize"):
+            payload = dumps(payload)
+    return Response(content=payload, media_type="application/json")
+
+
+def _observe_intern_spans(log: Dict[str, Any]) -> None:
+    """
+    Record the intern's own LLM / tool calls as stages, from the spans in
+    its log: intern_llm.<planning|post_tool_reasoning|final_answer> and
+    intern_tool.<tool_name>. Spans include any wait for the rate limiter.
+    """
+    for step in log.get("steps") or []:
+        start_ns, end_ns = step.get("start_ns"), step.get("end_ns")
+        if start_ns is None or end_ns is None:
+            continue
+        if (step.get("metadata") or {}).get("llm") is not None:
+            name = (step.get("state") or {}).get("stage") or step.get("type")
+            observe_stage(f"intern_llm.{name}", (end_ns - start_ns) / 1e9)
+        elif step.get("type") == "tool_result":
+            observe_stage(f"intern_tool.{step.get('tool_name')}", (end_ns - start_ns) / 1e9)
+
+
+_VIEW_QUERY = Query(
+    "full", description=f"Step projection: one of {list(VIEWS)}; ignored when `fields` is set"
+)
+_FIELDS_QUERY = Query(
+    None, description="Comma-separated step fields, e.g. step_id,type,text,tags"
+)
+_MAX_RESULT_QUERY = Query(
+    RESULT_INLINE_MAX_BYTES,
+    ge=0,
+    description="Truncate tool results above this many bytes (0 = never); "
+    "the full value is linked from result_ref",
+)
+
+
+def _step_fields(view: str, fields: Optional[str]) -> Tuple[str, ...]:
+    try:
+        return resolve_fields(view, fields)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
 @app.post("/analyze", response_model=AnalyzeResponse)
-def analyze(req: AnalyzeRequest) -> Dict[str, Any]:
+def analyze(
+    req: AnalyzeRequest,
+    view: str = _VIEW_QUERY,
+    fields: Optional[str] = _FIELDS_QUERY,
+    max_result_bytes: int = _MAX_RESULT_QUERY,
+) -> Response:
     """
     Analyze a single agent run log with Agent MRI.
     """
-    result = analyze_log(req.log)
-    return result
+    step_fields = _step_fields(view, fields)
+    return _json_response(
+        analyze_log_json(req.log, fields=step_fields, max_result_bytes=max_result_bytes)
+    )
+
+
+@app.post("/analyze_batch", response_model=AnalyzeBatchResponse)
+def analyze_batch(req: AnalyzeBatchRequest) -> Response:
+    """
+    Analyze many run logs in one request, spread across worker processes.
+    """
+    results = analyze_logs(
+        req.logs,
+        max_workers=req.workers,
+        chunksize=req.chunksize or ANALYZE_CHUNKSIZE,
+    )
+    return _json_response({"results": results})
+
+
+@app.post("/report")
+def report(
+    req: AnalyzeRequest,
+    max_step_chars: Optional[int] = Query(None, ge=0, description="cut step content after this many chars (0: never)"),
+    max_steps: Optional[int] = Query(None, ge=0, description="flagged steps listed (0: all)"),
+    max_per_tag: Optional[int] = Query(None, ge=0, description="flagged steps listed per tag (0: all)"),
+    page: Optional[int] = Query(None, ge=1, description="list only this page of flagged steps"),
+    page_size: int = Query(100, ge=1, le=1000),
+) -> StreamingResponse:
+    """
+    Incident report of one run log as markdown, streamed while it is
+    rendered. Limits left out use the server defaults (REPORT_* config).
+    """
+    with stage("parse"):
+        run = parse_log_dict(req.log)
+    with stage("score"):
+        steps, summary = score_risks(run)
+    limits = {
+        name: value or None
+        for name, value in (
+            ("max_step_chars", max_step_chars),
+            ("max_steps", max_steps),
+            ("max_per_tag", max_per_tag),
+        )
+        if value is not None
+    }
+    chunks = iter_report(run, steps, summary, page=page, page_size=page_size, **limits)
+    return StreamingResponse(
+        (chunk.encode("utf-8") for chunk in chunks),
+        media_type="text/markdown; charset=utf-8",
+    )
+
+
+@app.get("/cache/stats")
+def cache_stats() -> Dict[str, Any]:
+    """
+    Hit/miss counters of the analysis result cache (and, under "features",
+    of the per-text rule feature cache).
+    """
+    return {**analysis_cache_stats(), "features": feature_cache_stats()}
+
+
+@app.get("/metrics")
+def metrics() -> Response:
+    """
+    Prometheus text metrics: stage latency histograms and per-rule
+    call counts / time.
+    """
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
+def _run_store():
+    store = run_store()
+    if store is None:
+        raise HTTPException(status_code=503, detail="Run store is disabled (RUN_STORE_PATH)")
+    return store
+
+
+@app.get("/runs")
+def list_runs(
+    agent: Optional[str] = None,
+    tag: List[str] = Query(default=[], description="Failure tag; repeat to require several."),
+    level: Optional[str] = Query(default=None, description="Low, Medium or High."),
+    min_risk: Optional[int] = Query(default=None, ge=0, le=100),
+    max_risk: Optional[int] = Query(default=None, ge=0, le=100),
+    since: Optional[str] = Query(default=None, description="ISO timestamp; runs started at or after."),
+    until: Optional[str] = Query(default=None, description="ISO timestamp; runs started before."),
+    order: str = Query(default="started", description=f"One of: {', '.join(ORDERS)}."),
+    limit: int = Query(default=50, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = Query(default=None, description="next_cursor of the previous page."),
+) -> Response:
+    """
+    Previously analyzed runs matching every given filter, newest (or
+    riskiest) first, served from the run store without re-scoring:
+
+        GET /runs?agent=chaos_intern&tag=tool_misuse&level=High&since=2025-06-01T00:00:00Z
+
+    Pass `next_cursor` back as `cursor` for the next page.
+    """
+    try:
+        page = _run_store().query(
+            agent=agent,
+            tags=tag,
+            level=level,
+            min_risk=min_risk,
+            max_risk=max_risk,
+            since=since,
+            until=until,
+            order=order,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return _json_response(page)
+
+
+@app.get("/runs/tags")
+def run_tag_counts(agent: Optional[str] = None) -> Dict[str, int]:
+    """
+    Number of stored runs with each failure tag.
+    """
+    return _run_store().tag_counts(agent)
+
+
+@app.get("/runs/{run_id}")
+def get_run(run_id: str) -> Response:
+    """
+    One stored run: summary, risk and the tags of its flagged steps.
+    """
+    run = _run_store().get(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Run not found in the run store")
+    return _json_response(run)
+
+
+@app.get("/search")
+def search_steps(
+    q: str = Query(..., min_length=1, description="Text to look for."),
+    mode: str = Query(
+        default="words",
+        description=(
+            "words: all words; phrase: q as one exact phrase; "
+            "fts: SQLite FTS5 query syntax (\"a b\" OR c*, NEAR(...))."
+        ),
+    ),
+    field: List[str] = Query(
+        default=[], description=f"Limit to some of: {', '.join(SEARCH_FIELDS)}."
+    ),
+    agent: Optional[str] = None,
+    tag: List[str] = Query(default=[], description="Failure tag the step must have."),
+    tool: Optional[str] = Query(default=None, description="tool_name of the step."),
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = None,
+) -> Response:
+    """
+    Full-text search over the content, tool arguments and tool results of
+    every step in the run store; step-level hits with a snippet, most
+    recently analyzed first:
+
+        GET /search?q=according to the 2027 Global Council&mode=phrase
+        GET /search?q=site:example.com&mode=phrase&field=arguments&tool=web_search
+    """
+    store = _run_store()
+    if not store.searchable:
+        raise HTTPException(
+            status_code=503, detail="Search is disabled (RUN_STORE_SEARCH or no SQLite FTS5)"
+        )
+    try:
+        page = store.search(
+            q,
+            mode=mode,
+            fields=field or SEARCH_FIELDS,
+            agent=agent,
+            tags=tag,
+            tool=tool,
+            since=since,
+            until=until,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return _json_response(page)
+
+
+@app.get("/runs/{run_id}/steps/{step_id}/result")
+def step_result(run_id: str, step_id: int, digest: str) -> Response:
+    """
+    Full value of a tool result that was truncated in an earlier response
+    (the `result_ref.href` of that step).
+    """
+    payload = get_step_result(run_id, step_id, digest)
+    if payload is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Result not found (expired from the result store; re-run the analysis)",
+        )
+    return _json_response(payload)
 
 
 @app.post("/run_intern", response_model=InternRunResponse)
-def run_intern(req: RunInternRequest) -> Dict[str, Any]:
+def run_intern(
+    req: RunInternRequest,
+    view: str = _VIEW_QUERY,
+    fields: Optional[str] = _FIELDS_QUERY,
+    max_result_bytes: int = _MAX_RESULT_QUERY,
+) -> Response:
     """
     Full pipeline endpoint used by the frontend.
 
@@ -165,13 +539,17 @@ def run_intern(req: RunInternRequest) -> Dict[str, Any]:
     3) Compute an overall risk score.
     4) Generate Senior Manager feedback.
     """
+    step_fields = _step_fields(view, fields)
+
     # 1) Run Chaos Intern
-    intern_result = run_chaos_intern_task(req.query, mode=req.mode)
+    with stage("intern"):
+        intern_result = run_chaos_intern_task(req.query, mode=req.mode)
     final_answer = intern_result["final_answer"]
     log = intern_result["log"]
+    _observe_intern_spans(log)
 
     # 2) Analyze log
-    analysis = analyze_log(log)
+    analysis = project_analysis(analyze_log(log), log.get("run_id"), step_fields, max_result_bytes)
     summary = analysis["summary"]
     steps = analysis.get("steps", [])
     report_md = analysis["report_markdown"]
@@ -180,13 +558,119 @@ def run_intern(req: RunInternRequest) -> Dict[str, Any]:
     risk = compute_overall_risk(summary)
 
     # 4) Critic feedback
-    critic_text = get_critic_advice(summary, report_md)
-
-    return {
-        "final_answer_md": final_answer,
-        "summary": summary,
-        "risk": risk.dict(),
-        "timeline_steps": steps,
-        "report_markdown": report_md,
-        "critic_markdown": critic_text,
-    }
+    with stage("critic"):
+        critic_text = get_critic_advice(summary, report_md, use_cache=not req.fresh_critic)
+
+    return _json_response(
+        {
+            "final_answer_md": final_answer,
+            "summary": summary,
+            "risk": risk.dict(),
+            "timeline_steps": steps,
+            "report_markdown": report_md,
+            "critic_markdown": critic_text,
+        }
+    )
+
+
+def _sse(event: str, data: Any) -> str:
+    """One Server-Sent Events message."""
+    return f"event: {event}\ndata: {dumps(data).decode('utf-8')}\n\n"
+
+
+@app.post("/run_intern/stream")
+def run_intern_stream(
+    req: RunInternRequest,
+    view: str = _VIEW_QUERY,
+    fields: Optional[str] = _FIELDS_QUERY,
+    max_result_bytes: int = _MAX_RESULT_QUERY,
+) -> StreamingResponse:
+    """
+    Streaming variant of /run_intern (text/event-stream).
+
+    Events, in order:
+    - step     : one timeline step (same shape as timeline_steps[i]),
+                 sent once its tags are final: most steps as soon as the
+                 intern logs them, a tool call together with its result
+                 (or at the end if it never gets one), the final answer
+                 at the end
+    - summary  : {final_answer_md, summary, risk, report_markdown}
+    - critic   : {critic_markdown}, once the critic has answered
+    - done     : {}
+    - error    : {detail} if the intern fails
+    """
+    step_fields = _step_fields(view, fields)
+    events: "queue.Queue" = queue.Queue()
+
+    def on_step(step: Dict[str, Any], log: Dict[str, Any]) -> None:
+        events.put(("step", step, log))
+
+    def run_intern_in_background() -> None:
+        try:
+            with stage("intern"):
+                result = run_chaos_intern_task(req.query, mode=req.mode, on_step=on_step)
+            _observe_intern_spans(result["log"])
+            events.put(("done", result, None))
+        except Exception as exc:
+            events.put(("error", exc, None))
+
+    threading.Thread(target=run_intern_in_background, daemon=True).start()
+
+    def step_events(scorer: IncrementalScorer, run_finished: bool = False) -> Iterator[str]:
+        # only steps whose tags can no longer change (see take_final)
+        for step in scorer.take_final(run_finished):
+            projected = project_steps(
+                [_to_timeline_step(step)],
+                step_fields,
+                scorer.run.run_id,
+                max_result_bytes,
+                result_store(),
+            )
+            yield _sse("step", projected[0])
+
+    def stream() -> Iterator[str]:
+        scorer: Optional[IncrementalScorer] = None
+        while True:
+            kind, payload, log = events.get()
+            if kind == "error":
+                yield _sse("error", {"detail": f"{type(payload).__name__}: {payload}"})
+                return
+            if kind == "done":
+                intern_result = payload
+                break
+            if scorer is None:
+                header = {k: v for k, v in log.items() if k != "steps"}
+                scorer = IncrementalScorer.from_log({**header, "steps": []})
+            with stage("score_incremental"):
+                scorer.append(parse_steps([payload], scorer.run.timestamp_started))
+            yield from step_events(scorer)
+
+        if scorer is None:  # intern logged nothing
+            scorer = IncrementalScorer.from_log(intern_result["log"])
+        yield from step_events(scorer, run_finished=True)
+
+        summary = scorer.summary()
+        with stage("report"):
+            report_md = generate_report(scorer.run, scorer.steps, summary)
+        risk = compute_overall_risk(summary)
+        persist_runs([RunRecord.from_steps(scorer.run, scorer.steps, summary, ruleset_version())])
+        yield _sse(
+            "summary",
+            {
+                "final_answer_md": intern_result["final_answer"],
+                "summary": summary,
+                "risk": risk.dict(),
+                "report_markdown": report_md,
+            },
+        )
+
+        with stage("critic"):
+            critic_text = get_critic_advice(summary, report_md, use_cache=not req.fresh_critic)
+        yield _sse("critic", {"critic_markdown": critic_text})
+        yield _sse("done", {})
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,710 @@
+# backend/store.py
+
+"""
+SQLite repository of analyzed runs.
+
+Each analyzed run is persisted with its summary, overall risk and the tags
+of its flagged steps, so runs can be queried later without re-scoring the
+logs:
+
+    store = RunStore(".cache/runs.sqlite")
+    store.save(RunRecord.from_analysis(log, analyze_log(log)))
+    page = store.query(agent="chaos_intern", tags=["tool_misuse"],
+                       level="High", since="2025-06-01T00:00:00Z")
+    page["runs"], page["next_cursor"]
+
+Tables:
+
+    runs       one row per run (latest analysis wins)
+    run_tags   (run_id, tag) -> number of steps with that tag
+    step_tags  (run_id, step_id, tag) for every flagged step
+    steps      text of every step (content, tool arguments, tool result)
+    step_fts   FTS5 index over `steps`, for RunStore.search
+
+Queries are served from indexes on agent_name, run_id, start time, risk
+level / score and failure tag, and paginated by keyset (an opaque cursor
+holding the last row's sort key), so a page costs the same on page 1 and
+page 10,000.
+
+Full-text search over step text (needs an SQLite built with FTS5; without
+it `searchable` is False and step text is not kept):
+
+    store.search('"2027 Global Council"', mode="fts", agent="chaos_intern")
+    store.search("web_search", fields=["arguments"], tags=["tool_misuse"])
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .analysis.overall_risk import LOW_MAX, MEDIUM_MAX, overall_risk
+from .schema import Run, Step, parse_started
+
+ORDERS = ("started", "risk")
+MAX_LIMIT = 500
+
+# searchable step text columns (RunStore.search fields=)
+SEARCH_FIELDS = ("content", "arguments", "result")
+SEARCH_MODES = ("words", "phrase", "fts")
+# text longer than this (per step and field) is indexed truncated
+MAX_FIELD_CHARS = 64 * 1024
+SNIPPET_MARKS = ("**", "**")
+SNIPPET_TOKENS = 16
+
+# risk level -> score range (overall_risk.risk_level), so level filters on
+# risk-ordered queries can use the risk_score indexes
+LEVEL_SCORES = {
+    "Low": (0, LOW_MAX - 1),
+    "Medium": (LOW_MAX, MEDIUM_MAX - 1),
+    "High": (MEDIUM_MAX, 100),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id            TEXT PRIMARY KEY,
+    agent_name        TEXT NOT NULL,
+    started_at        INTEGER NOT NULL,  -- epoch ms (UTC), 0 if unknown
+    timestamp_started TEXT,
+    timestamp_finished TEXT,
+    user_query        TEXT,
+    total_steps       INTEGER NOT NULL,
+    flagged_steps     INTEGER NOT NULL,
+    risk_score        INTEGER NOT NULL,
+    risk_level        TEXT NOT NULL,
+    ruleset           TEXT,
+    analyzed_at       INTEGER NOT NULL,  -- epoch ms
+    summary           TEXT NOT NULL      -- JSON
+);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started_at, run_id);
+CREATE INDEX IF NOT EXISTS runs_agent_started ON runs (agent_name, started_at, run_id);
+CREATE INDEX IF NOT EXISTS runs_level_started ON runs (risk_level, started_at, run_id);
+CREATE INDEX IF NOT EXISTS runs_risk ON runs (risk_score, started_at, run_id);
+CREATE INDEX IF NOT EXISTS runs_agent_risk ON runs (agent_name, risk_score, started_at, run_id);
+
+CREATE TABLE IF NOT EXISTS run_tags (
+    run_id     TEXT NOT NULL,
+    tag        TEXT NOT NULL,
+    count      INTEGER NOT NULL,
+    started_at INTEGER NOT NULL,  -- copy of runs.started_at for tag + time scans
+    PRIMARY KEY (run_id, tag)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS run_tags_tag_started ON run_tags (tag, started_at, run_id);
+
+CREATE TABLE IF NOT EXISTS step_tags (
+    run_id     TEXT NOT NULL,
+    step_id    INTEGER NOT NULL,
+    tag        TEXT NOT NULL,
+    risk_score REAL NOT NULL,
+    PRIMARY KEY (run_id, step_id, tag)
+) WITHOUT ROWID;
+"""
+
+_SEARCH_SCHEMA = """
+CREATE TABLE IF NOT EXISTS steps (
+    id         INTEGER PRIMARY KEY,  -- step_fts rowid; later saves get higher ids
+    run_id     TEXT NOT NULL,
+    step_id    INTEGER NOT NULL,
+    type       TEXT NOT NULL,
+    agent_name TEXT NOT NULL,
+    tool_name  TEXT,
+    tags       TEXT NOT NULL,  -- space-separated failure tags
+    content    TEXT NOT NULL,
+    arguments  TEXT NOT NULL,  -- JSON; memory key for memory steps
+    result     TEXT NOT NULL   -- JSON + error; memory value for memory steps
+);
+CREATE INDEX IF NOT EXISTS steps_run ON steps (run_id, step_id);
+
+-- agent_name, tool_name and tags are indexed too so that filters on them
+-- are intersected inside the FTS index instead of checked row by row
+CREATE VIRTUAL TABLE IF NOT EXISTS step_fts USING fts5(
+    content, arguments, result, agent_name, tool_name, tags,
+    content='steps', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS steps_fts_insert AFTER INSERT ON steps BEGIN
+    INSERT INTO step_fts (rowid, content, arguments, result, agent_name, tool_name, tags)
+    VALUES (new.id, new.content, new.arguments, new.result, new.agent_name,
+            new.tool_name, new.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS steps_fts_delete AFTER DELETE ON steps BEGIN
+    INSERT INTO step_fts (step_fts, rowid, content, arguments, result, agent_name, tool_name, tags)
+    VALUES ('delete', old.id, old.content, old.arguments, old.result, old.agent_name,
+            old.tool_name, old.tags);
+END;
+"""
+
+# (step_id, type, tool_name, content, arguments, result) of one step
+StepText = Tuple[int, str, Optional[str], Optional[str], Any, Any]
+
+
+def to_epoch_ms(timestamp: Any) -> Optional[int]:
+    """ISO timestamp -> epoch ms; naive times are taken as UTC."""
+    if timestamp is None or timestamp == "":
+        return None
+    moment = parse_started(str(timestamp).replace("Z", "+00:00"))
+    if moment is None:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp() * 1000)
+
+
+def _field_text(value: Any) -> str:
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        value = json.dumps(value, ensure_ascii=False, default=str)
+    return value[:MAX_FIELD_CHARS]
+
+
+def _join_text(*values: Any) -> str:
+    return "\n".join(t for t in (_field_text(v) for v in values) if t)
+
+
+def _fts_phrase(text: str) -> str:
+    """`text` as one FTS5 phrase (a string literal)."""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _fts_query(q: str, mode: str, fields: Sequence[str]) -> str:
+    """User query -> FTS5 MATCH expression restricted to `fields`."""
+    if mode == "phrase":
+        expr = _fts_phrase(q)
+    elif mode == "words":
+        expr = " ".join(_fts_phrase(word) for word in q.split())
+    else:
+        expr = q
+    return "{%s} : (%s)" % (" ".join(fields), expr)
+
+
+def _encode_cursor(key: Sequence[Any]) -> str:
+    raw = json.dumps(list(key), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except ValueError:
+        raise ValueError("Invalid cursor")
+    if not isinstance(key, list) or len(key) != size:
+        raise ValueError("Invalid cursor")
+    return key
+
+
+@dataclass(slots=True)
+class RunRecord:
+    """What the store keeps about one analyzed run."""
+
+    run_id: str
+    agent_name: str
+    timestamp_started: Optional[str]
+    timestamp_finished: Optional[str]
+    user_query: Optional[str]
+    summary: Dict[str, Any]
+    # (step_id, tags, risk_score) of flagged steps
+    step_tags: List[Tuple[int, List[str], float]] = field(default_factory=list)
+    ruleset: Optional[str] = None
+    # text of every step, for search (empty: nothing indexed)
+    step_text: List[StepText] = field(default_factory=list)
+
+    @classmethod
+    def from_analysis(
+        cls, log_data: Dict[str, Any], result: Dict[str, Any], ruleset: Optional[str] = None
+    ) -> "RunRecord":
+        """From a raw log and its api.analyze_log result."""
+        step_tags = [
+            (s["step_id"], list(s["tags"]), float(s["analysis"]["risk_score"] or 0.0))
+            for s in result["steps"]
+            if s.get("tags")
+        ]
+        step_text = [
+            (
+                s["step_id"],
+                s["type"],
+                s.get("tool_name"),
+                s.get("content"),
+                s.get("arguments") if s.get("key") is None else s["key"],
+                _join_text(s.get("result"), s.get("error"), s.get("value")),
+            )
+            for s in result["steps"]
+        ]
+        return cls(
+            run_id=str(log_data.get("run_id")),
+            agent_name=str(log_data.get("agent_name")),
+            timestamp_started=log_data.get("timestamp_started"),
+            timestamp_finished=log_data.get("timestamp_finished"),
+            user_query=log_data.get("user_query"),
+            summary=result["summary"],
+            step_tags=step_tags,
+            ruleset=ruleset,
+            step_text=step_text,
+        )
+
+    @classmethod
+    def from_steps(
+        cls,
+        run: Run,
+        steps: Sequence[Step],
+        summary: Dict[str, Any],
+        ruleset: Optional[str] = None,
+    ) -> "RunRecord":
+        """From scored Step objects (e.g. an IncrementalScorer)."""
+        step_tags = [
+            (s.step_id, list(s.analysis.failure_tags), float(s.analysis.risk_score or 0.0))
+            for s in steps
+            if s.analysis.failure_tags
+        ]
+        step_text = [
+            (
+                s.step_id,
+                s.type,
+                s.tool_name,
+                s.content,
+                s.arguments if s.key is None else s.key,
+                _join_text(s.result, s.error, s.value),
+            )
+            for s in steps
+        ]
+        return cls(
+            run_id=run.run_id,
+            agent_name=run.agent_name,
+            timestamp_started=run.timestamp_started,
+            timestamp_finished=run.timestamp_finished,
+            user_query=run.user_query,
+            summary=summary,
+            step_tags=step_tags,
+            ruleset=ruleset,
+            step_text=step_text,
+        )
+
+
+class RunStore:
+    """
+    Thread-safe SQLite run repository (one connection, WAL journal).
+
+    path: database file, or ":memory:".
+    search: keep step text in a full-text index (if SQLite has FTS5).
+    """
+
+    def __init__(self, path: str, search: bool = True):
+        self.path = path
+        if path != ":memory:":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            self.searchable = False
+            if search:
+                try:
+                    self._conn.executescript(_SEARCH_SCHEMA)
+                    self.searchable = True
+                except sqlite3.OperationalError:  # no FTS5 in this build
+                    pass
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self._conn.execute("PRAGMA optimize")
+            finally:
+                self._conn.close()
+
+    # ---- writes ----
+
+    def save(self, record: RunRecord) -> None:
+        self.save_many([record])
+
+    def save_many(self, records: Iterable[RunRecord]) -> int:
+        """Insert / replace runs in one transaction; returns how many."""
+        now = int(time.time() * 1000)
+        saved = 0
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN")
+            try:
+                for record in records:
+                    self._write(conn, record, now, self.searchable)
+                    saved += 1
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return saved
+
+    @staticmethod
+    def _write(conn: sqlite3.Connection, record: RunRecord, now: int, search: bool) -> None:
+        summary = record.summary
+        score, level = overall_risk(summary)
+        started_at = to_epoch_ms(record.timestamp_started) or 0
+        run_id = record.run_id
+
+        conn.execute("DELETE FROM run_tags WHERE run_id = ?", (run_id,))
+        conn.execute("DELETE FROM step_tags WHERE run_id = ?", (run_id,))
+        if search:
+            conn.execute("DELETE FROM steps WHERE run_id = ?", (run_id,))
+        conn.execute(
+            "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                run_id,
+                record.agent_name,
+                started_at,
+                record.timestamp_started,
+                record.timestamp_finished,
+                record.user_query,
+                int(summary.get("total_steps", 0)),
+                int(summary.get("flagged_steps", 0)),
+                score,
+                level,
+                record.ruleset,
+                now,
+                json.dumps(summary, separators=(",", ":")),
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO run_tags VALUES (?, ?, ?, ?)",
+            [
+                (run_id, tag, int(count), started_at)
+                for tag, count in (summary.get("by_failure_type") or {}).items()
+            ],
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO step_tags VALUES (?, ?, ?, ?)",
+            [
+                (run_id, step_id, tag, risk)
+                for step_id, tags, risk in record.step_tags
+                for tag in tags
+            ],
+        )
+        if not search:
+            return
+        tags_by_step = {step_id: " ".join(tags) for step_id, tags, _ in record.step_tags}
+        conn.executemany(
+            "INSERT INTO steps (run_id, step_id, type, agent_name, tool_name, tags, "
+            "content, arguments, result) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    run_id,
+                    step_id,
+                    step_type,
+                    record.agent_name,
+                    tool_name,
+                    tags_by_step.get(step_id, ""),
+                    _field_text(content),
+                    _field_text(arguments),
+                    _field_text(result),
+                )
+                for step_id, step_type, tool_name, content, arguments, result in record.step_text
+            ],
+        )
+
+    def delete(self, run_id: str) -> bool:
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN")
+            try:
+                conn.execute("DELETE FROM run_tags WHERE run_id = ?", (run_id,))
+                conn.execute("DELETE FROM step_tags WHERE run_id = ?", (run_id,))
+                if self.searchable:
+                    conn.execute("DELETE FROM steps WHERE run_id = ?", (run_id,))
+                deleted = conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,)).rowcount
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return deleted > 0
+
+    # ---- reads ----
+
+    def get(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """One run with its per-step tags, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            if row is None:
+                return None
+            steps = self._conn.execute(
+                "SELECT step_id, tag, risk_score FROM step_tags WHERE run_id = ? ORDER BY step_id",
+                (run_id,),
+            ).fetchall()
+        by_step: Dict[int, Dict[str, Any]] = {}
+        for step_id, tag, risk in steps:
+            entry = by_step.setdefault(step_id, {"step_id": step_id, "risk_score": risk, "tags": []})
+            entry["tags"].append(tag)
+        return {**self._row(row), "steps": list(by_step.values())}
+
+    def query(
+        self,
+        agent: Optional[str] = None,
+        tags: Sequence[str] = (),
+        level: Optional[str] = None,
+        min_risk: Optional[int] = None,
+        max_risk: Optional[int] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        order: str = "started",
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Runs matching every given filter, newest first (order="started") or
+        riskiest first (order="risk"):
+
+            {"runs": [...], "next_cursor": "..." | None}
+
+        tags: runs must have all of them. since / until: ISO timestamps
+        bounding the run start (since inclusive, until exclusive).
+        Raises ValueError on a bad order, level, timestamp or cursor.
+        """
+        if order not in ORDERS:
+            raise ValueError(f"Unknown order {order!r}; expected one of {list(ORDERS)}")
+        limit = max(1, min(int(limit), MAX_LIMIT))
+
+        tag_list = list(dict.fromkeys(tags))
+        # With only tags (and risk / time bounds) to go on, walk the
+        # (tag, started_at) index newest first and look up each run; with an
+        # agent or level, SQLite's own choice of index is better. For
+        # order="risk", runs are scanned by risk and tags probed by key.
+        drive_by_tag = bool(tag_list) and order == "started" and agent is None and level is None
+        joins: List[str] = []
+        join_params: List[Any] = []
+        where: List[str] = []
+        params: List[Any] = []
+        if drive_by_tag:
+            source = "run_tags t0 CROSS JOIN runs r ON r.run_id = t0.run_id"
+            where.append("t0.tag = ?")
+            params.append(tag_list[0])
+            extra_tags = tag_list[1:]
+            key_cols = ["t0.started_at", "t0.run_id"]
+        else:
+            source = "runs r"
+            extra_tags = tag_list
+            key_cols = ["r.started_at", "r.run_id"]
+            if order == "risk":
+                key_cols.insert(0, "r.risk_score")
+        join = "CROSS JOIN" if order == "risk" else "JOIN"
+        for tag in extra_tags:
+            alias = f"t{len(joins) + 1}"
+            joins.append(f"{join} run_tags {alias} ON {alias}.run_id = r.run_id AND {alias}.tag = ?")
+            join_params.append(tag)
+
+        if agent is not None:
+            where.append("r.agent_name = ?")
+            params.append(agent)
+        if level is not None:
+            if level not in LEVEL_SCORES:
+                raise ValueError(f"Unknown level {level!r}; expected one of {list(LEVEL_SCORES)}")
+            where.append("r.risk_level = ?")
+            params.append(level)
+            if order == "risk":  # lets the risk_score indexes serve the range
+                where.append("r.risk_score BETWEEN ? AND ?")
+                params.extend(LEVEL_SCORES[level])
+        if min_risk is not None:
+            where.append("r.risk_score >= ?")
+            params.append(int(min_risk))
+        if max_risk is not None:
+            where.append("r.risk_score <= ?")
+            params.append(int(max_risk))
+        for bound, op in ((since, ">="), (until, "<")):
+            if bound is None:
+                continue
+            ms = to_epoch_ms(bound)
+            if ms is None:
+                raise ValueError(f"Invalid timestamp {bound!r}")
+            where.append(f"{key_cols[-2]} {op} ?")
+            params.append(ms)
+
+        if cursor:
+            key = _decode_cursor(cursor, len(key_cols))
+            where.append(f"({', '.join(key_cols)}) < ({', '.join('?' * len(key))})")
+            params.extend(key)
+
+        sql = f"SELECT r.* FROM {source} " + " ".join(joins)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY " + ", ".join(f"{c} DESC" for c in key_cols) + " LIMIT ?"
+        params = join_params + params + [limit + 1]
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            key = [last["started_at"], last["run_id"]]
+            if order == "risk":
+                key.insert(0, last["risk_score"])
+            next_cursor = _encode_cursor(key)
+        return {"runs": [self._row(row) for row in rows], "next_cursor": next_cursor}
+
+    def search(
+        self,
+        q: str,
+        mode: str = "words",
+        fields: Sequence[str] = SEARCH_FIELDS,
+        agent: Optional[str] = None,
+        tags: Sequence[str] = (),
+        tool: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Steps whose text matches `q`, most recently saved first:
+
+            {"hits": [{run_id, step_id, type, tool_name, agent_name,
+                       timestamp_started, tags, field, snippet}, ...],
+             "next_cursor": "..." | None}
+
+        mode: "words" (every word, anywhere in the field), "phrase" (q as
+        one exact phrase) or "fts" (q in FTS5 query syntax: quoted phrases,
+        AND / OR / NOT, NEAR(...), prefix*). fields: which of
+        SEARCH_FIELDS to search. tags: the step must have all of them.
+        tool: tool_name of the step. since / until: bound the run start.
+        `snippet` is an excerpt of the first matching field (`field`) with
+        the hits marked by SNIPPET_MARKS.
+        Raises ValueError on a bad query, mode, field, timestamp or cursor.
+        """
+        if not self.searchable:
+            raise RuntimeError("Full-text search needs an SQLite build with FTS5")
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown mode {mode!r}; expected one of {list(SEARCH_MODES)}")
+        fields = list(dict.fromkeys(fields))
+        unknown = [f for f in fields if f not in SEARCH_FIELDS]
+        if unknown or not fields:
+            raise ValueError(f"Unknown fields {unknown}; expected some of {list(SEARCH_FIELDS)}")
+        if not q.strip():
+            raise ValueError("Empty search query")
+        limit = max(1, min(int(limit), MAX_LIMIT))
+        tag_list = list(dict.fromkeys(tags))
+
+        # Filters on indexed columns go into the MATCH expression so FTS5
+        # intersects them with the query; tokenizing loses exact equality
+        # ("a_b" matches "a b"), so they are checked again on the row.
+        match = [_fts_query(q, mode, fields)]
+        where: List[str] = []
+        params: List[Any] = []
+        if agent is not None:
+            match.append("agent_name : " + _fts_phrase(agent))
+            where.append("s.agent_name = ?")
+            params.append(agent)
+        if tool is not None:
+            match.append("tool_name : " + _fts_phrase(tool))
+            where.append("s.tool_name = ?")
+            params.append(tool)
+        for tag in tag_list:
+            match.append("tags : " + _fts_phrase(tag))
+            where.append(
+                "EXISTS (SELECT 1 FROM step_tags t WHERE t.run_id = s.run_id "
+                "AND t.step_id = s.step_id AND t.tag = ?)"
+            )
+            params.append(tag)
+        for bound, op in ((since, ">="), (until, "<")):
+            if bound is None:
+                continue
+            ms = to_epoch_ms(bound)
+            if ms is None:
+                raise ValueError(f"Invalid timestamp {bound!r}")
+            where.append(f"r.started_at {op} ?")
+            params.append(ms)
+        if cursor:
+            (last_id,) = _decode_cursor(cursor, 1)
+            where.append("f.rowid < ?")
+            params.append(int(last_id))
+
+        columns = {name: i for i, name in enumerate(SEARCH_FIELDS)}
+        open_mark, close_mark = SNIPPET_MARKS
+        snippets = ", ".join(
+            f"snippet(step_fts, {columns[name]}, ?, ?, '…', {SNIPPET_TOKENS})" for name in fields
+        )
+        sql = (
+            f"SELECT s.id, s.run_id, s.step_id, s.type, s.tool_name, s.agent_name, s.tags, "
+            f"r.timestamp_started, {snippets} "
+            "FROM step_fts f CROSS JOIN steps s ON s.id = f.rowid "
+            "JOIN runs r ON r.run_id = s.run_id "
+            "WHERE step_fts MATCH ?"
+        )
+        if where:
+            sql += " AND " + " AND ".join(where)
+        sql += " ORDER BY f.rowid DESC LIMIT ?"
+        params = [open_mark, close_mark] * len(fields) + [" AND ".join(match)] + params
+        params.append(limit + 1)
+
+        with self._lock:
+            try:
+                rows = self._conn.execute(sql, params).fetchall()
+            except sqlite3.OperationalError as exc:  # FTS5 query syntax
+                raise ValueError(f"Invalid search query: {exc}")
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = _encode_cursor([rows[-1][0]])
+        hits = []
+        for row in rows:
+            found = next(
+                ((name, text) for name, text in zip(fields, row[8:]) if open_mark in (text or "")),
+                (fields[0], row[8]),
+            )
+            hits.append(
+                {
+                    "run_id": row[1],
+                    "step_id": row[2],
+                    "type": row[3],
+                    "tool_name": row[4],
+                    "agent_name": row[5],
+                    "timestamp_started": row[7],
+                    "tags": row[6].split(),
+                    "field": found[0],
+                    "snippet": found[1],
+                }
+            )
+        return {"hits": hits, "next_cursor": next_cursor}
+
+    def tag_counts(self, agent: Optional[str] = None) -> Dict[str, int]:
+        """Number of stored runs per failure tag."""
+        sql = "SELECT t.tag, COUNT(*) FROM run_tags t"
+        params: List[Any] = []
+        if agent is not None:
+            sql += " JOIN runs r ON r.run_id = t.run_id WHERE r.agent_name = ?"
+            params.append(agent)
+        sql += " GROUP BY t.tag ORDER BY COUNT(*) DESC"
+        with self._lock:
+            return {tag: n for tag, n in self._conn.execute(sql, params).fetchall()}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    @staticmethod
+    def _row(row: sqlite3.Row) -> Dict[str, Any]:
+        summary = json.loads(row["summary"])
+        return {
+            "run_id": row["run_id"],
+            "agent_name": row["agent_name"],
+            "timestamp_started": row["timestamp_started"],
+            "timestamp_finished": row["timestamp_finished"],
+            "user_query": row["user_query"],
+            "total_steps": row["total_steps"],
+            "flagged_steps": row["flagged_steps"],
+            "risk": {"score": row["risk_score"], "level": row["risk_level"]},
+            "by_failure_type": summary.get("by_failure_type", {}),
+            "ruleset": row["ruleset"],
+            "analyzed_at": datetime.fromtimestamp(
+                row["analyzed_at"] / 1000, tz=timezone.utc
+            ).isoformat(),
+        }
@@ -0,0 +1,129 @@
+# backend/views.py
+
+"""
+Field projection and result truncation for timeline steps.
+
+The frontend timeline only needs a handful of fields, while `full` keeps
+every raw log field for debugging. Callers pick one with `view`, or list
+the fields they want:
+
+    ?view=timeline
+    ?view=full
+    ?fields=step_id,type,text,tags,result
+
+Tool results larger than `max_result_bytes` (serialized) are replaced by a
+preview of at most that many UTF-8 bytes plus a `result_ref` pointing at
+the endpoint that returns the full value; the full value is kept in a
+bounded blob store, keyed by run_id, step_id and a digest of the value (so
+two logs that reuse a run_id cannot overwrite each other's results).
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
+
+from .serialization import dumps
+
+TIMELINE_FIELDS: Tuple[str, ...] = ("step_id", "type", "label", "short", "text", "tags")
+
+STEP_FIELDS: Tuple[str, ...] = TIMELINE_FIELDS + (
+    "role",
+    "timestamp",
+    "content",
+    "tool_name",
+    "call_id",
+    "arguments",
+    "result",
+    "error",
+    "operation",
+    "key",
+    "value",
+    "start_ns",
+    "end_ns",
+    "metadata",
+    "analysis",
+)
+
+_ELLIPSIS = "…".encode("utf-8")
+
+VIEWS: Dict[str, Tuple[str, ...]] = {
+    "timeline": TIMELINE_FIELDS,
+    "full": STEP_FIELDS,
+}
+
+
+def resolve_fields(view: str = "full", fields: Optional[str] = None) -> Tuple[str, ...]:
+    """
+    Field names to emit per step. `fields` (comma-separated) wins over
+    `view`. Raises ValueError for unknown views or fields.
+    """
+    if fields:
+        names = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in names if f not in STEP_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown step fields: {unknown} (expected any of {list(STEP_FIELDS)})")
+        return tuple(dict.fromkeys(names))
+    try:
+        return VIEWS[view]
+    except KeyError:
+        raise ValueError(f"Unknown view: {view!r} (expected one of {list(VIEWS)})")
+
+
+def result_digest(payload: bytes) -> str:
+    """Content digest of a serialized result (part of its key and href)."""
+    return hashlib.sha256(payload).hexdigest()[:32]
+
+
+def result_key(run_id: str, step_id: Any, digest: str) -> str:
+    """Blob store key of one step's full result."""
+    return hashlib.sha256(f"{run_id}\x00{step_id}\x00{digest}".encode("utf-8")).hexdigest()
+
+
+def result_href(run_id: str, step_id: Any, digest: str) -> str:
+    return f"/runs/{quote(str(run_id), safe='')}/steps/{step_id}/result?digest={digest}"
+
+
+def project_steps(
+    steps: Iterable[Dict[str, Any]],
+    fields: Tuple[str, ...],
+    run_id: Optional[str] = None,
+    max_result_bytes: int = 0,
+    store=None,
+) -> List[Dict[str, Any]]:
+    """
+    Keep only `fields` of each timeline step dict.
+
+    With max_result_bytes > 0, a run_id and a store (anything with
+    put_payload(key, bytes), e.g. an AnalysisCache), oversized `result`
+    values are moved to the store and replaced by a preview + result_ref.
+    """
+    truncate = "result" in fields and max_result_bytes > 0 and store is not None and run_id
+    out: List[Dict[str, Any]] = []
+    for step in steps:
+        projected = {name: step[name] for name in fields if name in step}
+        if truncate and projected.get("result") is not None:
+            _truncate_result(projected, step, run_id, max_result_bytes, store)
+        out.append(projected)
+    return out
+
+
+def _truncate_result(
+    projected: Dict[str, Any], step: Dict[str, Any], run_id: str, limit: int, store
+) -> None:
+    result = step["result"]
+    payload = dumps(result)
+    if len(payload) <= limit:
+        return
+
+    step_id = step.get("step_id")
+    digest = result_digest(payload)
+    store.put_payload(result_key(run_id, step_id, digest), payload)
+    # cut the UTF-8 bytes (not characters), leaving room for the ellipsis
+    # unless the limit is too small to hold it
+    raw = result.encode("utf-8") if isinstance(result, str) else payload
+    ellipsis = _ELLIPSIS if limit > len(_ELLIPSIS) else b""
+    preview = raw[: limit - len(ellipsis)] + ellipsis
+    projected["result"] = preview.decode("utf-8", "ignore")
+    projected["result_ref"] = {"href": result_href(run_id, step_id, digest), "size": len(payload)}
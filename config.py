@@ -17,10 +17,95 @@ load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", None)
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
 
+# ---- LLM rate limits (shared by intern + critic; 0 → unlimited) ----
+LLM_RPM = float(os.getenv("LLM_RPM", "60"))
+LLM_TPM = float(os.getenv("LLM_TPM", "1000000"))
+# Output tokens reserved per call until the real usage is known
+LLM_EXPECTED_OUTPUT_TOKENS = int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", "512"))
+
 # ---- Runtime Modes ----
 # If True → run Chaos Intern & Critic without calling Gemini (for testing)
 FAKE_MODE = os.getenv("FAKE_MODE", "false").lower() == "true"
 
+# ---- Chaos Intern ----
+# Independent intern steps (LLM / tool calls) run concurrently up to this limit
+INTERN_MAX_PARALLEL = int(os.getenv("INTERN_MAX_PARALLEL", "4"))
+
+# ---- MRILogger streaming (JSONL) mode ----
+# Set INTERN_LOG_DIR to also stream every Chaos Intern run to
+# <dir>/<run_id>.jsonl while it runs
+INTERN_LOG_DIR = os.getenv("INTERN_LOG_DIR") or None
+MRI_LOG_FLUSH_BYTES = int(os.getenv("MRI_LOG_FLUSH_BYTES", str(64 * 1024)))
+MRI_LOG_FLUSH_INTERVAL = float(os.getenv("MRI_LOG_FLUSH_INTERVAL", "1.0"))  # seconds
+MRI_LOG_ROTATE_BYTES = int(os.getenv("MRI_LOG_ROTATE_BYTES", "0")) or None  # 0 → no rotation
+
+# ---- Batch analysis ----
+# Worker processes for /analyze_batch (0 → one per CPU; one pool shared by all
+# requests, and the cap of the per-request "workers") and logs per worker chunk
+ANALYZE_WORKERS = int(os.getenv("ANALYZE_WORKERS", "0"))
+ANALYZE_CHUNKSIZE = int(os.getenv("ANALYZE_CHUNKSIZE", "16"))
+
+# ---- Latency rules ----
+# slow_tool: latency above this percentile of the tool's last
+# LATENCY_HISTORY_WINDOW calls in the same run (needs LATENCY_MIN_SAMPLES
+# of them first)
+LATENCY_SLOW_PERCENTILE = float(os.getenv("LATENCY_SLOW_PERCENTILE", "95"))
+LATENCY_MIN_SAMPLES = int(os.getenv("LATENCY_MIN_SAMPLES", "20"))
+LATENCY_HISTORY_WINDOW = int(os.getenv("LATENCY_HISTORY_WINDOW", "1000"))
+
+# ---- Analysis result cache ----
+# In-memory LRU for /analyze results; set ANALYZE_CACHE_DIR to also keep a
+# persistent on-disk tier that survives restarts.
+ANALYZE_CACHE_ENABLED = os.getenv("ANALYZE_CACHE_ENABLED", "true").lower() == "true"
+ANALYZE_CACHE_MAX_ENTRIES = int(os.getenv("ANALYZE_CACHE_MAX_ENTRIES", "256"))
+ANALYZE_CACHE_MAX_BYTES = int(os.getenv("ANALYZE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+ANALYZE_CACHE_DIR = os.getenv("ANALYZE_CACHE_DIR") or None
+ANALYZE_CACHE_DISK_MAX_BYTES = int(os.getenv("ANALYZE_CACHE_DISK_MAX_BYTES", "0")) or None
+# Per-text rule features (lowered text, phrase hits, ...), reused when the
+# same content is scored again, e.g. after a ruleset change (0 → disabled)
+FEATURE_CACHE_MAX_ENTRIES = int(os.getenv("FEATURE_CACHE_MAX_ENTRIES", "50000"))
+FEATURE_CACHE_MAX_CHARS = int(os.getenv("FEATURE_CACHE_MAX_CHARS", str(32 * 1024 * 1024)))
+
+# ---- Run store (/runs) ----
+# SQLite database of analyzed runs (summary, risk, tags) for /runs queries.
+# Set RUN_STORE_PATH to an empty string to disable.
+RUN_STORE_PATH = os.getenv("RUN_STORE_PATH", ".cache/runs.sqlite") or None
+# Full-text index of step content / tool arguments / results (/search);
+# keeps the text of every step, so the database grows with the logs
+RUN_STORE_SEARCH = os.getenv("RUN_STORE_SEARCH", "true").lower() == "true"
+
+# ---- Response payloads ----
+# Default max_result_bytes of /analyze and /run_intern: tool results larger
+# than this (serialized bytes) are truncated in step responses and served
+# from /runs/{run_id}/steps/{step_id}/result. 0 → never (the default, so
+# plain responses stay complete and cached payloads are sent as-is).
+RESULT_INLINE_MAX_BYTES = int(os.getenv("RESULT_INLINE_MAX_BYTES", "0"))
+RESULT_STORE_MAX_BYTES = int(os.getenv("RESULT_STORE_MAX_BYTES", str(64 * 1024 * 1024)))
+RESULT_STORE_DIR = os.getenv("RESULT_STORE_DIR") or None
+# gzip responses above this size for clients sending Accept-Encoding: gzip
+GZIP_MIN_SIZE = int(os.getenv("GZIP_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "5"))
+
+# ---- Incident report ----
+# Flagged-step content / notes are cut after REPORT_STEP_MAX_CHARS; at most
+# REPORT_MAX_STEPS flagged steps (REPORT_MAX_STEPS_PER_TAG per tag) are
+# listed, the rest rolled up per tag (0 → unlimited). Applies to
+# report_markdown and the critic prompt; POST /report can override them.
+REPORT_STEP_MAX_CHARS = int(os.getenv("REPORT_STEP_MAX_CHARS", "2000")) or None
+REPORT_MAX_STEPS = int(os.getenv("REPORT_MAX_STEPS", "200")) or None
+REPORT_MAX_STEPS_PER_TAG = int(os.getenv("REPORT_MAX_STEPS_PER_TAG", "50")) or None
+
+# ---- Metrics (/metrics) ----
+# Time every rule function call (adds ~5-10% to scoring time)
+METRICS_RULE_TIMING = os.getenv("METRICS_RULE_TIMING", "true").lower() == "true"
+
+# ---- Critic response cache ----
+# Identical summary + report → reuse the previous Gemini critique.
+# Set CRITIC_CACHE_DIR to an empty string to disable.
+CRITIC_CACHE_DIR = os.getenv("CRITIC_CACHE_DIR", ".cache/critic") or None
+CRITIC_CACHE_TTL = float(os.getenv("CRITIC_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+CRITIC_CACHE_MAX_BYTES = int(os.getenv("CRITIC_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
 # ---- Project Paths ----
 LOGS_DIR = os.getenv("LOGS_DIR", "data/sample_logs")
 
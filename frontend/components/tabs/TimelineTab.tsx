@@ -19,8 +19,11 @@ const tagSeverity: Record<string, Severity> = {
   speculative_metrics: "medium",
   weak_grounding: "medium",
   memory_drift: "medium",
+  orphan_tool_call: "medium",
+  slow_tool: "medium",
 
   apology: "low",
+  latency_outlier: "low",
 };
 
 function getTagClasses(tag: string): string {
@@ -16,7 +16,7 @@ export const runIntern = async (
     mode,
   };
 
-  const resp = await fetch(`${API_BASE_URL}/run_intern`, {
+  const resp = await fetch(`${API_BASE_URL}/run_intern?view=timeline`, {
     method: "POST",
     headers: {
       "Content-Type": "application/json",
@@ -0,0 +1,71 @@
+import pytest
+
+from backend.analysis.columnar import ColumnarTraces
+from backend.analysis.rules import RuleRegistry
+from backend.analysis.risk_scorer import score_risks
+from backend.parser import parse_log_dict
+
+
+def _log(run_id, contents):
+    return {
+        "schema_version": "1.1",
+        "run_id": run_id,
+        "agent_name": "test-agent",
+        "timestamp_started": "2025-01-01T00:00:00",
+        "user_query": "q",
+        "steps": [
+            {
+                "step_id": i,
+                "type": "thought",
+                "role": "agent",
+                "timestamp": "2025-01-01T00:00:01",
+                "content": content,
+            }
+            for i, content in enumerate(contents)
+        ],
+    }
+
+
+def _tag_registry():
+    """Flags each step with the tags listed in its content."""
+    registry = RuleRegistry()
+
+    @registry.register(step_types=["thought"])
+    def tags_from_content(step, ctx, out):
+        for tag in step.content.split():
+            out.flag(tag, 0.5)
+
+    return registry
+
+
+def test_more_than_64_distinct_tags():
+    registry = _tag_registry()
+    logs = [
+        _log("run-a", [" ".join(f"tag{i}" for i in range(40)), "", "tag0 tag69"]),
+        _log("run-b", [" ".join(f"tag{i}" for i in range(30, 70)), "tag65"]),
+    ]
+
+    traces = ColumnarTraces.from_logs(logs, registry)
+
+    assert len(traces.tag_names) == 70
+    assert traces.tag_mask.shape == (5, 2)
+    assert traces.failure_tags(2) == ["tag0", "tag69"]
+    assert traces.failure_tags(4) == ["tag65"]
+    assert traces.fleet_tag_counts()["tag69"] == 2
+
+    for log, summary in zip(logs, traces.summaries()):
+        run = parse_log_dict(log)
+        _, expected = score_risks(run, registry)
+        assert summary["by_failure_type"] == expected["by_failure_type"]
+
+
+def test_more_than_64_tags_round_trip_through_arrow():
+    pytest.importorskip("pyarrow")
+    logs = [_log("run-a", [" ".join(f"tag{i}" for i in range(70)), "tag3"])]
+    traces = ColumnarTraces.from_logs(logs, _tag_registry())
+
+    back = ColumnarTraces.from_arrow(traces.to_arrow())
+
+    assert back.tag_names == traces.tag_names
+    assert (back.tag_mask == traces.tag_mask).all()
+    assert back.failure_tags(1) == ["tag3"]